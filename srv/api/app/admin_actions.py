@@ -1,31 +1,52 @@
 from __future__ import annotations
 
+import codecs
+import copy
 import datetime as dt
 import hashlib
 import json
 import os
+import queue
 import re
 import secrets
 import shutil
 import sqlite3
+import string
 import subprocess
 import sys
 import threading
+import time
+import types
+from contextlib import closing
 from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Callable, Dict, List, Sequence, TextIO
+from typing import Any, Callable, Dict, List, Mapping, Sequence, TextIO
 
 from . import admin_db
 from .runtime_perms import apply_configured_umask
 
 
-ROOT_DIR = Path(__file__).resolve().parents[3]
-
 RUNNING_STATUSES = {"queued", "running"}
 TERMINAL_STATUSES = {"succeeded", "failed", "cancelled"}
 
 _RUNNER_LOCK = threading.Lock()
 
+# In-process running/queued job counts guarded by _RUNNER_LOCK. They are only a
+# fast path for "nothing to do" checks and are reconciled against SQLite
+# periodically; the queue and running caps are enforced by guarded SQL so a
+# drifted count (or a second API process) cannot overshoot them.
+_JOB_COUNTS_RECONCILE_SECONDS = 30.0
+_RUNNING_JOBS_COUNT = 0
+_QUEUED_JOBS_COUNT = 0
+_JOB_COUNTS_CHECKED_AT: float | None = None
+
+# Fixed ASCII charsets for identifiers that end up in filesystem paths.
+_SAFE_NAME_CHARS = frozenset(string.ascii_letters + string.digits + "_-")
+_BUILD_ID_CHARS = _SAFE_NAME_CHARS | {":"}
+_BACKUP_NAME_CHARS = _SAFE_NAME_CHARS | {"."}
+_CANDIDATE_HASH_RE = re.compile(r"[0-9a-f]{64}")
+
 
 class ActionValidationError(ValueError):
     pass
@@ -35,11 +56,46 @@ class ActionPermissionError(PermissionError):
     pass
 
 
+@dataclass(frozen=True)
+class _FieldPlan:
+    """One params_schema entry resolved once so validation does no dict lookups."""
+
+    name: str
+    kind: str  # boolean | integer | string
+    required: bool
+    has_default: bool
+    default: Any
+    allow_empty: bool
+    min_value: int | None
+    max_value: int | None
+    enum_values: frozenset[Any] | None
+    enum_label: str
+
+
+def _compile_field_plan(name: str, field_schema: Mapping[str, Any]) -> _FieldPlan:
+    field_type = str(field_schema.get("type", "string"))
+    min_value = field_schema.get("min")
+    max_value = field_schema.get("max")
+    enum_values = field_schema.get("enum")
+    return _FieldPlan(
+        name=name,
+        kind=field_type if field_type in {"boolean", "integer"} else "string",
+        required=bool(field_schema.get("required", False)),
+        has_default="default" in field_schema,
+        default=field_schema.get("default"),
+        allow_empty=bool(field_schema.get("allow_empty", False)),
+        min_value=int(min_value) if min_value is not None else None,
+        max_value=int(max_value) if max_value is not None else None,
+        enum_values=frozenset(enum_values) if enum_values is not None else None,
+        enum_label=", ".join(map(str, enum_values)) if enum_values is not None else "",
+    )
+
+
 @dataclass(frozen=True)
 class ActionSpec:
     name: str
     description: str
-    params_schema: Dict[str, Dict[str, Any]]
+    params_schema: Mapping[str, Mapping[str, Any]]
     display_name: str | None = None
     category: str = "operations"
     hidden: bool = False
@@ -51,6 +107,30 @@ class ActionSpec:
     operator_guidance: Dict[str, Any] = field(default_factory=dict)
     build_command: Callable[[Dict[str, Any]], List[str]] | None = None
     run_native: Callable[[Dict[str, Any], TextIO], int] | None = None
+    field_plans: tuple[_FieldPlan, ...] = field(init=False, repr=False, compare=False)
+    schema_keys: frozenset[str] = field(init=False, repr=False, compare=False)
+    required_role_set: frozenset[str] = field(init=False, repr=False, compare=False)
+    effective_confirmation: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        # Specs are shared module-level constants; freeze what callers can reach.
+        schema = types.MappingProxyType(
+            {name: types.MappingProxyType(dict(field_schema)) for name, field_schema in (self.params_schema or {}).items()}
+        )
+        object.__setattr__(self, "params_schema", schema)
+        object.__setattr__(self, "required_roles", tuple(map(str, self.required_roles)))
+        object.__setattr__(
+            self,
+            "field_plans",
+            tuple(_compile_field_plan(name, field_schema) for name, field_schema in schema.items()),
+        )
+        object.__setattr__(self, "schema_keys", frozenset(schema))
+        object.__setattr__(self, "required_role_set", frozenset(self.required_roles))
+        object.__setattr__(
+            self,
+            "effective_confirmation",
+            self.confirmation_phrase or _confirmation_for(self.name),
+        )
 
 
 @dataclass(frozen=True)
@@ -65,9 +145,14 @@ def _utc_now() -> dt.datetime:
 
 
 def _to_iso(value: dt.datetime) -> str:
-    return value.replace(microsecond=0).isoformat().replace("+00:00", "Z")
+    # Callers pass UTC datetimes; format directly instead of isoformat()+replace chains.
+    return (
+        f"{value.year:04d}-{value.month:02d}-{value.day:02d}"
+        f"T{value.hour:02d}:{value.minute:02d}:{value.second:02d}Z"
+    )
 
 
+@lru_cache(maxsize=None)
 def _parse_env_int(name: str, default: int) -> int:
     raw = os.getenv(name, "")
     if not raw:
@@ -79,13 +164,15 @@ def _parse_env_int(name: str, default: int) -> int:
     return value if value > 0 else default
 
 
+@lru_cache(maxsize=None)
 def _state_dir() -> Path:
     raw = os.getenv("SPACEGATE_STATE_DIR") or os.getenv("SPACEGATE_DATA_DIR")
     if raw:
         return Path(raw).expanduser()
-    return ROOT_DIR / "data"
+    return admin_db.root_dir() / "data"
 
 
+@lru_cache(maxsize=None)
 def _jobs_dir() -> Path:
     raw = os.getenv("SPACEGATE_ADMIN_JOBS_DIR", "").strip()
     if raw:
@@ -93,6 +180,7 @@ def _jobs_dir() -> Path:
     return _state_dir() / "admin" / "jobs"
 
 
+@lru_cache(maxsize=None)
 def _backups_dir() -> Path:
     raw = os.getenv("SPACEGATE_ADMIN_BACKUPS_DIR", "").strip()
     if raw:
@@ -100,6 +188,7 @@ def _backups_dir() -> Path:
     return _state_dir() / "admin" / "backups"
 
 
+@lru_cache(maxsize=None)
 def _dl_root() -> Path:
     raw = os.getenv("SPACEGATE_DL_ROOT", "").strip()
     if raw:
@@ -109,6 +198,14 @@ def _dl_root() -> Path:
     return Path("/srv/spacegate/dl")
 
 
+def clear_caches() -> None:
+    """Drop cached environment lookups and scans so tests can re-point state directories."""
+    global _BACKUPS_CACHE
+    for cached in (_parse_env_int, _state_dir, _jobs_dir, _backups_dir, _dl_root):
+        cached.cache_clear()
+    _BACKUPS_CACHE = None
+
+
 def _ensure_jobs_dir() -> Path:
     path = _jobs_dir()
     path.mkdir(parents=True, exist_ok=True)
@@ -122,21 +219,20 @@ def _ensure_backups_subdir(name: str) -> Path:
 
 
 def _is_safe_build_id(value: str) -> bool:
-    if not value:
-        return False
-    allowed = set("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-_:")
-    return all(ch in allowed for ch in value)
+    return bool(value) and _BUILD_ID_CHARS.issuperset(value)
 
 
 def _is_safe_backup_name(value: str) -> bool:
-    if not value:
-        return False
-    allowed = set("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-_.")
-    return all(ch in allowed for ch in value) and "/" not in value and ".." not in value
+    return bool(value) and _BACKUP_NAME_CHARS.issuperset(value) and ".." not in value
 
 
-def _ts_slug() -> str:
-    return _utc_now().strftime("%Y%m%dT%H%M%SZ")
+def _ts_slug(value: dt.datetime | None = None) -> str:
+    if value is None:
+        value = _utc_now()
+    return (
+        f"{value.year:04d}{value.month:02d}{value.day:02d}"
+        f"T{value.hour:02d}{value.minute:02d}{value.second:02d}Z"
+    )
 
 
 def _max_concurrent_jobs() -> int:
@@ -147,18 +243,46 @@ def _max_queued_jobs() -> int:
     return _parse_env_int("SPACEGATE_ADMIN_MAX_QUEUED_JOBS", 20)
 
 
-def _count_running_jobs(con: sqlite3.Connection) -> int:
-    row = con.execute(
-        "SELECT COUNT(*) FROM admin_jobs WHERE status = 'running'"
-    ).fetchone()
-    return int(row[0]) if row else 0
+def _count_active_jobs(con: sqlite3.Connection) -> tuple[int, int]:
+    rows = con.execute(
+        """
+SELECT status, COUNT(*)
+FROM admin_jobs
+WHERE status IN ('running', 'queued')
+GROUP BY status
+        """
+    ).fetchall()
+    counts = {str(row[0]): int(row[1]) for row in rows}
+    return counts.get("running", 0), counts.get("queued", 0)
+
+
+def _job_counts(con: sqlite3.Connection) -> tuple[int, int]:
+    """Return (running, queued) job counts; caller must hold _RUNNER_LOCK."""
+    global _RUNNING_JOBS_COUNT, _QUEUED_JOBS_COUNT, _JOB_COUNTS_CHECKED_AT
+    now = time.monotonic()
+    if _JOB_COUNTS_CHECKED_AT is None or now - _JOB_COUNTS_CHECKED_AT >= _JOB_COUNTS_RECONCILE_SECONDS:
+        _RUNNING_JOBS_COUNT, _QUEUED_JOBS_COUNT = _count_active_jobs(con)
+        _JOB_COUNTS_CHECKED_AT = now
+    return _RUNNING_JOBS_COUNT, _QUEUED_JOBS_COUNT
+
+
+def _adjust_job_counts(*, running: int = 0, queued: int = 0) -> None:
+    """Apply a job status transition to the cached counts; caller must hold _RUNNER_LOCK."""
+    global _RUNNING_JOBS_COUNT, _QUEUED_JOBS_COUNT
+    _RUNNING_JOBS_COUNT = max(0, _RUNNING_JOBS_COUNT + running)
+    _QUEUED_JOBS_COUNT = max(0, _QUEUED_JOBS_COUNT + queued)
+
+
+def _invalidate_job_counts() -> None:
+    global _JOB_COUNTS_CHECKED_AT
+    _JOB_COUNTS_CHECKED_AT = None
 
 
-def _count_queued_jobs(con: sqlite3.Connection) -> int:
-    row = con.execute(
-        "SELECT COUNT(*) FROM admin_jobs WHERE status = 'queued'"
-    ).fetchone()
-    return int(row[0]) if row else 0
+def _opt_str(params: Dict[str, Any], key: str) -> str:
+    value = params.get(key)
+    if isinstance(value, str):
+        return value.strip()
+    return str(value).strip() if value else ""
 
 
 def _normalize_boolean(value: Any) -> bool:
@@ -195,14 +319,14 @@ def _normalize_string(value: Any) -> str:
 
 
 def _build_command_build_database(params: Dict[str, Any]) -> List[str]:
-    cmd = [str(ROOT_DIR / "scripts" / "build_database.sh")]
+    cmd = [str(admin_db.root_dir() / "scripts" / "build_database.sh")]
     if params.get("overwrite", False):
         cmd.append("--overwrite")
     return cmd
 
 
 def _build_command_build_database_slice(params: Dict[str, Any]) -> List[str]:
-    cmd = [str(ROOT_DIR / "scripts" / "build_database_slice.sh")]
+    cmd = [str(admin_db.root_dir() / "scripts" / "build_database_slice.sh")]
     from_cooked = _normalize_boolean(params.get("from_cooked", True))
     if from_cooked:
         cmd.append("--from-cooked")
@@ -217,7 +341,7 @@ def _build_command_build_database_slice(params: Dict[str, Any]) -> List[str]:
         ("max_parallax_error_mas", "--max-parallax-error-mas"),
         ("max_ruwe", "--max-ruwe"),
     ):
-        raw = str(params.get(param_name, "") or "").strip()
+        raw = _opt_str(params, param_name)
         if raw:
             cmd.extend([flag_name, raw])
 
@@ -225,30 +349,30 @@ def _build_command_build_database_slice(params: Dict[str, Any]) -> List[str]:
         cmd.append("--require-spectral-class")
     if _normalize_boolean(params.get("require_color_index", False)):
         cmd.append("--require-color-index")
-    allowed_spectral = str(params.get("allowed_spectral_classes", "") or "").strip()
+    allowed_spectral = _opt_str(params, "allowed_spectral_classes")
     if allowed_spectral:
         cmd.extend(["--allowed-spectral-classes", allowed_spectral])
     return cmd
 
 
 def _build_command_verify_build(params: Dict[str, Any]) -> List[str]:
-    cmd = [str(ROOT_DIR / "scripts" / "verify_build.sh")]
-    build_id = str(params.get("build_id", "") or "").strip()
+    cmd = [str(admin_db.root_dir() / "scripts" / "verify_build.sh")]
+    build_id = _opt_str(params, "build_id")
     if build_id:
         cmd.append(build_id)
     return cmd
 
 
 def _build_command_publish_db(params: Dict[str, Any]) -> List[str]:
-    cmd = [str(ROOT_DIR / "scripts" / "publish_db.sh")]
-    build_id = str(params.get("build_id", "") or "").strip()
+    cmd = [str(admin_db.root_dir() / "scripts" / "publish_db.sh")]
+    build_id = _opt_str(params, "build_id")
     if build_id:
         cmd.append(build_id)
     return cmd
 
 
 def _build_command_retention_dry_run(params: Dict[str, Any]) -> List[str]:
-    cmd = [str(ROOT_DIR / "scripts" / "prune_state_retention.sh")]
+    cmd = [str(admin_db.root_dir() / "scripts" / "prune_state_retention.sh")]
     keep_builds, keep_reports, prune_tmp = _normalize_retention_params(params)
     cmd.extend(["--keep-builds", str(keep_builds), "--keep-reports", str(keep_reports)])
     if not prune_tmp:
@@ -268,7 +392,7 @@ def _normalize_retention_params(params: Dict[str, Any]) -> tuple[int, int, bool]
 
 
 def _build_command_restart_services(params: Dict[str, Any]) -> List[str]:
-    cmd = [str(ROOT_DIR / "scripts" / "run_spacegate.sh"), "--restart"]
+    cmd = [str(admin_db.root_dir() / "scripts" / "run_spacegate.sh"), "--restart"]
     if params.get("web_dev", False):
         cmd.append("--web-dev")
     else:
@@ -277,18 +401,18 @@ def _build_command_restart_services(params: Dict[str, Any]) -> List[str]:
 
 
 def _build_command_stop_services(params: Dict[str, Any]) -> List[str]:
-    return [str(ROOT_DIR / "scripts" / "run_spacegate.sh"), "--stop"]
+    return [str(admin_db.root_dir() / "scripts" / "run_spacegate.sh"), "--stop"]
 
 
 def _build_command_score_coolness(params: Dict[str, Any]) -> List[str]:
-    cmd = [str(ROOT_DIR / "scripts" / "score_coolness.sh")]
-    build_id = str(params.get("build_id", "") or "").strip()
+    cmd = [str(admin_db.root_dir() / "scripts" / "score_coolness.sh")]
+    build_id = _opt_str(params, "build_id")
     if build_id:
         cmd.extend(["--build-id", build_id])
-    weights_json = str(params.get("weights_json", "") or "").strip()
+    weights_json = _opt_str(params, "weights_json")
     ephemeral = _normalize_boolean(params.get("ephemeral", False))
-    profile_id = str(params.get("profile_id", "") or "").strip()
-    profile_version = str(params.get("profile_version", "") or "").strip()
+    profile_id = _opt_str(params, "profile_id")
+    profile_version = _opt_str(params, "profile_version")
     if weights_json and not ephemeral:
         if not profile_id:
             profile_id = "tuned"
@@ -317,8 +441,8 @@ def _auto_coolness_profile_version(weights_json: str) -> str:
 
 
 def _build_command_generate_snapshots(params: Dict[str, Any]) -> List[str]:
-    cmd = [str(ROOT_DIR / "scripts" / "generate_snapshots.sh")]
-    build_id = str(params.get("build_id", "") or "").strip()
+    cmd = [str(admin_db.root_dir() / "scripts" / "generate_snapshots.sh")]
+    build_id = _opt_str(params, "build_id")
     if build_id:
         cmd.extend(["--build-id", build_id])
     top_coolness = _normalize_integer(params.get("top_coolness", 1000))
@@ -339,12 +463,12 @@ def _build_command_generate_snapshots(params: Dict[str, Any]) -> List[str]:
         if raw is None or str(raw).strip() == "":
             continue
         cmd.extend([flag_name, str(raw)])
-    view_type = str(params.get("view_type", "") or "").strip()
+    view_type = _opt_str(params, "view_type")
     if view_type == "system":
         view_type = "system_card"
     if view_type:
         cmd.extend(["--view-type", view_type])
-    if _normalize_boolean(params.get("force", False)):
+    if params.get("force") and _normalize_boolean(params["force"]):
         cmd.append("--force")
     return cmd
 
@@ -358,7 +482,7 @@ def _build_command_materialize_simulation_scenes(params: Dict[str, Any]) -> List
         raise ActionValidationError("top_coolness_limit must be between 0 and 10000")
     cmd = [
         sys.executable,
-        str(ROOT_DIR / "scripts" / "materialize_simulation_scenes.py"),
+        str(admin_db.root_dir() / "scripts" / "materialize_simulation_scenes.py"),
         "--output-mode", "runtime-cache",
         "--priority-profile", "search-preview",
         "--limit", str(limit),
@@ -408,7 +532,7 @@ def _build_command_compile_smart_tags(params: Dict[str, Any]) -> List[str]:
         )
     cmd = [
         sys.executable,
-        str(ROOT_DIR / "scripts" / "compile_smart_tags.py"),
+        str(admin_db.root_dir() / "scripts" / "compile_smart_tags.py"),
         "--public-read",
         str(public_read),
         "--output-root",
@@ -422,41 +546,41 @@ def _build_command_compile_smart_tags(params: Dict[str, Any]) -> List[str]:
 
 
 def _build_command_save_coolness_profile(params: Dict[str, Any]) -> List[str]:
-    profile_id = str(params.get("profile_id", "") or "").strip()
-    profile_version = str(params.get("profile_version", "") or "").strip()
+    profile_id = _opt_str(params, "profile_id")
+    profile_version = _opt_str(params, "profile_version")
     if not profile_id or not profile_version:
         raise ActionValidationError("profile_id and profile_version are required")
     cmd = [
-        str(ROOT_DIR / "scripts" / "score_coolness.sh"),
+        str(admin_db.root_dir() / "scripts" / "score_coolness.sh"),
         "save",
         "--profile-id",
         profile_id,
         "--profile-version",
         profile_version,
     ]
-    weights_json = str(params.get("weights_json", "") or "").strip()
+    weights_json = _opt_str(params, "weights_json")
     if weights_json:
         cmd.extend(["--weights-json", weights_json])
-    notes = str(params.get("notes", "") or "").strip()
+    notes = _opt_str(params, "notes")
     if notes:
         cmd.extend(["--notes", notes])
     return cmd
 
 
 def _build_command_apply_coolness_profile(params: Dict[str, Any]) -> List[str]:
-    profile_id = str(params.get("profile_id", "") or "").strip()
-    profile_version = str(params.get("profile_version", "") or "").strip()
+    profile_id = _opt_str(params, "profile_id")
+    profile_version = _opt_str(params, "profile_version")
     if not profile_id or not profile_version:
         raise ActionValidationError("profile_id and profile_version are required")
     cmd = [
-        str(ROOT_DIR / "scripts" / "score_coolness.sh"),
+        str(admin_db.root_dir() / "scripts" / "score_coolness.sh"),
         "apply",
         "--profile-id",
         profile_id,
         "--profile-version",
         profile_version,
     ]
-    reason = str(params.get("reason", "") or "").strip()
+    reason = _opt_str(params, "reason")
     if reason:
         cmd.extend(["--reason", reason])
     return cmd
@@ -473,37 +597,44 @@ def _create_admin_db_backup(logf: TextIO, suffix: str = "") -> Path:
         backup_name = f"{backup_name}_{suffix}"
     out_path = backup_dir / f"{backup_name}.sqlite3"
 
-    src_con = sqlite3.connect(str(src_path))
-    dst_con = sqlite3.connect(str(out_path))
-    try:
-        src_con.backup(dst_con)
-    finally:
-        dst_con.close()
-        src_con.close()
+    # Read the live DB through a read-only handle so the backup never takes a
+    # write lock against admin API traffic; the backup API still copies a
+    # consistent snapshot that includes committed WAL frames.
+    src_uri = f"{src_path.resolve().as_uri()}?mode=ro"
+    with closing(sqlite3.connect(src_uri, uri=True)) as src_con, closing(
+        sqlite3.connect(str(out_path))
+    ) as dst_con:
+        src_con.backup(dst_con, pages=-1)
+        # Leave the backup as one self-contained file with no -wal sidecar.
+        dst_con.execute("PRAGMA wal_checkpoint(TRUNCATE)")
 
     logf.write(f"Created admin DB backup: {out_path}\n")
     return out_path
 
 
-def _sqlite_table_exists(con: sqlite3.Connection, schema: str, table: str) -> bool:
-    row = con.execute(
-        f"SELECT 1 FROM {schema}.sqlite_master WHERE type='table' AND name=? LIMIT 1",
-        (table,),
-    ).fetchone()
-    return row is not None
+def _sqlite_missing_tables(
+    con: sqlite3.Connection, schema: str, tables: Sequence[str]
+) -> List[str]:
+    placeholders = ",".join("?" for _ in tables)
+    rows = con.execute(
+        f"SELECT name FROM {schema}.sqlite_master WHERE type='table' AND name IN ({placeholders})",
+        tuple(tables),
+    )
+    present = {str(row[0]) for row in rows}
+    return [name for name in tables if name not in present]
 
 
 def _fetch_job_user_ids(con: sqlite3.Connection) -> List[int]:
     rows = con.execute(
-        "SELECT DISTINCT requested_by_user_id FROM admin_jobs"
-    ).fetchall()
-    out: List[int] = []
-    for row in rows:
-        value = row[0]
-        if value is None:
-            continue
-        out.append(int(value))
-    return sorted(set(out))
+        """
+SELECT requested_by_user_id
+FROM admin_jobs
+WHERE requested_by_user_id IS NOT NULL
+GROUP BY requested_by_user_id
+ORDER BY requested_by_user_id
+        """
+    )
+    return [int(row[0]) for row in rows]
 
 
 def _snapshot_users(con: sqlite3.Connection, user_ids: Sequence[int]) -> Dict[int, Dict[str, Any]]:
@@ -591,7 +722,7 @@ def _find_recent_retention_dry_run(
             continue
         if (job_keep_builds, job_keep_reports, job_prune_tmp) != (keep_builds, keep_reports, prune_tmp):
             continue
-        job_hash = str(params.get("candidate_hash") or "").strip()
+        job_hash = _opt_str(params, "candidate_hash")
         if not job_hash:
             try:
                 job_plan = _retention_plan(
@@ -615,7 +746,7 @@ def _find_recent_retention_dry_run(
 def _ensure_no_active_mutating_build_jobs() -> None:
     mutating = {"build_database", "build_database_slice", "verify_build", "publish_db"}
     active = [
-        job for job in list_jobs(limit=100)
+        job for job in list_jobs(limit=100, include_payload=False)
         if job.get("status") in RUNNING_STATUSES and job.get("action") in mutating
     ]
     if active:
@@ -656,7 +787,7 @@ def _validate_retention_apply_paths(state_dir: Path, plan: Dict[str, Any]) -> Li
 
 def _run_native_retention_apply(params: Dict[str, Any], logf: TextIO) -> int:
     keep_builds, keep_reports, prune_tmp = _normalize_retention_params(params)
-    expected_hash = str(params.get("candidate_hash") or "").strip()
+    expected_hash = _opt_str(params, "candidate_hash")
     if not expected_hash:
         raise ActionValidationError("candidate_hash is required")
 
@@ -709,7 +840,7 @@ def _run_native_retention_apply(params: Dict[str, Any], logf: TextIO) -> int:
 
 
 def _run_native_restore_admin_db(params: Dict[str, Any], logf: TextIO) -> int:
-    backup_name = str(params.get("backup_name", "") or "").strip()
+    backup_name = _opt_str(params, "backup_name")
     if not _is_safe_backup_name(backup_name):
         raise ActionValidationError("Invalid backup_name format")
 
@@ -744,17 +875,21 @@ def _run_native_restore_admin_db(params: Dict[str, Any], logf: TextIO) -> int:
                 "sessions",
                 "audit_log",
             ]
-            missing_tables = [
-                name
-                for name in required_backup_tables
-                if not _sqlite_table_exists(con, "backup_db", name)
-            ]
+            missing_tables = _sqlite_missing_tables(con, "backup_db", required_backup_tables)
             if missing_tables:
                 raise ActionValidationError(
                     "Backup schema is missing required tables: "
                     + ", ".join(sorted(missing_tables))
                 )
 
+            allowlist_duplicates = admin_db.find_allowlist_duplicates(con, "backup_db")
+            if allowlist_duplicates:
+                raise ActionValidationError(
+                    "Backup admin_allowlist has duplicate entries (allow_ids "
+                    + "; ".join(str(row["allow_ids"]) for row in allowlist_duplicates)
+                    + "); resolve them in the backup before restoring"
+                )
+
             con.execute("BEGIN IMMEDIATE")
             in_tx = True
 
@@ -846,16 +981,13 @@ FROM backup_db.audit_log
             else:
                 missing_ids = []
 
+            user_rows: List[tuple[Any, ...]] = []
+            user_role_pairs: List[tuple[int, str]] = []
             for user_id in missing_ids:
                 payload = user_snapshot.get(user_id)
                 if payload is None:
                     continue
-                con.execute(
-                    """
-INSERT OR IGNORE INTO users(
-  user_id, email_norm, display_name, status, created_at, updated_at, last_login_at
-) VALUES (?, ?, ?, ?, ?, ?, ?)
-                    """,
+                user_rows.append(
                     (
                         payload["user_id"],
                         payload["email_norm"],
@@ -864,40 +996,44 @@ INSERT OR IGNORE INTO users(
                         payload["created_at"],
                         payload["updated_at"],
                         payload["last_login_at"],
-                    ),
+                    )
                 )
                 for role_code in role_snapshot.get(user_id, []):
-                    con.execute(
-                        "INSERT OR IGNORE INTO roles(role_code) VALUES (?)",
-                        (role_code,),
-                    )
-                    role_row = con.execute(
-                        "SELECT role_id FROM roles WHERE role_code = ?",
-                        (role_code,),
-                    ).fetchone()
-                    if role_row is not None:
-                        con.execute(
-                            "INSERT OR IGNORE INTO user_roles(user_id, role_id) VALUES (?, ?)",
-                            (user_id, int(role_row["role_id"])),
-                        )
-
-            dangling_row = con.execute(
-                """
-SELECT j.job_id, j.requested_by_user_id
-FROM admin_jobs j
-LEFT JOIN users u ON u.user_id = j.requested_by_user_id
-WHERE u.user_id IS NULL
-LIMIT 1
-                """
-            ).fetchone()
-            if dangling_row is not None:
-                raise ActionValidationError(
-                    "Restore would leave admin_jobs referencing missing users"
+                    user_role_pairs.append((user_id, role_code))
+            if user_rows:
+                con.executemany(
+                    """
+INSERT OR IGNORE INTO users(
+  user_id, email_norm, display_name, status, created_at, updated_at, last_login_at
+) VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    user_rows,
+                )
+            if user_role_pairs:
+                con.executemany(
+                    "INSERT OR IGNORE INTO roles(role_code) VALUES (?)",
+                    [(role_code,) for role_code in sorted({code for _, code in user_role_pairs})],
+                )
+                con.executemany(
+                    """
+INSERT OR IGNORE INTO user_roles(user_id, role_id)
+SELECT ?, role_id FROM roles WHERE role_code = ?
+                    """,
+                    user_role_pairs,
                 )
 
+            # foreign_key_check covers admin_jobs.requested_by_user_id -> users,
+            # so one pass validates both restored tables and preserved jobs.
             fk_issue = con.execute("PRAGMA foreign_key_check").fetchone()
             if fk_issue is not None:
-                raise ActionValidationError("Restore failed foreign key validation")
+                table, rowid, parent = fk_issue[0], fk_issue[1], fk_issue[2]
+                if table == "admin_jobs" and parent == "users":
+                    raise ActionValidationError(
+                        f"Restore would leave admin_jobs referencing missing users (rowid={rowid})"
+                    )
+                raise ActionValidationError(
+                    f"Restore failed foreign key validation: {table} rowid={rowid} references missing {parent}"
+                )
 
             con.execute("COMMIT")
             in_tx = False
@@ -925,12 +1061,13 @@ def _run_native_backup_release_metadata(params: Dict[str, Any], logf: TextIO) ->
     if not current_json.exists():
         raise ActionValidationError(f"Missing metadata file: {current_json}")
 
-    backup_id = f"meta_{_ts_slug()}_{secrets.token_hex(3)}"
+    created_at = _utc_now()
+    backup_id = f"meta_{_ts_slug(created_at)}_{secrets.token_hex(3)}"
     out_dir = _ensure_backups_subdir("release_metadata") / backup_id
     out_dir.mkdir(parents=True, exist_ok=True)
 
     out_current = out_dir / "current.json"
-    out_current.write_text(current_json.read_text(encoding="utf-8"), encoding="utf-8")
+    shutil.copyfile(current_json, out_current)
 
     symlink_target = None
     if current_link.is_symlink():
@@ -938,23 +1075,21 @@ def _run_native_backup_release_metadata(params: Dict[str, Any], logf: TextIO) ->
 
     manifest = {
         "backup_id": backup_id,
-        "created_at": _to_iso(_utc_now()),
+        "created_at": _to_iso(created_at),
         "source_dl_root": str(dl_root),
         "source_current_json": str(current_json),
         "current_symlink_target": symlink_target,
         "files": ["current.json"],
     }
-    (out_dir / "manifest.json").write_text(
-        json.dumps(manifest, indent=2, sort_keys=True),
-        encoding="utf-8",
-    )
+    with (out_dir / "manifest.json").open("w", encoding="utf-8") as handle:
+        json.dump(manifest, handle, indent=2, sort_keys=True)
 
     logf.write(f"Created release metadata backup: {out_dir}\n")
     return 0
 
 
 def _run_native_restore_release_metadata(params: Dict[str, Any], logf: TextIO) -> int:
-    backup_id = str(params.get("backup_id", "") or "").strip()
+    backup_id = _opt_str(params, "backup_id")
     restore_symlink = bool(params.get("restore_symlink", True))
     if not _is_safe_backup_name(backup_id):
         raise ActionValidationError("Invalid backup_id format")
@@ -974,7 +1109,12 @@ def _run_native_restore_release_metadata(params: Dict[str, Any], logf: TextIO) -
     dl_root.mkdir(parents=True, exist_ok=True)
 
     target_current = dl_root / "current.json"
-    target_current.write_text(src_current.read_text(encoding="utf-8"), encoding="utf-8")
+    temporary = target_current.with_name(f".{target_current.name}.{secrets.token_hex(4)}.tmp")
+    try:
+        shutil.copyfile(src_current, temporary)
+        os.replace(temporary, target_current)
+    finally:
+        temporary.unlink(missing_ok=True)
     logf.write(f"Restored current.json from backup: {backup_id}\n")
 
     if restore_symlink:
@@ -1233,7 +1373,7 @@ ACTION_OPERATOR_GUIDANCE: Dict[str, Dict[str, Any]] = {
 }
 
 
-ACTION_SPECS: Dict[str, ActionSpec] = {
+ACTION_SPECS: Mapping[str, ActionSpec] = types.MappingProxyType({
     "build_database": ActionSpec(
         name="build_database",
         display_name="Build Database",
@@ -1824,10 +1964,10 @@ ACTION_SPECS: Dict[str, ActionSpec] = {
         confirmation_phrase=_confirmation_for("restore_release_metadata"),
         run_native=_run_native_restore_release_metadata,
     ),
-}
+})
 
 
-def list_actions() -> List[Dict[str, Any]]:
+def _build_action_catalog() -> tuple[Dict[str, Any], ...]:
     data = []
     for spec in sorted(ACTION_SPECS.values(), key=lambda s: s.name):
         if spec.hidden:
@@ -1839,7 +1979,7 @@ def list_actions() -> List[Dict[str, Any]]:
                 "name": spec.name,
                 "display_name": spec.display_name or spec.name,
                 "description": spec.description,
-                "params_schema": spec.params_schema,
+                "params_schema": {name: dict(field_schema) for name, field_schema in spec.params_schema.items()},
                 "category": spec.category,
                 "group_key": group_key,
                 "risk_level": spec.risk_level,
@@ -1849,7 +1989,17 @@ def list_actions() -> List[Dict[str, Any]]:
                 "operator_guidance": guidance,
             }
         )
-    return data
+    return tuple(data)
+
+
+# ACTION_SPECS is fixed at import, so the catalog served to the admin UI is
+# built once. Callers get deep copies so a caller adding per-request fields
+# can't change the catalog for everyone else.
+_LIST_ACTIONS_CACHE = _build_action_catalog()
+
+
+def list_actions() -> List[Dict[str, Any]]:
+    return copy.deepcopy(list(_LIST_ACTIONS_CACHE))
 
 
 def action_groups() -> List[Dict[str, Any]]:
@@ -1866,78 +2016,66 @@ def _canonicalize_params(params: Dict[str, Any] | None) -> Dict[str, Any]:
 
 def _validate_params(spec: ActionSpec, params: Dict[str, Any]) -> Dict[str, Any]:
     normalized: Dict[str, Any] = {}
-    schema = spec.params_schema or {}
-
-    unknown_keys = sorted(set(params.keys()) - set(schema.keys()))
-    if unknown_keys:
-        raise ActionValidationError(f"Unsupported params: {', '.join(unknown_keys)}")
-
-    for name, field in schema.items():
-        required = bool(field.get("required", False))
-        has_value = name in params
-        if not has_value:
-            if "default" in field:
-                normalized[name] = field.get("default")
+
+    if params:
+        unknown_keys = params.keys() - spec.schema_keys
+        if unknown_keys:
+            raise ActionValidationError(f"Unsupported params: {', '.join(sorted(unknown_keys))}")
+
+    for plan in spec.field_plans:
+        name = plan.name
+        if name not in params:
+            if plan.has_default:
+                normalized[name] = plan.default
                 continue
-            if required:
+            if plan.required:
                 raise ActionValidationError(f"Missing required parameter: {name}")
             continue
 
-        raw_value = params.get(name)
-        field_type = str(field.get("type", "string"))
-        if field_type == "boolean":
+        raw_value = params[name]
+        if plan.kind == "boolean":
             value = _normalize_boolean(raw_value)
-        elif field_type == "integer":
+        elif plan.kind == "integer":
             value = _normalize_integer(raw_value)
-            min_value = field.get("min")
-            max_value = field.get("max")
-            if min_value is not None and value < int(min_value):
-                raise ActionValidationError(f"{name} must be >= {min_value}")
-            if max_value is not None and value > int(max_value):
-                raise ActionValidationError(f"{name} must be <= {max_value}")
+            if plan.min_value is not None and value < plan.min_value:
+                raise ActionValidationError(f"{name} must be >= {plan.min_value}")
+            if plan.max_value is not None and value > plan.max_value:
+                raise ActionValidationError(f"{name} must be <= {plan.max_value}")
         else:
             value = _normalize_string(raw_value)
-            allow_empty = bool(field.get("allow_empty", False))
-            if required and not value:
+            if plan.required and not value:
                 raise ActionValidationError(f"Missing required parameter: {name}")
-            if not allow_empty and "default" not in field and not value:
+            if not plan.allow_empty and not plan.has_default and not value:
                 raise ActionValidationError(f"{name} cannot be empty")
 
-        enum_values = field.get("enum")
-        if enum_values is not None and value not in enum_values:
-            raise ActionValidationError(f"{name} must be one of: {', '.join(map(str, enum_values))}")
+        if plan.enum_values is not None and value not in plan.enum_values:
+            raise ActionValidationError(f"{name} must be one of: {plan.enum_label}")
 
         normalized[name] = value
 
     if spec.name in {"verify_build", "publish_db", "build_database", "score_coolness", "generate_snapshots", "materialize_simulation_scenes", "compile_smart_tags"}:
-        build_id = str(normalized.get("build_id", "") or "").strip()
+        # String fields were already normalized to stripped str above.
+        build_id = normalized.get("build_id", "")
         if build_id and not _is_safe_build_id(build_id):
             raise ActionValidationError("Invalid build_id format")
-        if "build_id" in normalized:
-            normalized["build_id"] = build_id
 
     if spec.name in {"retention_dry_run", "retention_apply"}:
-        candidate_hash = str(normalized.get("candidate_hash", "") or "").strip()
-        if candidate_hash and not re.match(r"^[0-9a-f]{64}$", candidate_hash):
+        candidate_hash = normalized.get("candidate_hash", "")
+        if candidate_hash and _CANDIDATE_HASH_RE.fullmatch(candidate_hash) is None:
             raise ActionValidationError("Invalid candidate_hash format")
         if spec.name == "retention_apply" and not candidate_hash:
             raise ActionValidationError("candidate_hash is required")
-        if "candidate_hash" in normalized:
-            normalized["candidate_hash"] = candidate_hash
 
     if spec.name == "restore_admin_db":
-        backup_name = str(normalized.get("backup_name", "") or "").strip()
+        backup_name = normalized["backup_name"]
         if not _is_safe_backup_name(backup_name):
             raise ActionValidationError("Invalid backup_name format")
         if not backup_name.endswith(".sqlite3"):
             raise ActionValidationError("backup_name must end with .sqlite3")
-        normalized["backup_name"] = backup_name
 
     if spec.name == "restore_release_metadata":
-        backup_id = str(normalized.get("backup_id", "") or "").strip()
-        if not _is_safe_backup_name(backup_id):
+        if not _is_safe_backup_name(normalized["backup_id"]):
             raise ActionValidationError("Invalid backup_id format")
-        normalized["backup_id"] = backup_id
 
     return normalized
 
@@ -1953,15 +2091,18 @@ def _validate_and_plan(
     if spec is None:
         raise ActionValidationError(f"Unsupported action: {action}")
 
-    role_set = {str(role) for role in user_roles}
-    missing_roles = [role for role in spec.required_roles if role not in role_set]
-    if missing_roles:
-        raise ActionPermissionError(f"Missing required role(s): {', '.join(missing_roles)}")
+    required_roles = spec.required_role_set
+    if required_roles:
+        role_set = frozenset(map(str, user_roles))
+        if not required_roles.issubset(role_set):
+            missing_roles = sorted(required_roles - role_set)
+            raise ActionPermissionError(f"Missing required role(s): {', '.join(missing_roles)}")
 
-    normalized = _validate_params(spec, params)
+    # Parameterless actions (the backup buttons) have nothing to validate.
+    normalized = _validate_params(spec, params) if params or spec.field_plans else {}
 
     if spec.requires_confirmation:
-        expected_phrase = spec.confirmation_phrase or _confirmation_for(spec.name)
+        expected_phrase = spec.effective_confirmation
         if str(confirmation or "").strip() != expected_phrase:
             raise ActionValidationError(
                 f"Confirmation phrase mismatch. Expected: {expected_phrase}"
@@ -1998,7 +2139,7 @@ INSERT INTO admin_job_events(
             event_type,
             event_status,
             message,
-            json.dumps(details or {}, separators=(",", ":"), sort_keys=True),
+            admin_db.canonical_json(details or {}),
             created_at or _to_iso(_utc_now()),
         ),
     )
@@ -2013,14 +2154,18 @@ def _insert_job(
     params_json: str,
     command_json: str,
     log_path: str,
-) -> None:
-    now = _to_iso(_utc_now())
-    con.execute(
+    max_queued: int,
+    created_at: str,
+) -> bool:
+    """Queue a job unless the queue is full; returns False when the cap is hit."""
+    cur = con.execute(
         """
 INSERT INTO admin_jobs(
   job_id, action, status, requested_by_user_id, params_json, command_json,
   log_path, created_at, started_at, finished_at, exit_code, error_message
-) VALUES (?, ?, 'queued', ?, ?, ?, ?, ?, NULL, NULL, NULL, NULL)
+)
+SELECT ?, ?, 'queued', ?, ?, ?, ?, ?, NULL, NULL, NULL, NULL
+WHERE (SELECT COUNT(*) FROM admin_jobs WHERE status = 'queued') < ?
         """,
         (
             job_id,
@@ -2029,9 +2174,12 @@ INSERT INTO admin_jobs(
             params_json,
             command_json,
             log_path,
-            now,
+            created_at,
+            max_queued,
         ),
     )
+    if cur.rowcount == 0:
+        return False
     _insert_job_event(
         con,
         job_id=job_id,
@@ -2039,8 +2187,9 @@ INSERT INTO admin_jobs(
         event_status="queued",
         message=f"Queued {action}.",
         details={"action": action, "requested_by_user_id": requested_by_user_id},
-        created_at=now,
+        created_at=created_at,
     )
+    return True
 
 
 def _plan_to_json(plan: ExecutionPlan) -> str:
@@ -2049,11 +2198,14 @@ def _plan_to_json(plan: ExecutionPlan) -> str:
         payload["argv"] = plan.argv
     if plan.native_handler is not None:
         payload["native_handler"] = plan.native_handler
-    return json.dumps(payload, separators=(",", ":"), sort_keys=True)
+    return admin_db.canonical_json(payload)
 
 
 def _plan_from_json(raw: str) -> ExecutionPlan:
-    payload = json.loads(raw or "{}")
+    return _plan_from_payload(json.loads(raw or "{}"))
+
+
+def _plan_from_payload(payload: Mapping[str, Any]) -> ExecutionPlan:
     kind = str(payload.get("kind", ""))
     if kind == "command":
         argv = payload.get("argv")
@@ -2068,37 +2220,103 @@ def _plan_from_json(raw: str) -> ExecutionPlan:
     raise ActionValidationError("Unknown execution plan kind")
 
 
+_CLAIM_COLUMNS = "job_id, action, requested_by_user_id, params_json, command_json, log_path, created_at"
+_SQLITE_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+
+# Never claim past max_running, whatever the caller's cached count says.
+_CLAIM_LIMIT_SQL = "LIMIT min(?, max(0, ? - (SELECT COUNT(*) FROM admin_jobs WHERE status = 'running')))"
+
+
+def _claim_queued_jobs(
+    con: sqlite3.Connection, *, slots: int, max_running: int, started_at: str
+) -> List[sqlite3.Row]:
+    """Mark up to ``slots`` of the oldest queued jobs running and return them."""
+    if _SQLITE_HAS_RETURNING:
+        rows = con.execute(
+            f"""
+UPDATE admin_jobs
+SET status = 'running', started_at = ?
+WHERE job_id IN (
+  SELECT job_id FROM admin_jobs
+  WHERE status = 'queued'
+  ORDER BY created_at ASC
+  {_CLAIM_LIMIT_SQL}
+)
+RETURNING {_CLAIM_COLUMNS}
+            """,
+            (started_at, slots, max_running),
+        ).fetchall()
+        # RETURNING does not preserve the subquery order.
+        return sorted(rows, key=lambda row: str(row["created_at"]))
+
+    rows = con.execute(
+        f"""
+SELECT {_CLAIM_COLUMNS}
+FROM admin_jobs
+WHERE status = 'queued'
+ORDER BY created_at ASC
+{_CLAIM_LIMIT_SQL}
+        """,
+        (slots, max_running),
+    ).fetchall()
+    con.executemany(
+        "UPDATE admin_jobs SET status='running', started_at=? WHERE job_id=? AND status='queued'",
+        [(started_at, row["job_id"]) for row in rows],
+    )
+    return rows
+
+
+# Claimed jobs are handed to a pool of long-lived daemon worker threads. A
+# concurrent.futures executor would join its (non-daemon) workers at
+# interpreter exit and hold API shutdown hostage to a long-running build.
+_JOB_WORK_QUEUE: "queue.SimpleQueue[Dict[str, Any]]" = queue.SimpleQueue()
+_JOB_WORKERS: List[threading.Thread] = []
+_JOB_WORKERS_LOCK = threading.Lock()
+
+
+def _job_worker_loop() -> None:
+    while True:
+        kwargs = _JOB_WORK_QUEUE.get()
+        try:
+            _run_job_worker(**kwargs)
+        except Exception:
+            sys.excepthook(*sys.exc_info())
+
+
+def _ensure_job_workers(count: int) -> None:
+    """Grow the worker pool to at least ``count`` threads; workers are never retired."""
+    with _JOB_WORKERS_LOCK:
+        while len(_JOB_WORKERS) < count:
+            thread = threading.Thread(
+                target=_job_worker_loop,
+                name=f"admin-job-{len(_JOB_WORKERS)}",
+                daemon=True,
+            )
+            thread.start()
+            _JOB_WORKERS.append(thread)
+
+
 def _start_queued_jobs() -> None:
     jobs_to_launch: List[Dict[str, Any]] = []
+    max_running = _max_concurrent_jobs()
     with _RUNNER_LOCK:
         with admin_db.connection_scope() as con:
-            running = _count_running_jobs(con)
-            max_running = _max_concurrent_jobs()
+            running, queued = _job_counts(con)
             slots = max(0, max_running - running)
             if slots == 0:
                 return
 
-            rows = con.execute(
-                """
-SELECT job_id, action, requested_by_user_id, params_json, command_json, log_path
-FROM admin_jobs
-WHERE status = 'queued'
-ORDER BY created_at ASC
-LIMIT ?
-                """,
-                (slots,),
-            ).fetchall()
+            started_at = _to_iso(_utc_now())
+            rows = _claim_queued_jobs(con, slots=slots, max_running=max_running, started_at=started_at)
+            if len(rows) < min(slots, queued):
+                _invalidate_job_counts()
             if not rows:
                 return
 
-            started_at = _to_iso(_utc_now())
             for row in rows:
                 job_id = str(row["job_id"])
                 action = str(row["action"])
-                con.execute(
-                    "UPDATE admin_jobs SET status='running', started_at=? WHERE job_id=? AND status='queued'",
-                    (started_at, job_id),
-                )
                 _insert_job_event(
                     con,
                     job_id=job_id,
@@ -2119,21 +2337,20 @@ LIMIT ?
                     }
                 )
             con.commit()
+            _adjust_job_counts(running=len(jobs_to_launch), queued=-len(jobs_to_launch))
 
+    _ensure_job_workers(max_running)
     for item in jobs_to_launch:
-        thread = threading.Thread(
-            target=_run_job_worker,
-            kwargs={
+        _JOB_WORK_QUEUE.put(
+            {
                 "job_id": item["job_id"],
                 "action": item["action"],
                 "params_json": item["params_json"],
                 "command_json": item["command_json"],
                 "log_path": Path(item["log_path"]),
                 "actor_user_id": item["requested_by_user_id"],
-            },
-            daemon=True,
+            }
         )
-        thread.start()
 
 
 def start_job(
@@ -2162,27 +2379,36 @@ def start_job(
         normalized_params["candidate_hash"] = str(retention_plan.get("candidate_hash") or "")
 
     jobs_dir = _ensure_jobs_dir()
-    job_id = f"job_{_utc_now().strftime('%Y%m%dT%H%M%SZ')}_{secrets.token_hex(5)}"
+    queued_at = _utc_now()
+    job_id = f"job_{_ts_slug(queued_at)}_{secrets.token_hex(5)}"
     log_path = jobs_dir / f"{job_id}.log"
 
     with _RUNNER_LOCK:
         with admin_db.connection_scope() as con:
-            queued = _count_queued_jobs(con)
+            _running, queued = _job_counts(con)
             max_queued = _max_queued_jobs()
-            if queued >= max_queued:
-                raise RuntimeError(
-                    f"Too many queued jobs ({queued}/{max_queued}); try again later."
-                )
-            _insert_job(
+            # The cached count rejects the common "queue full" case without a
+            # write; the guarded INSERT stays authoritative if the cache drifts.
+            inserted = queued < max_queued and _insert_job(
                 con,
                 job_id=job_id,
                 action=spec.name,
                 requested_by_user_id=requested_by_user_id,
-                params_json=json.dumps(normalized_params, separators=(",", ":"), sort_keys=True),
+                params_json=admin_db.canonical_json(normalized_params),
                 command_json=_plan_to_json(plan),
                 log_path=str(log_path),
+                max_queued=max_queued,
+                created_at=_to_iso(queued_at),
             )
+            if not inserted:
+                if queued < max_queued:
+                    _invalidate_job_counts()
+                    queued = max_queued
+                raise RuntimeError(
+                    f"Too many queued jobs ({queued}/{max_queued}); try again later."
+                )
             con.commit()
+            _adjust_job_counts(queued=1)
 
     _start_queued_jobs()
     return get_job(job_id)
@@ -2219,6 +2445,7 @@ WHERE job_id = ?
                 created_at=finished_at,
             )
             con.commit()
+            _adjust_job_counts(queued=-1)
     return get_job(job_id)
 
 
@@ -2250,35 +2477,78 @@ def _last_log_error_line(log_path: Path) -> str | None:
     return None
 
 
+_COMMAND_COPY_CHUNK = 65536
+_COMMAND_LINE_MAX_BYTES = 65536
+
+
+class _OutputErrorScanner:
+    """Track the last error-looking (and last non-blank) output line as chunks arrive."""
+
+    def __init__(self) -> None:
+        self._partial = b""
+        self.last_error: str | None = None
+        self.last_line: str | None = None
+
+    def feed(self, chunk: bytes) -> None:
+        lines = (self._partial + chunk).split(b"\n")
+        # Keep the unterminated remainder for the next chunk, bounded so a
+        # newline-free stream cannot grow it without limit.
+        self._partial = lines.pop()[-_COMMAND_LINE_MAX_BYTES:]
+        for line in lines:
+            self._scan(line)
+
+    def summary(self) -> str | None:
+        if self._partial:
+            self._scan(self._partial)
+            self._partial = b""
+        return self.last_error or self.last_line
+
+    def _scan(self, raw: bytes) -> None:
+        # Split on \r as well so progress-bar redraws count as separate lines.
+        for line in raw.decode("utf-8", errors="replace").splitlines():
+            text = line.strip()
+            if not text:
+                continue
+            self.last_line = text[:500]
+            detected = _log_error_line(text)
+            if detected:
+                self.last_error = detected
+
+
 def _run_command(command: List[str], logf: TextIO) -> tuple[int, str | None]:
     env = os.environ.copy()
     env.setdefault("PYTHONUNBUFFERED", "1")
     env.setdefault("PYTHONDONTWRITEBYTECODE", "1")
-    last_error_line: str | None = None
-    last_output_line: str | None = None
     try:
         proc = subprocess.Popen(
             command,
-            cwd=str(ROOT_DIR),
+            cwd=str(admin_db.root_dir()),
             stdout=subprocess.PIPE,
             stderr=subprocess.STDOUT,
-            text=True,
-            bufsize=1,
+            bufsize=-1,
             env=env,
             preexec_fn=apply_configured_umask if os.name == "posix" else None,
         )
         assert proc.stdout is not None
-        for line in proc.stdout:
-            logf.write(line)
-            stripped = str(line or "").strip()
-            if stripped:
-                last_output_line = stripped[:500]
-            detected = _log_error_line(line)
-            if detected:
-                last_error_line = detected
+        # Copy raw output in chunks straight to the log's binary buffer; read1
+        # returns whatever is available so the UI can still tail a live job.
+        # Text streams without a buffer (StringIO) get decoded chunks instead.
+        logf.flush()
+        out = getattr(logf, "buffer", None)
+        decoder = None if out is not None else codecs.getincrementaldecoder("utf-8")(errors="replace")
+        scanner = _OutputErrorScanner()
+        for chunk in iter(lambda: proc.stdout.read1(_COMMAND_COPY_CHUNK), b""):
+            if decoder is None:
+                out.write(chunk)
+                out.flush()
+            else:
+                logf.write(decoder.decode(chunk))
+            scanner.feed(chunk)
+        if decoder is not None:
+            logf.write(decoder.decode(b"", final=True))
         proc.wait()
         return_code = int(proc.returncode)
-        return return_code, (last_error_line or last_output_line) if return_code != 0 else None
+        return return_code, scanner.summary() if return_code != 0 else None
     except Exception as exc:
         return 1, str(exc)
 
@@ -2312,14 +2582,15 @@ def _run_job_worker(
     except Exception:
         params = {}
 
-    plan = _plan_from_json(command_json)
+    plan_payload = json.loads(command_json or "{}")
+    plan = _plan_from_payload(plan_payload)
     log_path.parent.mkdir(parents=True, exist_ok=True)
 
     with log_path.open("a", encoding="utf-8") as logf:
         logf.write(f"[{started_at}] Starting action\n")
         logf.write(f"Action: {action}\n")
         logf.write(f"Params: {json.dumps(params, sort_keys=True)}\n")
-        logf.write(f"Execution: {json.dumps(json.loads(command_json), sort_keys=True)}\n\n")
+        logf.write(f"Execution: {json.dumps(plan_payload, sort_keys=True)}\n\n")
         logf.flush()
 
         with admin_db.connection_scope() as con:
@@ -2354,7 +2625,22 @@ def _run_job_worker(
             logf.write(f"[error] {error_message}\n")
         logf.flush()
 
-    with admin_db.connection_scope() as con:
+    audit_details_json = admin_db.canonical_json(
+        {
+            "job_id": job_id,
+            "action": action,
+            "status": status,
+            "exit_code": exit_code,
+            "error_message": error_message,
+            "correlation_id": job_id,
+        }
+    )
+    # Commit and decrement under _RUNNER_LOCK so a reconcile in _job_counts can
+    # never observe the finished row and then have it subtracted a second time.
+    with _RUNNER_LOCK, admin_db.connection_scope() as con:
+        # Take the write lock up front so the three writes land in one short
+        # transaction instead of upgrading a deferred one mid-way.
+        con.execute("BEGIN IMMEDIATE")
         con.execute(
             """
 UPDATE admin_jobs
@@ -2373,18 +2659,7 @@ INSERT INTO audit_log(
                 actor_user_id,
                 "admin.action.complete",
                 "success" if status == "succeeded" else "error",
-                json.dumps(
-                    {
-                        "job_id": job_id,
-                        "action": action,
-                        "status": status,
-                        "exit_code": exit_code,
-                        "error_message": error_message,
-                        "correlation_id": job_id,
-                    },
-                    separators=(",", ":"),
-                    sort_keys=True,
-                ),
+                audit_details_json,
                 finished_at,
             ),
         )
@@ -2402,10 +2677,37 @@ INSERT INTO audit_log(
             created_at=finished_at,
         )
         con.commit()
+        _adjust_job_counts(running=-1)
 
     _start_queued_jobs()
 
 
+def _row_to_job_summary(row: sqlite3.Row) -> Dict[str, Any]:
+    row_keys = set(row.keys())
+    roles_raw = str(row["requested_by_roles_csv"] or "") if "requested_by_roles_csv" in row_keys else ""
+    requested_by_user_id = int(row["requested_by_user_id"])
+    requested_by = {
+        "user_id": requested_by_user_id,
+        "email": row["requested_by_email"] if "requested_by_email" in row_keys else None,
+        "display_name": row["requested_by_display_name"] if "requested_by_display_name" in row_keys else None,
+        "roles": [role for role in roles_raw.split(",") if role],
+    }
+    return {
+        # NOT NULL TEXT columns already come back as str.
+        "job_id": row["job_id"],
+        "action": row["action"],
+        "status": row["status"],
+        "requested_by_user_id": requested_by_user_id,
+        "requested_by": requested_by,
+        "log_path": row["log_path"],
+        "created_at": row["created_at"],
+        "started_at": row["started_at"],
+        "finished_at": row["finished_at"],
+        "exit_code": row["exit_code"],
+        "error_message": row["error_message"],
+    }
+
+
 def _row_to_job(row: sqlite3.Row, *, include_artifact_hints: bool = False) -> Dict[str, Any]:
     params: Dict[str, Any] = {}
     plan_payload: Dict[str, Any] = {}
@@ -2425,38 +2727,16 @@ def _row_to_job(row: sqlite3.Row, *, include_artifact_hints: bool = False) -> Di
     except Exception:
         plan_payload = {}
 
-    row_keys = set(row.keys())
-    roles_raw = str(row["requested_by_roles_csv"] or "") if "requested_by_roles_csv" in row_keys else ""
-    requested_by_user_id = int(row["requested_by_user_id"])
-    requested_by = {
-        "user_id": requested_by_user_id,
-        "email": row["requested_by_email"] if "requested_by_email" in row_keys else None,
-        "display_name": row["requested_by_display_name"] if "requested_by_display_name" in row_keys else None,
-        "roles": [role for role in roles_raw.split(",") if role],
-    }
-
-    job = {
-        "job_id": str(row["job_id"]),
-        "action": str(row["action"]),
-        "status": str(row["status"]),
-        "requested_by_user_id": requested_by_user_id,
-        "requested_by": requested_by,
-        "params": params,
-        "execution": plan_payload,
-        "log_path": str(row["log_path"]),
-        "created_at": str(row["created_at"]),
-        "started_at": row["started_at"],
-        "finished_at": row["finished_at"],
-        "exit_code": row["exit_code"],
-        "error_message": row["error_message"],
-    }
+    job = _row_to_job_summary(row)
+    job["params"] = params
+    job["execution"] = plan_payload
     if include_artifact_hints:
         job["artifact_hints"] = _job_artifact_hints(job)
     return job
 
 
 def get_job(job_id: str) -> Dict[str, Any]:
-    with admin_db.connection_scope() as con:
+    with admin_db.read_connection_scope() as con:
         row = con.execute(
             """
 SELECT
@@ -2495,11 +2775,13 @@ WHERE j.job_id = ?
     return _row_to_job(row, include_artifact_hints=True)
 
 
-def list_jobs(limit: int = 20) -> List[Dict[str, Any]]:
+def list_jobs(limit: int = 20, *, include_payload: bool = True) -> List[Dict[str, Any]]:
+    """List recent jobs; ``include_payload=False`` skips decoding params and execution."""
     limit = max(1, min(int(limit), 200))
-    with admin_db.connection_scope() as con:
+    payload_columns = "j.params_json, j.command_json," if include_payload else ""
+    with admin_db.read_connection_scope() as con:
         rows = con.execute(
-            """
+            f"""
 SELECT
     j.job_id,
     j.action,
@@ -2517,8 +2799,7 @@ SELECT
             ORDER BY r.role_code
         )
     ) AS requested_by_roles_csv,
-    j.params_json,
-    j.command_json,
+    {payload_columns}
     j.log_path,
     j.created_at,
     j.started_at,
@@ -2532,6 +2813,8 @@ LIMIT ?
             """,
             (limit,),
         ).fetchall()
+    if not include_payload:
+        return [_row_to_job_summary(row) for row in rows]
     return [_row_to_job(row) for row in rows]
 
 
@@ -2597,7 +2880,7 @@ def _synthetic_job_events(job: Dict[str, Any]) -> List[Dict[str, Any]]:
 def list_job_events(job_id: str, limit: int = 100) -> List[Dict[str, Any]]:
     job = get_job(job_id)
     safe_limit = max(1, min(int(limit), 500))
-    with admin_db.connection_scope() as con:
+    with admin_db.read_connection_scope() as con:
         rows = con.execute(
             """
 SELECT event_id, job_id, event_type, event_status, message, details_json, created_at
@@ -2618,7 +2901,9 @@ def read_job_log(job_id: str, offset: int = 0, limit: int = 65536) -> Dict[str,
     log_path = Path(job["log_path"])
     safe_offset = max(0, int(offset))
     safe_limit = max(1024, min(int(limit), 1024 * 1024))
-    if not log_path.exists():
+    try:
+        size = os.stat(log_path).st_size
+    except FileNotFoundError:
         return {
             "job_id": job_id,
             "offset": safe_offset,
@@ -2627,12 +2912,21 @@ def read_job_log(job_id: str, offset: int = 0, limit: int = 65536) -> Dict[str,
             "eof": True,
             "status": job["status"],
         }
-    size = log_path.stat().st_size
-    if safe_offset > size:
-        safe_offset = size
-    with log_path.open("rb") as f:
-        f.seek(safe_offset)
-        data = f.read(safe_limit)
+    if safe_offset >= size:
+        # Idle tail poll with nothing new: answer from the stat alone.
+        return {
+            "job_id": job_id,
+            "offset": size,
+            "next_offset": size,
+            "chunk": "",
+            "eof": job["status"] in TERMINAL_STATUSES,
+            "status": job["status"],
+        }
+    fd = os.open(log_path, os.O_RDONLY)
+    try:
+        data = os.pread(fd, safe_limit, safe_offset)
+    finally:
+        os.close(fd)
     next_offset = safe_offset + len(data)
     eof = next_offset >= size and job["status"] in TERMINAL_STATUSES
     return {
@@ -2654,46 +2948,80 @@ def read_full_job_log(job_id: str) -> Dict[str, Any]:
     return {"job_id": job_id, "status": job["status"], "chunk": content}
 
 
-def list_backups(limit: int = 100) -> Dict[str, Any]:
-    limit = max(1, min(int(limit), 500))
+# (signature, result) for the last list_backups scan; see _backups_signature.
+_BACKUPS_CACHE: tuple[tuple[Any, ...], Dict[str, Any]] | None = None
+# Directory mtimes this fresh may still change within the same timestamp tick.
+_BACKUPS_CACHE_SETTLE_NS = 2_000_000_000
+
+
+def _mtime_utc(st: os.stat_result) -> str:
+    return _to_iso(dt.datetime.fromtimestamp(st.st_mtime, tz=dt.timezone.utc))
+
+
+def _copy_backups_listing(listing: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: [dict(item) for item in items] for key, items in listing.items()}
+
+
+def _scan_backups(admin_dir: Path, meta_root: Path, limit: int) -> tuple[Dict[str, Any], bool]:
     out: Dict[str, Any] = {
         "admin_db": [],
         "release_metadata": [],
     }
+    complete = True
 
-    admin_dir = _ensure_backups_subdir("admin_db")
-    admin_files = sorted(admin_dir.glob("*.sqlite3"), key=lambda p: p.stat().st_mtime, reverse=True)
-    for path in admin_files[:limit]:
-        st = path.stat()
+    with os.scandir(admin_dir) as entries:
+        admin_files = [(entry.name, entry.stat()) for entry in entries if entry.name.endswith(".sqlite3")]
+    admin_files.sort(key=lambda item: item[1].st_mtime_ns, reverse=True)
+    for name, st in admin_files[:limit]:
         out["admin_db"].append(
             {
-                "name": path.name,
+                "name": name,
                 "bytes": st.st_size,
-                "mtime_utc": _to_iso(dt.datetime.fromtimestamp(st.st_mtime, tz=dt.timezone.utc)),
+                "mtime_utc": _mtime_utc(st),
             }
         )
 
-    meta_root = _ensure_backups_subdir("release_metadata")
-    meta_dirs = sorted(
-        [p for p in meta_root.iterdir() if p.is_dir()],
-        key=lambda p: p.stat().st_mtime,
-        reverse=True,
-    )
-    for path in meta_dirs[:limit]:
-        manifest = path / "manifest.json"
+    with os.scandir(meta_root) as entries:
+        meta_dirs = [(entry.name, entry.stat()) for entry in entries if entry.is_dir()]
+    meta_dirs.sort(key=lambda item: item[1].st_mtime_ns, reverse=True)
+    for name, st in meta_dirs[:limit]:
         item: Dict[str, Any] = {
-            "backup_id": path.name,
-            "mtime_utc": _to_iso(dt.datetime.fromtimestamp(path.stat().st_mtime, tz=dt.timezone.utc)),
+            "backup_id": name,
+            "mtime_utc": _mtime_utc(st),
         }
-        if manifest.exists():
-            try:
-                payload = json.loads(manifest.read_text(encoding="utf-8"))
-                item["created_at"] = payload.get("created_at")
-                item["current_symlink_target"] = payload.get("current_symlink_target")
-            except Exception:
-                pass
+        try:
+            with (meta_root / name / "manifest.json").open("r", encoding="utf-8") as f:
+                payload = json.load(f)
+            item["created_at"] = payload.get("created_at")
+            item["current_symlink_target"] = payload.get("current_symlink_target")
+        except FileNotFoundError:
+            # The manifest is written last; don't cache a backup still in progress.
+            complete = False
+        except Exception:
+            pass
         out["release_metadata"].append(item)
 
+    return out, complete
+
+
+def list_backups(limit: int = 100) -> Dict[str, Any]:
+    global _BACKUPS_CACHE
+    limit = max(1, min(int(limit), 500))
+    admin_dir = _ensure_backups_subdir("admin_db")
+    meta_root = _ensure_backups_subdir("release_metadata")
+
+    # Adding or removing a backup changes its parent directory's mtime.
+    admin_mtime_ns = admin_dir.stat().st_mtime_ns
+    meta_mtime_ns = meta_root.stat().st_mtime_ns
+    signature = (str(admin_dir), admin_mtime_ns, str(meta_root), meta_mtime_ns, limit)
+    cached = _BACKUPS_CACHE
+    if cached is not None and cached[0] == signature:
+        return _copy_backups_listing(cached[1])
+
+    out, complete = _scan_backups(admin_dir, meta_root, limit)
+    settled_before_ns = time.time_ns() - _BACKUPS_CACHE_SETTLE_NS
+    if complete and max(admin_mtime_ns, meta_mtime_ns) < settled_before_ns:
+        _BACKUPS_CACHE = (signature, _copy_backups_listing(out))
     return out
 
 
@@ -2774,7 +3102,7 @@ def _extract_build_id_from_log(text: str) -> str:
 
 def _job_target_build_id(job: Dict[str, Any], log_text: str = "") -> tuple[str, str]:
     params = job.get("params") if isinstance(job.get("params"), dict) else {}
-    raw = str(params.get("build_id") or "").strip()
+    raw = _opt_str(params, "build_id")
     if raw and _is_safe_build_id(raw):
         return raw, "parameter"
     from_log = _extract_build_id_from_log(log_text)
@@ -3037,8 +3365,8 @@ def _job_artifact_hints(job: Dict[str, Any]) -> List[Dict[str, Any]]:
             ]
         )
     elif action in {"save_coolness_profile", "apply_coolness_profile"}:
-        profile_id = str(params.get("profile_id") or "").strip()
-        profile_version = str(params.get("profile_version") or "").strip()
+        profile_id = _opt_str(params, "profile_id")
+        profile_version = _opt_str(params, "profile_version")
         store_dir = _profile_store_dir()
         if profile_id and profile_version:
             hints.append(
@@ -3054,11 +3382,11 @@ def _job_artifact_hints(job: Dict[str, Any]) -> List[Dict[str, Any]]:
         )
     elif action in {"backup_admin_db", "restore_admin_db", "backup_release_metadata", "restore_release_metadata"}:
         if action == "restore_admin_db":
-            backup_name = str(params.get("backup_name") or "").strip()
+            backup_name = _opt_str(params, "backup_name")
             if backup_name:
                 hints.append(_path_hint(kind="backup", label=backup_name, path=_backups_dir() / "admin_db" / backup_name, description="Admin DB backup used as restore source."))
         elif action == "restore_release_metadata":
-            backup_id = str(params.get("backup_id") or "").strip()
+            backup_id = _opt_str(params, "backup_id")
             if backup_id:
                 backup_dir = _backups_dir() / "release_metadata" / backup_id
                 hints.extend(
@@ -3675,7 +4003,7 @@ def _job_mentions_build(job: Dict[str, Any], build_id: str) -> bool:
     if not target:
         return False
     params = job.get("params") if isinstance(job.get("params"), dict) else {}
-    if str(params.get("build_id") or "").strip() == target:
+    if _opt_str(params, "build_id") == target:
         return True
     log_path = Path(str(job.get("log_path") or ""))
     if not log_path.exists():
@@ -3781,7 +4109,7 @@ def _matching_retention_dry_run_jobs(
             continue
         if (job_keep_builds, job_keep_reports, job_prune_tmp) != (keep_builds, keep_reports, prune_tmp):
             continue
-        job_hash = str(params.get("candidate_hash") or "").strip()
+        job_hash = _opt_str(params, "candidate_hash")
         if not job_hash:
             try:
                 job_plan = _retention_plan(
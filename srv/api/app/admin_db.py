@@ -1,82 +1,256 @@
 from __future__ import annotations
 
 import contextlib
+import datetime as dt
+import logging
 import os
 import sqlite3
+import threading
+from functools import lru_cache
 from pathlib import Path
-from typing import Iterator, List
+from typing import Any, Iterator, List
 
+import orjson
 
-ROOT_DIR = Path(__file__).resolve().parents[3]
+
+DEFAULT_ADMIN_DB_POOL_SIZE = 4
+
+logger = logging.getLogger(__name__)
+
+_ENV_TRUE = frozenset({"1", "true", "t", "yes", "y", "on"})
+_ENV_FALSE = frozenset({"0", "false", "f", "no", "n", "off"})
 
 
 def parse_env_bool(value: str | None, default: bool = False) -> bool:
     if value is None:
         return default
     lowered = value.strip().lower()
-    if lowered in {"1", "true", "t", "yes", "y", "on"}:
+    if lowered in _ENV_TRUE:
         return True
-    if lowered in {"0", "false", "f", "no", "n", "off"}:
+    if lowered in _ENV_FALSE:
         return False
     return default
 
 
+def canonical_json(value: Any) -> str:
+    """Compact, key-sorted JSON shared by stored job payloads, audit details and auth cookies."""
+    return orjson.dumps(value, option=orjson.OPT_SORT_KEYS).decode("utf-8")
+
+
+@lru_cache(maxsize=None)
 def auth_enabled() -> bool:
     return parse_env_bool(os.getenv("SPACEGATE_AUTH_ENABLE"), default=False)
 
 
+@lru_cache(maxsize=1)
+def root_dir() -> Path:
+    """Repository root shared by the API modules that do not import db."""
+    # Resolved on demand: deployments that set SPACEGATE_ADMIN_DB_PATH or a
+    # state dir never need the repository root.
+    return Path(__file__).resolve().parents[3]
+
+
+@lru_cache(maxsize=None)
 def get_admin_db_path() -> Path:
     raw = os.getenv("SPACEGATE_ADMIN_DB_PATH")
     if raw:
         return Path(raw).expanduser()
-    state_raw = os.getenv("SPACEGATE_STATE_DIR") or os.getenv("SPACEGATE_DATA_DIR") or str(ROOT_DIR / "data")
+    state_raw = os.getenv("SPACEGATE_STATE_DIR") or os.getenv("SPACEGATE_DATA_DIR") or str(root_dir() / "data")
     return Path(state_raw).expanduser() / "admin" / "admin.sqlite3"
 
 
+@lru_cache(maxsize=None)
 def get_admin_db_path_str() -> str:
     return str(get_admin_db_path())
 
 
-def _parse_csv_env(var_name: str) -> List[str]:
+def clear_caches() -> None:
+    """Drop cached environment lookups so tests can re-point or reconfigure the admin DB."""
+    for cached in (get_admin_db_path, get_admin_db_path_str, auth_enabled, _parse_csv_env):
+        cached.cache_clear()
+    _WAL_ENABLED_PATHS.clear()
+    _CONNECTION_POOL.clear()
+    _close_read_connection()
+
+
+@lru_cache(maxsize=8)
+def _parse_csv_env(var_name: str) -> tuple[str, ...]:
     raw = os.getenv(var_name, "")
     if not raw:
-        return []
-    values = []
-    for part in raw.split(","):
-        item = part.strip()
-        if item:
-            values.append(item)
-    return values
+        return ()
+    return tuple(item for item in (part.strip() for part in raw.split(",")) if item)
+
+
+def _utc_now_iso() -> str:
+    return dt.datetime.now(dt.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
 
 
 def _ensure_dir(path: Path) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
 
 
+# Applied once per new connection. WAL keeps the database consistent with
+# synchronous=NORMAL; only the last commits before a power loss can roll back.
+_CONNECTION_PRAGMAS = """
+PRAGMA foreign_keys = ON;
+PRAGMA busy_timeout = 5000;
+PRAGMA synchronous = NORMAL;
+PRAGMA cache_size = -64000;
+PRAGMA temp_store = MEMORY;
+PRAGMA mmap_size = 268435456;
+"""
+# journal_mode=WAL is persisted in the database header, so it only needs to be
+# set by the first connection this process opens to each path.
+_WAL_ENABLED_PATHS: set[str] = set()
+# Per-connection prepared statement cache. Pooled connections live for the
+# whole process, so size it above the number of distinct admin/auth queries.
+_CACHED_STATEMENTS = 256
+
+
+def _pool_size_from_env() -> int:
+    raw = os.getenv("SPACEGATE_ADMIN_DB_POOL_SIZE", "").strip()
+    if not raw:
+        return DEFAULT_ADMIN_DB_POOL_SIZE
+    try:
+        return max(0, int(raw))
+    except ValueError:
+        return DEFAULT_ADMIN_DB_POOL_SIZE
+
+
 def get_connection() -> sqlite3.Connection:
-    db_path = get_admin_db_path()
-    _ensure_dir(db_path)
-    con = sqlite3.connect(str(db_path))
+    db_path_str = get_admin_db_path_str()
+    first_connection = db_path_str not in _WAL_ENABLED_PATHS
+    if first_connection:
+        # Later connections to the same path reuse the directory created here.
+        _ensure_dir(get_admin_db_path())
+    # Pooled connections move between threads, but only one borrower uses a
+    # connection at a time.
+    con = sqlite3.connect(db_path_str, check_same_thread=False, cached_statements=_CACHED_STATEMENTS)
     con.row_factory = sqlite3.Row
-    con.execute("PRAGMA foreign_keys = ON")
-    con.execute("PRAGMA journal_mode = WAL")
-    con.execute("PRAGMA busy_timeout = 5000")
+    if first_connection:
+        con.executescript("PRAGMA journal_mode = WAL;" + _CONNECTION_PRAGMAS)
+        _WAL_ENABLED_PATHS.add(db_path_str)
+    else:
+        con.executescript(_CONNECTION_PRAGMAS)
     return con
 
 
+class _ConnectionPool:
+    """Idle admin DB connections kept open between connection_scope() uses."""
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self._lock = threading.Lock()
+        self._idle: List[sqlite3.Connection] = []
+        self._db_path: str | None = None
+
+    def checkout(self) -> sqlite3.Connection:
+        db_path = get_admin_db_path_str()
+        stale: List[sqlite3.Connection] = []
+        con: sqlite3.Connection | None = None
+        with self._lock:
+            if self._db_path != db_path:
+                stale, self._idle = self._idle, []
+                self._db_path = db_path
+            if self._idle:
+                con = self._idle.pop()
+        for item in stale:
+            item.close()
+        return con if con is not None else get_connection()
+
+    def release(self, con: sqlite3.Connection) -> None:
+        if con.in_transaction:
+            con.rollback()
+        with self._lock:
+            if self._db_path == get_admin_db_path_str() and len(self._idle) < self.size:
+                self._idle.append(con)
+                return
+        con.close()
+
+    def clear(self) -> None:
+        with self._lock:
+            stale, self._idle = self._idle, []
+            self._db_path = None
+        for con in stale:
+            con.close()
+
+
+_CONNECTION_POOL = _ConnectionPool(_pool_size_from_env())
+
+
 @contextlib.contextmanager
 def connection_scope() -> Iterator[sqlite3.Connection]:
-    con = get_connection()
+    con = _CONNECTION_POOL.checkout()
     try:
         yield con
-    finally:
+    except BaseException:
+        # Don't hand a connection of unknown state to the next caller.
         con.close()
+        raise
+    _CONNECTION_POOL.release(con)
 
 
-def initialize() -> None:
-    with connection_scope() as con:
-        con.executescript(
-            """
+# One read-only connection per request thread for SELECT-only callers. A
+# connection shared across threads would share its statement cache and any
+# half-stepped cursor, which keeps a read transaction (and an old WAL
+# snapshot) open for everyone. clear_caches() bumps the generation so each
+# thread reopens against the current path on its next read.
+_READ_CONNECTIONS = threading.local()
+_READ_CONNECTION_GENERATION = 0
+
+
+def _close_read_connection() -> None:
+    global _READ_CONNECTION_GENERATION
+    _READ_CONNECTION_GENERATION += 1
+    _drop_thread_read_connection()
+
+
+def _drop_thread_read_connection() -> None:
+    cached = getattr(_READ_CONNECTIONS, "entry", None)
+    _READ_CONNECTIONS.entry = None
+    if cached is not None:
+        cached[2].close()
+
+
+def get_ro_connection() -> sqlite3.Connection | None:
+    """Return this thread's read-only connection, or None when one can't be used."""
+    db_path = get_admin_db_path_str()
+    cached = getattr(_READ_CONNECTIONS, "entry", None)
+    if cached is not None:
+        if cached[0] == db_path and cached[1] == _READ_CONNECTION_GENERATION:
+            return cached[2]
+        _drop_thread_read_connection()
+    generation = _READ_CONNECTION_GENERATION
+    try:
+        con = sqlite3.connect(
+            f"{Path(db_path).resolve().as_uri()}?mode=ro",
+            uri=True,
+            cached_statements=_CACHED_STATEMENTS,
+        )
+        con.row_factory = sqlite3.Row
+        con.execute("PRAGMA busy_timeout = 5000")
+    except sqlite3.OperationalError:
+        # Not created yet (or unreadable); callers fall back to the pool.
+        return None
+    _READ_CONNECTIONS.entry = (db_path, generation, con)
+    return con
+
+
+@contextlib.contextmanager
+def read_connection_scope() -> Iterator[sqlite3.Connection]:
+    """Like connection_scope() for callers that only run SELECTs."""
+    con = get_ro_connection()
+    if con is None:
+        with connection_scope() as con:
+            yield con
+        return
+    yield con
+
+
+# Bump whenever _SCHEMA_SQL changes so existing databases re-run it once.
+ADMIN_SCHEMA_VERSION = 1
+
+_SCHEMA_SQL = """
 CREATE TABLE IF NOT EXISTS users (
   user_id INTEGER PRIMARY KEY AUTOINCREMENT,
   email_norm TEXT UNIQUE NOT NULL,
@@ -140,7 +314,7 @@ CREATE TABLE IF NOT EXISTS sessions (
   user_agent_hash TEXT,
   ip_prefix_hash TEXT,
   FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
-);
+) WITHOUT ROWID;
 
 CREATE TABLE IF NOT EXISTS audit_log (
   audit_id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -356,9 +530,14 @@ CREATE TABLE IF NOT EXISTS agent_portfolio_journal_entries (
 CREATE INDEX IF NOT EXISTS idx_sessions_user_id ON sessions(user_id);
 CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON sessions(expires_at);
 CREATE INDEX IF NOT EXISTS idx_audit_created_at ON audit_log(created_at);
+-- The audit browser filters on these and pages by audit_id (the rowid), which
+-- every SQLite index already carries, so the filtered scans come back in order.
+CREATE INDEX IF NOT EXISTS idx_audit_event_type ON audit_log(event_type);
+CREATE INDEX IF NOT EXISTS idx_audit_actor ON audit_log(actor_user_id);
 CREATE INDEX IF NOT EXISTS idx_allowlist_email ON admin_allowlist(email_norm);
 CREATE INDEX IF NOT EXISTS idx_allowlist_sub ON admin_allowlist(provider_sub);
-CREATE INDEX IF NOT EXISTS idx_admin_jobs_status ON admin_jobs(status);
+DROP INDEX IF EXISTS idx_admin_jobs_status;
+CREATE INDEX IF NOT EXISTS idx_admin_jobs_status_created ON admin_jobs(status, created_at);
 CREATE INDEX IF NOT EXISTS idx_admin_jobs_created_at ON admin_jobs(created_at);
 CREATE INDEX IF NOT EXISTS idx_admin_job_events_job ON admin_job_events(job_id, event_id);
 CREATE INDEX IF NOT EXISTS idx_admin_job_events_type ON admin_job_events(event_type, created_at);
@@ -376,70 +555,124 @@ CREATE INDEX IF NOT EXISTS idx_agent_claims_dossier ON agent_extracted_claims(do
 CREATE INDEX IF NOT EXISTS idx_agent_claims_subject ON agent_extracted_claims(subject_stable_key);
 CREATE INDEX IF NOT EXISTS idx_agent_claims_predicate ON agent_extracted_claims(predicate);
 CREATE INDEX IF NOT EXISTS idx_agent_journal_dossier ON agent_portfolio_journal_entries(dossier_id, created_at);
-            """
-        )
-        con.execute(
-            "INSERT OR IGNORE INTO roles(role_code) VALUES (?)",
-            ("admin",),
-        )
-        con.execute(
+"""
+
+
+def initialize() -> None:
+    with connection_scope() as con:
+        schema_version = int(con.execute("PRAGMA user_version").fetchone()[0])
+        # Schema, roles, allowlist and endpoints land in one write transaction;
+        # taking the lock up front avoids a read-to-write upgrade between
+        # concurrent initialize() calls. executescript() only commits what was
+        # pending before the script, so the BEGIN it runs stays open for the
+        # seeds below.
+        if schema_version < ADMIN_SCHEMA_VERSION:
+            con.executescript(
+                "BEGIN IMMEDIATE;" + _SCHEMA_SQL + f"PRAGMA user_version = {ADMIN_SCHEMA_VERSION};"
+            )
+        else:
+            con.execute("BEGIN IMMEDIATE")
+        con.executemany(
             "INSERT OR IGNORE INTO roles(role_code) VALUES (?)",
-            ("user",),
+            [("admin",), ("user",)],
         )
+        _ensure_allowlist_unique_indexes(con)
         _seed_allowlist_from_env(con)
         _seed_inference_endpoints_from_env(con)
         con.commit()
 
 
+_ALLOWLIST_UNIQUE_INDEX_SQL = {
+    "uq_allowlist_email": (
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_allowlist_email "
+        "ON admin_allowlist(provider, issuer, email_norm) WHERE provider_sub IS NULL"
+    ),
+    "uq_allowlist_sub": (
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_allowlist_sub "
+        "ON admin_allowlist(provider, issuer, provider_sub) WHERE email_norm IS NULL"
+    ),
+}
+
+
+def find_allowlist_duplicates(con: sqlite3.Connection, schema: str = "main") -> List[sqlite3.Row]:
+    """Allowlist entries that would collide on the uq_allowlist_* unique indexes."""
+    return con.execute(
+        f"""
+SELECT provider, issuer, email_norm, NULL AS provider_sub, GROUP_CONCAT(allow_id) AS allow_ids
+FROM {schema}.admin_allowlist
+WHERE provider_sub IS NULL
+GROUP BY provider, issuer, email_norm
+HAVING COUNT(*) > 1
+UNION ALL
+SELECT provider, issuer, NULL AS email_norm, provider_sub, GROUP_CONCAT(allow_id) AS allow_ids
+FROM {schema}.admin_allowlist
+WHERE email_norm IS NULL
+GROUP BY provider, issuer, provider_sub
+HAVING COUNT(*) > 1
+        """
+    ).fetchall()
+
+
+def _ensure_allowlist_unique_indexes(con: sqlite3.Connection) -> None:
+    # Older databases may hold duplicate allowlist rows from racing seeds. Which
+    # one to keep (enabled flag, note) is an operator decision, so leave the rows
+    # alone and skip the indexes until the duplicates are resolved.
+    present = {
+        str(row[0])
+        for row in con.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND name IN ('uq_allowlist_email', 'uq_allowlist_sub')"
+        )
+    }
+    if len(present) == len(_ALLOWLIST_UNIQUE_INDEX_SQL):
+        return
+    duplicates = find_allowlist_duplicates(con)
+    if duplicates:
+        logger.warning(
+            "admin_allowlist has duplicate entries; unique indexes not created until they are resolved: %s",
+            "; ".join(
+                f"provider={row['provider']} issuer={row['issuer']} email={row['email_norm']} "
+                f"sub={row['provider_sub']} allow_ids={row['allow_ids']}"
+                for row in duplicates
+            ),
+        )
+        return
+    for name, sql in _ALLOWLIST_UNIQUE_INDEX_SQL.items():
+        if name not in present:
+            con.execute(sql)
+
+
 def _seed_allowlist_from_env(con: sqlite3.Connection) -> None:
     emails = [item.lower() for item in _parse_csv_env("SPACEGATE_ADMIN_ALLOWLIST_EMAILS")]
     subs = _parse_csv_env("SPACEGATE_ADMIN_ALLOWLIST_SUBS")
     provider = os.getenv("SPACEGATE_OIDC_PROVIDER", "google").strip().lower() or "google"
     issuer = os.getenv("SPACEGATE_OIDC_ISSUER", "https://accounts.google.com").strip() or "https://accounts.google.com"
-    now_expr = "strftime('%Y-%m-%dT%H:%M:%SZ','now')"
-
-    for email in emails:
-        exists = con.execute(
-            """
-SELECT 1
-FROM admin_allowlist
-WHERE provider = ? AND issuer = ? AND provider_sub IS NULL AND email_norm = ?
-LIMIT 1
-            """,
-            (provider, issuer, email),
-        ).fetchone()
-        if exists is None:
-            con.execute(
-                f"""
+    now = _utc_now_iso()
+    base = {"provider": provider, "issuer": issuer, "note": "seeded-from-env", "now": now}
+    rows = [{**base, "provider_sub": None, "email_norm": email} for email in emails]
+    rows.extend({**base, "provider_sub": provider_sub, "email_norm": None} for provider_sub in subs)
+    if not rows:
+        return
+
+    # NOT EXISTS rather than INSERT OR IGNORE: the unique indexes are absent
+    # while duplicate rows await an operator, and the seed must stay idempotent.
+    con.executemany(
+        """
 INSERT INTO admin_allowlist(
   provider, issuer, provider_sub, email_norm, enabled, note, created_at, updated_at
-) VALUES (?, ?, NULL, ?, 1, ?, {now_expr}, {now_expr})
-                """,
-                (provider, issuer, email, "seeded-from-env"),
-            )
-    for provider_sub in subs:
-        exists = con.execute(
-            """
-SELECT 1
-FROM admin_allowlist
-WHERE provider = ? AND issuer = ? AND provider_sub = ? AND email_norm IS NULL
-LIMIT 1
-            """,
-            (provider, issuer, provider_sub),
-        ).fetchone()
-        if exists is None:
-            con.execute(
-                f"""
-INSERT INTO admin_allowlist(
-  provider, issuer, provider_sub, email_norm, enabled, note, created_at, updated_at
-) VALUES (?, ?, ?, NULL, 1, ?, {now_expr}, {now_expr})
-                """,
-                (provider, issuer, provider_sub, "seeded-from-env"),
-            )
+)
+SELECT :provider, :issuer, :provider_sub, :email_norm, 1, :note, :now, :now
+WHERE NOT EXISTS (
+  SELECT 1 FROM admin_allowlist
+  WHERE provider = :provider AND issuer = :issuer
+    AND provider_sub IS :provider_sub AND email_norm IS :email_norm
+)
+        """,
+        rows,
+    )
 
 
 def _seed_inference_endpoints_from_env(con: sqlite3.Connection) -> None:
-    now_expr = "strftime('%Y-%m-%dT%H:%M:%SZ','now')"
+    now = _utc_now_iso()
 
     def _seed(
         *,
@@ -460,7 +693,7 @@ def _seed_inference_endpoints_from_env(con: sqlite3.Connection) -> None:
             note = str(existing["notes"] or "")
             if note.startswith("Seeded from "):
                 con.execute(
-                    f"""
+                    """
 UPDATE inference_endpoints
 SET display_name = ?,
     provider = ?,
@@ -469,7 +702,7 @@ SET display_name = ?,
     api_key_env = ?,
     default_model = ?,
     notes = ?,
-    updated_at = {now_expr}
+    updated_at = ?
 WHERE endpoint_id = ?
                     """,
                     (
@@ -480,16 +713,17 @@ WHERE endpoint_id = ?
                         api_key_env,
                         default_model,
                         notes,
+                        now,
                         int(existing["endpoint_id"]),
                     ),
                 )
             return
         con.execute(
-            f"""
+            """
 INSERT INTO inference_endpoints(
   endpoint_key, display_name, provider, base_url, auth_mode, api_key_env,
   default_model, role_defaults_json, timeout_s, enabled, notes, created_at, updated_at
-) VALUES (?, ?, ?, ?, ?, ?, ?, '{{}}', 30, 1, ?, {now_expr}, {now_expr})
+) VALUES (?, ?, ?, ?, ?, ?, ?, '{}', 30, 1, ?, ?, ?)
             """,
             (
                 endpoint_key,
@@ -500,6 +734,8 @@ INSERT INTO inference_endpoints(
                 api_key_env,
                 default_model,
                 notes,
+                now,
+                now,
             ),
         )
 
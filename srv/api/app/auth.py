@@ -1,17 +1,24 @@
 from __future__ import annotations
 
+import base64
 import datetime as dt
 import hashlib
 import hmac
+import ipaddress
 import json
+import logging
 import os
-import secrets
+import queue
 import sqlite3
+import threading
+import time
 import urllib.parse
-import urllib.request
 from dataclasses import dataclass
-from typing import Any, Dict, Optional, Set
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional
 
+import requests
 from fastapi import HTTPException, Request
 from fastapi.responses import RedirectResponse, Response
 from google.auth.transport import requests as google_requests
@@ -20,11 +27,16 @@ from google.oauth2 import id_token as google_id_token
 from . import admin_db
 
 
+logger = logging.getLogger(__name__)
+
 DEFAULT_AUTH_ISSUER = "https://accounts.google.com"
 DEFAULT_GOOGLE_AUTH_URL = "https://accounts.google.com/o/oauth2/v2/auth"
 DEFAULT_GOOGLE_TOKEN_URL = "https://oauth2.googleapis.com/token"
 STATE_COOKIE_MAX_AGE_SECONDS = 600
 
+_COOKIE_SAMESITE_VALUES = frozenset({"lax", "strict", "none"})
+_CSRF_SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
 
 @dataclass(frozen=True)
 class AuthConfig:
@@ -49,6 +61,39 @@ class AuthConfig:
     bind_ip_prefix: bool
     auth_url: str
     token_url: str
+    # auth_url plus the static authorization request parameters; login_redirect
+    # appends only state and nonce.
+    auth_request_prefix: str
+    # ID token "iss" values accepted for this issuer (with and without scheme).
+    accepted_issuers: frozenset[str]
+    # set_cookie()/delete_cookie() keyword arguments, built once with the config.
+    session_cookie_kwargs: Mapping[str, Any]
+    csrf_cookie_kwargs: Mapping[str, Any]
+    state_cookie_kwargs: Mapping[str, Any]
+    delete_cookie_kwargs: Mapping[str, Any]
+
+
+@dataclass(frozen=True, slots=True)
+class SessionContext:
+    """The validated session attached to request.state.auth_user."""
+
+    session_id: str
+    user_id: int
+    email: str
+    display_name: str
+    roles: frozenset[str]
+    roles_sorted: tuple[str, ...]
+    csrf_hash: str
+    expires_at: str
+    idle_expires_at: str
+
+    def to_public_dict(self) -> Dict[str, Any]:
+        return {
+            "user_id": self.user_id,
+            "email": self.email,
+            "display_name": self.display_name,
+            "roles": list(self.roles_sorted),
+        }
 
 
 def _parse_env_int(name: str, default: int) -> int:
@@ -64,7 +109,7 @@ def _parse_env_int(name: str, default: int) -> int:
 
 def _get_cookie_samesite() -> str:
     raw = os.getenv("SPACEGATE_SESSION_COOKIE_SAMESITE", "lax").strip().lower()
-    if raw not in {"lax", "strict", "none"}:
+    if raw not in _COOKIE_SAMESITE_VALUES:
         return "lax"
     return raw
 
@@ -126,6 +171,21 @@ def _load_config() -> AuthConfig:
     bind_ip_prefix = admin_db.parse_env_bool(os.getenv("SPACEGATE_SESSION_BIND_IP_PREFIX"), default=False)
     auth_url = os.getenv("SPACEGATE_OIDC_AUTH_URL", DEFAULT_GOOGLE_AUTH_URL).strip() or DEFAULT_GOOGLE_AUTH_URL
     token_url = os.getenv("SPACEGATE_OIDC_TOKEN_URL", DEFAULT_GOOGLE_TOKEN_URL).strip() or DEFAULT_GOOGLE_TOKEN_URL
+    cookie_samesite = _get_cookie_samesite()
+    delete_cookie_kwargs = {"path": "/", "domain": cookie_domain}
+    cookie_kwargs = {"secure": cookie_secure, "samesite": cookie_samesite, **delete_cookie_kwargs}
+    session_max_age = session_ttl_hours * 3600
+    auth_request_query = urllib.parse.urlencode(
+        {
+            "client_id": client_id,
+            "redirect_uri": redirect_uri,
+            "response_type": "code",
+            "scope": "openid email profile",
+            "access_type": "offline",
+            "prompt": "select_account",
+        }
+    )
+    auth_request_prefix = f"{auth_url}?{auth_request_query}"
     return AuthConfig(
         enabled=enabled,
         provider=provider,
@@ -139,7 +199,7 @@ def _load_config() -> AuthConfig:
         csrf_cookie_name=csrf_cookie_name,
         state_cookie_name=state_cookie_name,
         cookie_secure=cookie_secure,
-        cookie_samesite=_get_cookie_samesite(),
+        cookie_samesite=cookie_samesite,
         cookie_domain=cookie_domain,
         session_ttl_hours=session_ttl_hours,
         session_idle_minutes=session_idle_minutes,
@@ -148,15 +208,32 @@ def _load_config() -> AuthConfig:
         bind_ip_prefix=bind_ip_prefix,
         auth_url=auth_url,
         token_url=token_url,
+        auth_request_prefix=auth_request_prefix,
+        accepted_issuers=frozenset({issuer, issuer.removeprefix("https://")}),
+        session_cookie_kwargs=MappingProxyType({"max_age": session_max_age, "httponly": True, **cookie_kwargs}),
+        csrf_cookie_kwargs=MappingProxyType({"max_age": session_max_age, "httponly": False, **cookie_kwargs}),
+        state_cookie_kwargs=MappingProxyType({"max_age": STATE_COOKIE_MAX_AGE_SECONDS, "httponly": True, **cookie_kwargs}),
+        delete_cookie_kwargs=MappingProxyType(delete_cookie_kwargs),
     )
 
 
+@lru_cache(maxsize=1)
 def get_config() -> AuthConfig:
+    # Auth settings come from the environment (admin_db.auth_enabled() is an
+    # env lookup too), so they are fixed for the life of the process.
     return _load_config()
 
 
+def clear_caches() -> None:
+    """Drop the cached AuthConfig and status so tests can reconfigure auth through the environment."""
+    get_config.cache_clear()
+    auth_runtime_status.cache_clear()
+
+
 def is_enabled() -> bool:
-    return get_config().enabled
+    # Same value as get_config().enabled; the middleware and _audit() call this
+    # on every request, so skip the AuthConfig lookup.
+    return admin_db.auth_enabled()
 
 
 def initialize() -> None:
@@ -185,68 +262,103 @@ def _to_iso(value: dt.datetime) -> str:
     return value.replace(microsecond=0).isoformat().replace("+00:00", "Z")
 
 
-def _parse_iso(value: str) -> dt.datetime:
-    if value.endswith("Z"):
-        value = value[:-1] + "+00:00"
-    return dt.datetime.fromisoformat(value)
+def _epoch_iso(seconds: int) -> str:
+    # Same format as _to_iso(), straight from epoch seconds; the per-request
+    # session check works in integers and only formats at the end.
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(seconds))
+
+
+def _urlsafe_tokens(*nbytes: int) -> List[str]:
+    """Unpadded base64url tokens like secrets.token_urlsafe(), from one urandom read."""
+    raw = os.urandom(sum(nbytes))
+    tokens: List[str] = []
+    start = 0
+    for size in nbytes:
+        tokens.append(base64.urlsafe_b64encode(raw[start : start + size]).rstrip(b"=").decode("ascii"))
+        start += size
+    return tokens
 
 
 def _sha256_hex(value: str) -> str:
     return hashlib.sha256(value.encode("utf-8")).hexdigest()
 
 
-def _sign_payload(payload_b64: str, secret: str) -> str:
-    return hmac.new(secret.encode("utf-8"), payload_b64.encode("ascii"), hashlib.sha256).hexdigest()
+# Prefix of signed state cookies; bump when the encoding or MAC changes so
+# cookies from a previous release are rejected rather than misread.
+STATE_COOKIE_VERSION = "s2"
+
+
+@lru_cache(maxsize=4)
+def _state_mac_key(secret: str) -> bytes:
+    raw = secret.encode("utf-8")
+    if len(raw) <= hashlib.blake2b.MAX_KEY_SIZE:
+        return raw
+    # blake2b keys are capped at 64 bytes; hash longer secrets down to fit.
+    return hashlib.blake2b(raw).digest()
+
+
+def _sign_payload(signed_part: str, secret: str) -> str:
+    return hashlib.blake2b(signed_part.encode("ascii"), key=_state_mac_key(secret), digest_size=32).hexdigest()
 
 
 def _build_signed_state_cookie(next_path: str) -> str:
     cfg = get_config()
+    state, nonce = _urlsafe_tokens(24, 24)
     payload = {
-        "state": secrets.token_urlsafe(24),
-        "nonce": secrets.token_urlsafe(24),
+        "state": state,
+        "nonce": nonce,
         "next": _safe_local_path(next_path, cfg.success_redirect),
         "iat": int(_utc_now().timestamp()),
     }
-    raw = json.dumps(payload, separators=(",", ":"), sort_keys=True).encode("utf-8")
-    payload_b64 = urllib.parse.quote_from_bytes(raw, safe="")
-    sig = _sign_payload(payload_b64, cfg.session_secret)
-    return f"{payload_b64}.{sig}"
+    raw = admin_db.canonical_json(payload).encode("utf-8")
+    payload_b64 = base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+    signed_part = f"{STATE_COOKIE_VERSION}.{payload_b64}"
+    return f"{signed_part}.{_sign_payload(signed_part, cfg.session_secret)}"
 
 
 def _parse_signed_state_cookie(cookie_value: str) -> Dict[str, Any]:
     cfg = get_config()
-    if "." not in cookie_value:
+    parts = cookie_value.split(".")
+    if len(parts) != 3 or parts[0] != STATE_COOKIE_VERSION:
         raise ValueError("invalid_state_cookie")
-    payload_b64, sig = cookie_value.rsplit(".", 1)
-    expected = _sign_payload(payload_b64, cfg.session_secret)
+    version, payload_b64, sig = parts
+    expected = _sign_payload(f"{version}.{payload_b64}", cfg.session_secret)
     if not hmac.compare_digest(sig, expected):
         raise ValueError("invalid_state_signature")
-    raw = urllib.parse.unquote_to_bytes(payload_b64)
+    raw = base64.urlsafe_b64decode(payload_b64 + "=" * (-len(payload_b64) % 4))
     payload = json.loads(raw.decode("utf-8"))
     if not isinstance(payload, dict):
         raise ValueError("invalid_state_payload")
     return payload
 
 
+@lru_cache(maxsize=1)
+def _http_session() -> requests.Session:
+    # Shared by the token exchange and google-auth's certs fetch so logins
+    # reuse kept-alive TLS connections to Google.
+    return requests.Session()
+
+
+@lru_cache(maxsize=1)
+def _google_request_adapter() -> google_requests.Request:
+    return google_requests.Request(session=_http_session())
+
+
 def _exchange_code_for_token(code: str) -> Dict[str, Any]:
     cfg = get_config()
-    data = urllib.parse.urlencode(
-        {
+    resp = _http_session().post(
+        cfg.token_url,
+        data={
             "grant_type": "authorization_code",
             "code": code,
             "client_id": cfg.client_id,
             "client_secret": cfg.client_secret,
             "redirect_uri": cfg.redirect_uri,
-        }
-    ).encode("utf-8")
-    req = urllib.request.Request(
-        cfg.token_url,
-        data=data,
-        headers={"Content-Type": "application/x-www-form-urlencoded"},
-        method="POST",
+        },
+        timeout=15,
     )
-    with urllib.request.urlopen(req, timeout=15) as resp:
-        payload = json.loads(resp.read().decode("utf-8"))
+    resp.raise_for_status()
+    payload = resp.json()
     if not isinstance(payload, dict):
         raise ValueError("invalid_token_response")
     return payload
@@ -254,15 +366,12 @@ def _exchange_code_for_token(code: str) -> Dict[str, Any]:
 
 def _verify_google_id_token(raw_id_token: str, expected_nonce: str) -> Dict[str, Any]:
     cfg = get_config()
-    request_adapter = google_requests.Request()
     claims = google_id_token.verify_oauth2_token(
         raw_id_token,
-        request_adapter,
+        _google_request_adapter(),
         cfg.client_id,
     )
-    issuer = str(claims.get("iss", ""))
-    accepted_issuers = {cfg.issuer, cfg.issuer.removeprefix("https://")}
-    if issuer not in accepted_issuers:
+    if str(claims.get("iss", "")) not in cfg.accepted_issuers:
         raise ValueError("invalid_issuer")
     nonce = str(claims.get("nonce", ""))
     if nonce != expected_nonce:
@@ -273,6 +382,26 @@ def _verify_google_id_token(raw_id_token: str, expected_nonce: str) -> Dict[str,
 
 
 def _extract_ip_prefix(host: str) -> str:
+    """The client's /24 (IPv4) or /64 (IPv6) network, as bound to sessions."""
+    host = (host or "").strip()
+    try:
+        ip = ipaddress.ip_address(host.strip("[]").split("%", 1)[0])
+    except ValueError:
+        return host
+    if ip.version == 6 and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    if ip.version == 4:
+        return "%d.%d.%d" % tuple(ip.packed[:3])
+    network = int(ip) >> 64
+    return "%x:%x:%x:%x" % (network >> 48, (network >> 32) & 0xFFFF, (network >> 16) & 0xFFFF, network & 0xFFFF)
+
+
+def _legacy_ip_prefix(host: str) -> str:
+    """The string-split prefix sessions were bound to before _extract_ip_prefix().
+
+    It differs for IPv4-mapped and zero-compressed IPv6 hosts, so validation
+    accepts either hash and sessions bound before the change keep working.
+    """
     host = (host or "").strip()
     if "." in host:
         parts = host.split(".")
@@ -286,40 +415,73 @@ def _extract_ip_prefix(host: str) -> str:
 
 
 def _hash_user_agent(request: Request) -> str:
-    ua = request.headers.get("user-agent", "").strip()
-    return _sha256_hex(ua)
+    # Memoized on request.state: a callback request may both validate an old
+    # session and create a new one.
+    value = getattr(request.state, "auth_user_agent_hash", None)
+    if value is None:
+        value = _sha256_hex(request.headers.get("user-agent", "").strip())
+        request.state.auth_user_agent_hash = value
+    return value
 
 
 def _hash_ip_prefix(request: Request) -> str:
+    value = getattr(request.state, "auth_ip_prefix_hash", None)
+    if value is None:
+        host = request.client.host if request.client else ""
+        value = _sha256_hex(_extract_ip_prefix(host))
+        request.state.auth_ip_prefix_hash = value
+    return value
+
+
+def _hash_legacy_ip_prefix(request: Request) -> str:
     host = request.client.host if request.client else ""
-    prefix = _extract_ip_prefix(host)
-    return _sha256_hex(prefix)
+    legacy = _legacy_ip_prefix(host)
+    if legacy == _extract_ip_prefix(host):
+        return _hash_ip_prefix(request)
+    return _sha256_hex(legacy)
 
 
-def _allowlist_match(
+# Everything the OIDC callback needs to branch on, in one round trip: the
+# allowlist decision, the user already linked to this identity, the user that
+# already owns this email, and the admin role id.
+_LOGIN_LOOKUP_SQL = """
+SELECT
+  EXISTS(
+    SELECT 1
+    FROM admin_allowlist
+    WHERE enabled = 1
+      AND (provider IS NULL OR provider = :provider)
+      AND (issuer IS NULL OR issuer = :issuer)
+      AND (
+        (provider_sub IS NOT NULL AND provider_sub = :provider_sub)
+        OR (email_norm IS NOT NULL AND email_norm = :email_norm)
+      )
+  ) AS allowlisted,
+  identity_user.user_id AS identity_user_id,
+  identity_user.status AS identity_status,
+  email_user.user_id AS email_user_id,
+  email_user.status AS email_status,
+  (SELECT role_id FROM roles WHERE role_code = 'admin') AS admin_role_id
+FROM (SELECT 1)
+LEFT JOIN auth_identities ai
+  ON ai.provider = :provider AND ai.issuer = :issuer AND ai.provider_sub = :provider_sub
+LEFT JOIN users identity_user ON identity_user.user_id = ai.user_id
+LEFT JOIN users email_user ON email_user.email_norm = :email_norm
+"""
+
+
+def _login_lookup(
     con: sqlite3.Connection,
     *,
     provider: str,
     issuer: str,
     provider_sub: str,
     email_norm: str,
-) -> bool:
-    row = con.execute(
-        """
-SELECT 1
-FROM admin_allowlist
-WHERE enabled = 1
-  AND (provider IS NULL OR provider = ?)
-  AND (issuer IS NULL OR issuer = ?)
-  AND (
-    (provider_sub IS NOT NULL AND provider_sub = ?)
-    OR (email_norm IS NOT NULL AND email_norm = ?)
-  )
-LIMIT 1
-        """,
-        (provider, issuer, provider_sub, email_norm),
+) -> sqlite3.Row:
+    return con.execute(
+        _LOGIN_LOOKUP_SQL,
+        {"provider": provider, "issuer": issuer, "provider_sub": provider_sub, "email_norm": email_norm},
     ).fetchone()
-    return row is not None
 
 
 def _ensure_admin_user(
@@ -332,22 +494,21 @@ def _ensure_admin_user(
     display_name: str,
     email_verified: bool,
     claims: Dict[str, Any],
+    lookup: sqlite3.Row | None = None,
 ) -> Dict[str, Any]:
     now = _to_iso(_utc_now())
+    if lookup is None:
+        lookup = _login_lookup(
+            con,
+            provider=provider,
+            issuer=issuer,
+            provider_sub=provider_sub,
+            email_norm=email_norm,
+        )
 
-    row = con.execute(
-        """
-SELECT u.user_id, u.status
-FROM auth_identities ai
-JOIN users u ON u.user_id = ai.user_id
-WHERE ai.provider = ? AND ai.issuer = ? AND ai.provider_sub = ?
-        """,
-        (provider, issuer, provider_sub),
-    ).fetchone()
-
-    if row is not None:
-        user_id = int(row["user_id"])
-        status = str(row["status"])
+    if lookup["identity_user_id"] is not None:
+        user_id = int(lookup["identity_user_id"])
+        status = str(lookup["identity_status"])
         con.execute(
             """
 UPDATE users
@@ -356,32 +517,27 @@ WHERE user_id = ?
             """,
             (email_norm, display_name, now, now, user_id),
         )
-    else:
-        existing = con.execute(
-            "SELECT user_id, status FROM users WHERE email_norm = ?",
-            (email_norm,),
-        ).fetchone()
-        if existing is not None:
-            user_id = int(existing["user_id"])
-            status = str(existing["status"])
-            con.execute(
-                """
+    elif lookup["email_user_id"] is not None:
+        user_id = int(lookup["email_user_id"])
+        status = str(lookup["email_status"])
+        con.execute(
+            """
 UPDATE users
 SET display_name = ?, updated_at = ?, last_login_at = ?
 WHERE user_id = ?
-                """,
-                (display_name, now, now, user_id),
-            )
-        else:
-            cur = con.execute(
-                """
+            """,
+            (display_name, now, now, user_id),
+        )
+    else:
+        cur = con.execute(
+            """
 INSERT INTO users(email_norm, display_name, status, created_at, updated_at, last_login_at)
 VALUES (?, ?, 'active', ?, ?, ?)
-                """,
-                (email_norm, display_name, now, now, now),
-            )
-            user_id = int(cur.lastrowid)
-            status = "active"
+            """,
+            (email_norm, display_name, now, now, now),
+        )
+        user_id = int(cur.lastrowid)
+        status = "active"
 
     con.execute(
         """
@@ -402,18 +558,17 @@ ON CONFLICT(provider, issuer, provider_sub) DO UPDATE SET
             provider_sub,
             email_norm,
             1 if email_verified else 0,
-            json.dumps(claims, separators=(",", ":"), sort_keys=True),
+            admin_db.canonical_json(claims),
             now,
             now,
         ),
     )
 
-    role_row = con.execute("SELECT role_id FROM roles WHERE role_code = 'admin'").fetchone()
-    if role_row is None:
+    if lookup["admin_role_id"] is None:
         raise RuntimeError("missing admin role seed")
     con.execute(
         "INSERT OR IGNORE INTO user_roles(user_id, role_id) VALUES (?, ?)",
-        (user_id, int(role_row["role_id"])),
+        (user_id, int(lookup["admin_role_id"])),
     )
 
     role_rows = con.execute(
@@ -429,24 +584,34 @@ WHERE ur.user_id = ?
     return {"user_id": user_id, "status": status, "roles": roles}
 
 
+_SESSION_REVOKE_LAPSED_SQL = """
+UPDATE sessions
+SET revoked_at = ?
+WHERE user_id = ? AND revoked_at IS NULL AND (expires_at <= ? OR idle_expires_at <= ?)
+"""
+_SESSION_INSERT_SQL = """
+INSERT INTO sessions(
+  session_id, user_id, created_at, last_seen_at, expires_at, idle_expires_at,
+  revoked_at, csrf_secret_hash, user_agent_hash, ip_prefix_hash
+) VALUES (?, ?, ?, ?, ?, ?, NULL, ?, ?, ?)
+"""
+
+
 def _create_session(con: sqlite3.Connection, request: Request, user_id: int) -> Dict[str, str]:
     cfg = get_config()
     now = _utc_now()
     now_iso = _to_iso(now)
     expires_at = _to_iso(now + dt.timedelta(hours=cfg.session_ttl_hours))
     idle_expires_at = _to_iso(now + dt.timedelta(minutes=cfg.session_idle_minutes))
-    session_id = secrets.token_urlsafe(48)
-    csrf_secret = secrets.token_urlsafe(32)
+    session_id, csrf_secret = _urlsafe_tokens(48, 32)
     user_agent_hash = _hash_user_agent(request) if cfg.bind_user_agent else None
     ip_prefix_hash = _hash_ip_prefix(request) if cfg.bind_ip_prefix else None
 
+    # Session validation no longer writes revocations for lapsed sessions;
+    # sweep this user's on login instead.
+    con.execute(_SESSION_REVOKE_LAPSED_SQL, (now_iso, user_id, now_iso, now_iso))
     con.execute(
-        """
-INSERT INTO sessions(
-  session_id, user_id, created_at, last_seen_at, expires_at, idle_expires_at,
-  revoked_at, csrf_secret_hash, user_agent_hash, ip_prefix_hash
-) VALUES (?, ?, ?, ?, ?, ?, NULL, ?, ?, ?)
-        """,
+        _SESSION_INSERT_SQL,
         (
             session_id,
             user_id,
@@ -462,6 +627,72 @@ INSERT INTO sessions(
     return {"session_id": session_id, "csrf_secret": csrf_secret, "expires_at": expires_at}
 
 
+_AUDIT_INSERT_SQL = """
+INSERT INTO audit_log(actor_user_id, event_type, result, request_id, route, method, details_json, created_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+_AUDIT_BATCH_SIZE = 256
+# High-volume informational rows (successful non-auth, non-admin events) are
+# written by a background thread so those requests don't wait on a commit.
+# Anything still queued is lost if the process is killed, so auth and admin
+# events and every deny/error stay synchronous. When the queue is full,
+# _audit() writes inline instead of dropping.
+_AUDIT_QUEUE: "queue.Queue[tuple[Any, ...]]" = queue.Queue(maxsize=10000)
+_AUDIT_WRITER: threading.Thread | None = None
+_AUDIT_WRITER_LOCK = threading.Lock()
+
+
+def _write_audit_rows(rows: List[tuple[Any, ...]]) -> None:
+    try:
+        with admin_db.connection_scope() as con:
+            con.executemany(_AUDIT_INSERT_SQL, rows)
+            con.commit()
+        return
+    except Exception:
+        if len(rows) == 1:
+            logger.exception("Failed to write audit row (event_type=%s)", rows[0][1])
+            return
+        logger.exception("Failed to write batch of %d audit rows; retrying them one at a time", len(rows))
+    # Don't let one bad row take the rest of the batch with it.
+    for row in rows:
+        _write_audit_rows([row])
+
+
+def _audit_is_deferrable(event_type: str, result: str) -> bool:
+    return result == "success" and not event_type.startswith(("auth.", "admin."))
+
+
+def _audit_writer_loop() -> None:
+    while True:
+        batch = [_AUDIT_QUEUE.get()]
+        try:
+            while len(batch) < _AUDIT_BATCH_SIZE:
+                batch.append(_AUDIT_QUEUE.get_nowait())
+        except queue.Empty:
+            pass
+        try:
+            _write_audit_rows(batch)
+        finally:
+            for _ in batch:
+                _AUDIT_QUEUE.task_done()
+
+
+def _ensure_audit_writer() -> None:
+    global _AUDIT_WRITER
+    if _AUDIT_WRITER is not None:
+        return
+    with _AUDIT_WRITER_LOCK:
+        if _AUDIT_WRITER is None:
+            thread = threading.Thread(target=_audit_writer_loop, name="auth-audit-writer", daemon=True)
+            thread.start()
+            _AUDIT_WRITER = thread
+
+
+def flush_audit_log() -> None:
+    """Block until every queued audit row has been written (or failed)."""
+    _AUDIT_QUEUE.join()
+
+
 def _audit(
     request: Request,
     *,
@@ -474,26 +705,27 @@ def _audit(
         return
     details = details or {}
     try:
-        with admin_db.connection_scope() as con:
-            con.execute(
-                """
-INSERT INTO audit_log(actor_user_id, event_type, result, request_id, route, method, details_json, created_at)
-VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    actor_user_id,
-                    event_type,
-                    result,
-                    getattr(request.state, "request_id", None),
-                    str(request.url.path),
-                    request.method,
-                    json.dumps(details, separators=(",", ":"), sort_keys=True),
-                    _to_iso(_utc_now()),
-                ),
-            )
-            con.commit()
+        row = (
+            actor_user_id,
+            event_type,
+            result,
+            getattr(request.state, "request_id", None),
+            str(request.url.path),
+            request.method,
+            admin_db.canonical_json(details),
+            _to_iso(_utc_now()),
+        )
     except Exception:
+        logger.exception("Failed to build audit row (event_type=%s)", event_type)
+        return
+    if not _audit_is_deferrable(event_type, result):
+        _write_audit_rows([row])
         return
+    _ensure_audit_writer()
+    try:
+        _AUDIT_QUEUE.put_nowait(row)
+    except queue.Full:
+        _write_audit_rows([row])
 
 
 def audit_event(
@@ -521,29 +753,10 @@ def login_redirect(request: Request, next_path: str | None = None) -> RedirectRe
     state_cookie = _build_signed_state_cookie(next_path=next_path)
     state_payload = _parse_signed_state_cookie(state_cookie)
 
-    query = urllib.parse.urlencode(
-        {
-            "client_id": cfg.client_id,
-            "redirect_uri": cfg.redirect_uri,
-            "response_type": "code",
-            "scope": "openid email profile",
-            "state": state_payload["state"],
-            "nonce": state_payload["nonce"],
-            "access_type": "offline",
-            "prompt": "select_account",
-        }
-    )
-    response = RedirectResponse(url=f"{cfg.auth_url}?{query}", status_code=302)
-    response.set_cookie(
-        key=cfg.state_cookie_name,
-        value=state_cookie,
-        max_age=STATE_COOKIE_MAX_AGE_SECONDS,
-        secure=cfg.cookie_secure,
-        httponly=True,
-        samesite=cfg.cookie_samesite,
-        path="/",
-        domain=cfg.cookie_domain,
-    )
+    # state and nonce are base64url tokens, so they need no quoting.
+    url = f"{cfg.auth_request_prefix}&state={state_payload['state']}&nonce={state_payload['nonce']}"
+    response = RedirectResponse(url=url, status_code=302)
+    response.set_cookie(key=cfg.state_cookie_name, value=state_cookie, **cfg.state_cookie_kwargs)
     _audit(request, event_type="auth.login.start", result="success", actor_user_id=None, details={"provider": cfg.provider})
     return response
 
@@ -593,13 +806,14 @@ def auth_callback(request: Request, code: str, state: str) -> RedirectResponse:
         raise HTTPException(status_code=401, detail={"code": "auth_failed", "message": "Missing identity claims", "details": {}})
 
     with admin_db.connection_scope() as con:
-        if not _allowlist_match(
+        lookup = _login_lookup(
             con,
             provider=cfg.provider,
             issuer=cfg.issuer,
             provider_sub=provider_sub,
             email_norm=email_norm,
-        ):
+        )
+        if not lookup["allowlisted"]:
             con.commit()
             _audit(
                 request,
@@ -619,6 +833,7 @@ def auth_callback(request: Request, code: str, state: str) -> RedirectResponse:
             display_name=display_name,
             email_verified=email_verified,
             claims=claims,
+            lookup=lookup,
         )
         if user["status"] != "active":
             con.commit()
@@ -637,11 +852,7 @@ def auth_callback(request: Request, code: str, state: str) -> RedirectResponse:
     response = RedirectResponse(url=str(payload.get("next") or cfg.success_redirect), status_code=302)
     _set_session_cookie(response, session["session_id"])
     _set_csrf_cookie(response, session["csrf_secret"])
-    response.delete_cookie(
-        key=cfg.state_cookie_name,
-        path="/",
-        domain=cfg.cookie_domain,
-    )
+    response.delete_cookie(key=cfg.state_cookie_name, **cfg.delete_cookie_kwargs)
     _audit(
         request,
         event_type="auth.login.success",
@@ -654,110 +865,98 @@ def auth_callback(request: Request, code: str, state: str) -> RedirectResponse:
 
 def _set_session_cookie(response: Response, session_id: str) -> None:
     cfg = get_config()
-    response.set_cookie(
-        key=cfg.session_cookie_name,
-        value=session_id,
-        max_age=cfg.session_ttl_hours * 3600,
-        secure=cfg.cookie_secure,
-        httponly=True,
-        samesite=cfg.cookie_samesite,
-        path="/",
-        domain=cfg.cookie_domain,
-    )
+    response.set_cookie(key=cfg.session_cookie_name, value=session_id, **cfg.session_cookie_kwargs)
 
 
 def _set_csrf_cookie(response: Response, csrf_secret: str) -> None:
     cfg = get_config()
-    response.set_cookie(
-        key=cfg.csrf_cookie_name,
-        value=csrf_secret,
-        max_age=cfg.session_ttl_hours * 3600,
-        secure=cfg.cookie_secure,
-        httponly=False,
-        samesite=cfg.cookie_samesite,
-        path="/",
-        domain=cfg.cookie_domain,
-    )
+    response.set_cookie(key=cfg.csrf_cookie_name, value=csrf_secret, **cfg.csrf_cookie_kwargs)
 
 
 def clear_auth_cookies(response: Response) -> None:
     cfg = get_config()
-    response.delete_cookie(key=cfg.session_cookie_name, path="/", domain=cfg.cookie_domain)
-    response.delete_cookie(key=cfg.csrf_cookie_name, path="/", domain=cfg.cookie_domain)
-
-
-def _fetch_session_context(request: Request, session_id: str) -> Optional[Dict[str, Any]]:
+    response.delete_cookie(key=cfg.session_cookie_name, **cfg.delete_cookie_kwargs)
+    response.delete_cookie(key=cfg.csrf_cookie_name, **cfg.delete_cookie_kwargs)
+
+
+_SQLITE_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+# User fields and roles ride along as scalar subqueries so one statement
+# returns the whole request context.
+_SESSION_TOUCH_COLUMNS = """
+  session_id,
+  user_id,
+  expires_at,
+  csrf_secret_hash,
+  (SELECT email_norm FROM users u WHERE u.user_id = sessions.user_id) AS email_norm,
+  (SELECT display_name FROM users u WHERE u.user_id = sessions.user_id) AS display_name,
+  (
+    SELECT group_concat(r.role_code, ',')
+    FROM user_roles ur
+    JOIN roles r ON r.role_id = ur.role_id
+    WHERE ur.user_id = sessions.user_id
+  ) AS roles_csv
+"""
+# Extends the idle timeout only for a session that is still valid for this
+# request, so validation and the touch are one write.
+_SESSION_TOUCH_SQL = """
+UPDATE sessions
+SET last_seen_at = :now, idle_expires_at = :idle_expires_at
+WHERE session_id = :session_id
+  AND revoked_at IS NULL
+  AND expires_at > :now
+  AND idle_expires_at > :now
+  AND user_id IN (SELECT user_id FROM users WHERE status = 'active')
+"""
+_SESSION_CONTEXT_SELECT_SQL = f"SELECT {_SESSION_TOUCH_COLUMNS} FROM sessions WHERE session_id = :session_id"
+
+
+@lru_cache(maxsize=4)
+def _session_touch_statements(bind_user_agent: bool, bind_ip_prefix: bool) -> tuple[str, str]:
+    """The touch UPDATE with and without RETURNING, carrying only the enabled binding checks."""
+    sql = _SESSION_TOUCH_SQL
+    if bind_user_agent:
+        sql += "  AND (user_agent_hash IS NULL OR user_agent_hash = :user_agent_hash)\n"
+    if bind_ip_prefix:
+        sql += "  AND (ip_prefix_hash IS NULL OR ip_prefix_hash IN (:ip_prefix_hash, :legacy_ip_prefix_hash))\n"
+    return f"{sql}RETURNING {_SESSION_TOUCH_COLUMNS}", sql
+
+
+def _touch_session(con: sqlite3.Connection, cfg: AuthConfig, params: Dict[str, Any]) -> Optional[sqlite3.Row]:
+    returning_sql, update_sql = _session_touch_statements(cfg.bind_user_agent, cfg.bind_ip_prefix)
+    if _SQLITE_HAS_RETURNING:
+        return con.execute(returning_sql, params).fetchone()
+    if con.execute(update_sql, params).rowcount != 1:
+        return None
+    return con.execute(_SESSION_CONTEXT_SELECT_SQL, params).fetchone()
+
+
+def _fetch_session_context(request: Request, session_id: str) -> Optional[SessionContext]:
     cfg = get_config()
-    now = _utc_now()
+    now_ts = int(time.time())
+    new_idle_exp = _epoch_iso(now_ts + cfg.session_idle_minutes * 60)
+    params = {"now": _epoch_iso(now_ts), "idle_expires_at": new_idle_exp, "session_id": session_id}
+    if cfg.bind_user_agent:
+        params["user_agent_hash"] = _hash_user_agent(request)
+    if cfg.bind_ip_prefix:
+        params["ip_prefix_hash"] = _hash_ip_prefix(request)
+        params["legacy_ip_prefix_hash"] = _hash_legacy_ip_prefix(request)
     with admin_db.connection_scope() as con:
-        row = con.execute(
-            """
-SELECT
-  s.session_id,
-  s.user_id,
-  s.expires_at,
-  s.idle_expires_at,
-  s.revoked_at,
-  s.csrf_secret_hash,
-  s.user_agent_hash,
-  s.ip_prefix_hash,
-  u.email_norm,
-  u.display_name,
-  u.status
-FROM sessions s
-JOIN users u ON u.user_id = s.user_id
-WHERE s.session_id = ?
-            """,
-            (session_id,),
-        ).fetchone()
-        if row is None:
-            return None
-        if row["revoked_at"] is not None:
-            return None
-        if str(row["status"]) != "active":
-            return None
-        expires_at = _parse_iso(str(row["expires_at"]))
-        idle_expires_at = _parse_iso(str(row["idle_expires_at"]))
-        if now >= expires_at or now >= idle_expires_at:
-            con.execute(
-                "UPDATE sessions SET revoked_at = ? WHERE session_id = ?",
-                (_to_iso(now), session_id),
-            )
-            con.commit()
-            return None
-        if cfg.bind_user_agent and row["user_agent_hash"]:
-            if str(row["user_agent_hash"]) != _hash_user_agent(request):
-                return None
-        if cfg.bind_ip_prefix and row["ip_prefix_hash"]:
-            if str(row["ip_prefix_hash"]) != _hash_ip_prefix(request):
-                return None
-
-        role_rows = con.execute(
-            """
-SELECT r.role_code
-FROM user_roles ur
-JOIN roles r ON r.role_id = ur.role_id
-WHERE ur.user_id = ?
-            """,
-            (int(row["user_id"]),),
-        ).fetchall()
-        roles: Set[str] = {str(item["role_code"]) for item in role_rows}
-        new_idle_exp = _to_iso(now + dt.timedelta(minutes=cfg.session_idle_minutes))
-        con.execute(
-            "UPDATE sessions SET last_seen_at = ?, idle_expires_at = ? WHERE session_id = ?",
-            (_to_iso(now), new_idle_exp, session_id),
-        )
+        row = _touch_session(con, cfg, params)
         con.commit()
-        return {
-            "session_id": str(row["session_id"]),
-            "user_id": int(row["user_id"]),
-            "email": str(row["email_norm"]),
-            "display_name": str(row["display_name"] or row["email_norm"]),
-            "roles": roles,
-            "csrf_hash": str(row["csrf_secret_hash"]),
-            "expires_at": str(row["expires_at"]),
-            "idle_expires_at": new_idle_exp,
-        }
+    if row is None:
+        return None
+    roles = frozenset(row["roles_csv"].split(",")) if row["roles_csv"] else frozenset()
+    return SessionContext(
+        session_id=str(row["session_id"]),
+        user_id=int(row["user_id"]),
+        email=str(row["email_norm"]),
+        display_name=str(row["display_name"] or row["email_norm"]),
+        roles=roles,
+        roles_sorted=tuple(sorted(roles)),
+        csrf_hash=str(row["csrf_secret_hash"]),
+        expires_at=str(row["expires_at"]),
+        idle_expires_at=new_idle_exp,
+    )
 
 
 def attach_auth_context(request: Request) -> None:
@@ -776,7 +975,7 @@ def attach_auth_context(request: Request) -> None:
     request.state.auth_user = context
 
 
-def require_authenticated(request: Request) -> Dict[str, Any]:
+def require_authenticated(request: Request) -> SessionContext:
     if not is_enabled():
         raise HTTPException(status_code=404, detail={"code": "not_found", "message": "Auth is disabled", "details": {}})
     context = getattr(request.state, "auth_user", None)
@@ -786,34 +985,45 @@ def require_authenticated(request: Request) -> Dict[str, Any]:
     return context
 
 
-def require_admin(request: Request) -> Dict[str, Any]:
+def require_admin(request: Request) -> SessionContext:
     context = require_authenticated(request)
-    if "admin" not in set(context.get("roles", [])):
+    if "admin" not in context.roles:
         _audit(
             request,
             event_type="auth.access.denied",
             result="deny",
-            actor_user_id=int(context["user_id"]),
+            actor_user_id=context.user_id,
             details={"reason": "missing_admin_role"},
         )
         raise HTTPException(status_code=403, detail={"code": "forbidden", "message": "Admin access required", "details": {}})
     return context
 
 
-def enforce_csrf(request: Request, context: Dict[str, Any]) -> None:
+def enforce_csrf(request: Request, context: SessionContext) -> None:
     cfg = get_config()
     if not cfg.csrf_enable:
         return
-    if request.method.upper() in {"GET", "HEAD", "OPTIONS"}:
+    if request.method.upper() in _CSRF_SAFE_METHODS:
         return
     token_header = request.headers.get("x-csrf-token", "")
     token_cookie = request.cookies.get(cfg.csrf_cookie_name, "")
     if not token_header or not token_cookie:
-        raise HTTPException(status_code=403, detail={"code": "csrf_failed", "message": "Missing CSRF token", "details": {}})
+        raise _csrf_denied(request, context, reason="missing_token", message="Missing CSRF token")
     if not hmac.compare_digest(token_header, token_cookie):
-        raise HTTPException(status_code=403, detail={"code": "csrf_failed", "message": "CSRF token mismatch", "details": {}})
-    if not hmac.compare_digest(_sha256_hex(token_header), str(context.get("csrf_hash", ""))):
-        raise HTTPException(status_code=403, detail={"code": "csrf_failed", "message": "Invalid CSRF token", "details": {}})
+        raise _csrf_denied(request, context, reason="token_mismatch", message="CSRF token mismatch")
+    # Memoized like the UA/IP hashes: handlers that call enforce_csrf() after
+    # a shared dependency already did shouldn't hash the token again.
+    token_hash = getattr(request.state, "auth_csrf_token_hash", None)
+    if token_hash is None:
+        token_hash = _sha256_hex(token_header)
+        request.state.auth_csrf_token_hash = token_hash
+    if not hmac.compare_digest(token_hash, context.csrf_hash):
+        raise _csrf_denied(request, context, reason="invalid_token", message="Invalid CSRF token")
+
+
+def _csrf_denied(request: Request, context: SessionContext, *, reason: str, message: str) -> HTTPException:
+    _audit(request, event_type="auth.csrf.denied", result="deny", actor_user_id=context.user_id, details={"reason": reason})
+    return HTTPException(status_code=403, detail={"code": "csrf_failed", "message": message, "details": {}})
 
 
 def logout(request: Request) -> Response:
@@ -822,14 +1032,14 @@ def logout(request: Request) -> Response:
     with admin_db.connection_scope() as con:
         con.execute(
             "UPDATE sessions SET revoked_at = ? WHERE session_id = ?",
-            (_to_iso(_utc_now()), str(context["session_id"])),
+            (_to_iso(_utc_now()), context.session_id),
         )
         con.commit()
     _audit(
         request,
         event_type="auth.logout",
         result="success",
-        actor_user_id=int(context["user_id"]),
+        actor_user_id=context.user_id,
         details={},
     )
     response = Response(status_code=204)
@@ -851,26 +1061,25 @@ def auth_me(request: Request) -> Dict[str, Any]:
     return {
         "auth_enabled": True,
         "authenticated": True,
-        "user": {
-            "user_id": int(context["user_id"]),
-            "email": str(context["email"]),
-            "display_name": str(context["display_name"]),
-            "roles": sorted(set(context.get("roles", []))),
-        },
+        "user": context.to_public_dict(),
         "session": {
-            "expires_at": str(context["expires_at"]),
-            "idle_expires_at": str(context["idle_expires_at"]),
+            "expires_at": context.expires_at,
+            "idle_expires_at": context.idle_expires_at,
         },
         "csrf": {"cookie_name": cfg.csrf_cookie_name, "header_name": "X-CSRF-Token"},
     }
 
 
-def auth_runtime_status() -> Dict[str, Any]:
+@lru_cache(maxsize=1)
+def auth_runtime_status() -> Mapping[str, Any]:
+    # Built once per AuthConfig and shared by every status probe, so hand out a read-only view.
     cfg = get_config()
-    return {
-        "enabled": cfg.enabled,
-        "provider": cfg.provider,
-        "issuer": cfg.issuer,
-        "redirect_uri": cfg.redirect_uri,
-        "admin_db_path": admin_db.get_admin_db_path_str(),
-    }
+    return MappingProxyType(
+        {
+            "enabled": cfg.enabled,
+            "provider": cfg.provider,
+            "issuer": cfg.issuer,
+            "redirect_uri": cfg.redirect_uri,
+            "admin_db_path": admin_db.get_admin_db_path_str(),
+        }
+    )
@@ -1,15 +1,18 @@
 import os
+import re
 import threading
 import time
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from contextlib import contextmanager
-from typing import Any, Iterator
+from typing import Any
 
 import duckdb
 
+from . import admin_db
 
-ROOT_DIR = Path(__file__).resolve().parents[3]
+
+ROOT_DIR = admin_db.root_dir()
 DEFAULT_STATE_DIR = Path(
     os.getenv("SPACEGATE_STATE_DIR") or os.getenv("SPACEGATE_DATA_DIR") or ROOT_DIR / "data"
 )
@@ -23,6 +26,11 @@ DEFAULT_DB_POOL_SIZE = os.getenv("SPACEGATE_API_DB_POOL_SIZE", "").strip()
 DEFAULT_DB_ACQUIRE_TIMEOUT_SECONDS = os.getenv(
     "SPACEGATE_API_DB_ACQUIRE_TIMEOUT_SECONDS", "30"
 ).strip()
+DEFAULT_DB_STAT_INTERVAL_SECONDS = os.getenv(
+    "SPACEGATE_API_DB_STAT_INTERVAL_SECONDS", "5"
+).strip()
+DEFAULT_DB_WORKER_THREADS = os.getenv("SPACEGATE_API_DB_WORKER_THREADS", "").strip()
+DB_PREWARM = admin_db.parse_env_bool(os.getenv("SPACEGATE_API_DB_PREWARM"), default=False)
 
 
 def _positive_int(value: str) -> int:
@@ -48,6 +56,12 @@ DB_POOL_SIZE = _positive_int(DEFAULT_DB_POOL_SIZE)
 DB_ACQUIRE_TIMEOUT_SECONDS = _positive_float(
     DEFAULT_DB_ACQUIRE_TIMEOUT_SECONDS, 30.0
 )
+# Threads for the async read endpoints; matches Starlette's default threadpool
+# size but is a separate limiter, so DuckDB-bound requests cannot starve the
+# remaining sync endpoints.
+DB_WORKER_THREADS = _positive_int(DEFAULT_DB_WORKER_THREADS) or 40
+# 0 disables the window and stats the served DB on every checkout.
+DB_STAT_INTERVAL_SECONDS = _positive_float(DEFAULT_DB_STAT_INTERVAL_SECONDS, 0.0)
 _CONNECTION_SEMAPHORE = (
     threading.BoundedSemaphore(DB_MAX_CONCURRENT_CONNECTIONS)
     if DB_MAX_CONCURRENT_CONNECTIONS and not DB_POOL_SIZE
@@ -59,17 +73,69 @@ class DatabaseUnavailable(RuntimeError):
     pass
 
 
+# One shared message, deliberately without the path: the 503 handler echoes it
+# to clients as details.reason. With no per-path text there is nothing to cache
+# per path. Exception instances are not reused: a shared one would pile up
+# __traceback__/__context__ from every failing request.
+_DATABASE_NOT_FOUND = "Database not found"
+
+
+@lru_cache(maxsize=None)
 def get_db_path() -> str:
+    # Read once: every connection open and fingerprint check asks for it.
     return os.getenv("SPACEGATE_DB_PATH", DEFAULT_DB_PATH)
 
 
+def clear_caches() -> None:
+    """Drop cached lookups and the shared connection so tests can re-point the DB."""
+    global _FINGERPRINT_CACHE, _PARENT
+
+    get_db_path.cache_clear()
+    _FINGERPRINT_CACHE = None
+    stale = None
+    with _PARENT_LOCK:
+        if _PARENT is not None:
+            stale = _retire_parent_locked(_PARENT)
+        _PARENT = None
+    if stale is not None:
+        stale.close()
+
+
+_FINGERPRINT_CACHE: tuple[float, tuple[str, int, int, int, int]] | None = None
+
+
 def _database_fingerprint() -> tuple[str, int, int, int, int]:
+    """Return the served DB identity, re-stat'ing at most once per stat interval.
+
+    A publish swaps served/current, so a new build is picked up within
+    DB_STAT_INTERVAL_SECONDS. A missing database is never cached.
+    """
+    global _FINGERPRINT_CACHE
+
+    now = time.monotonic()
+    cached = _FINGERPRINT_CACHE
+    if cached is not None and now - cached[0] < DB_STAT_INTERVAL_SECONDS:
+        return cached[1]
+    fingerprint = _stat_database()
+    _FINGERPRINT_CACHE = (now, fingerprint)
+    return fingerprint
+
+
+def served_build_key() -> tuple[str, int, int, int, int] | None:
+    """Identity of the served build from the cached stat, or None if it is missing."""
+    try:
+        return _database_fingerprint()
+    except DatabaseUnavailable:
+        return None
+
+
+def _stat_database() -> tuple[str, int, int, int, int]:
     path = Path(get_db_path())
     try:
         resolved = path.resolve(strict=True)
         info = resolved.stat()
     except FileNotFoundError as exc:
-        raise DatabaseUnavailable("Database not found") from exc
+        raise DatabaseUnavailable(_DATABASE_NOT_FOUND) from exc
     return (
         str(resolved),
         int(info.st_dev),
@@ -79,32 +145,253 @@ def _database_fingerprint() -> tuple[str, int, int, int, int]:
     )
 
 
+_MEMORY_UNITS = {
+    "": 1,
+    "b": 1,
+    "kb": 1000,
+    "mb": 1000**2,
+    "gb": 1000**3,
+    "tb": 1000**4,
+    "kib": 1 << 10,
+    "mib": 1 << 20,
+    "gib": 1 << 30,
+    "tib": 1 << 40,
+}
+_MEMORY_LIMIT_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([a-z]*)\s*$", re.IGNORECASE)
+
+
+def _memory_limit_bytes(value: str) -> int:
+    """Parse a DuckDB memory_limit string such as '6GB' or '512MiB'; 0 if unknown."""
+    match = _MEMORY_LIMIT_RE.match(value or "")
+    if not match:
+        return 0
+    unit = _MEMORY_UNITS.get(match.group(2).lower())
+    if unit is None:
+        return 0
+    return int(float(match.group(1)) * unit)
+
+
+def _duckdb_threads(memory_limit: str, threads: str) -> int:
+    """Thread count to SET, or 0 to keep DuckDB's default.
+
+    DuckDB's memory cap is shared by per-thread operator state, so allow
+    roughly one thread per GiB of memory_limit and never more than the host
+    has cores.
+    """
+    configured = _positive_int(threads)
+    cpu_count = os.cpu_count() or 1
+    resolved = configured
+    memory_bytes = _memory_limit_bytes(memory_limit)
+    if memory_bytes:
+        resolved = min(resolved or cpu_count, max(1, memory_bytes >> 30))
+    if not resolved:
+        return 0
+    resolved = min(resolved, cpu_count)
+    if not configured and resolved == cpu_count:
+        return 0
+    return resolved
+
+
+def _runtime_limit_config(memory_limit: str, threads: str) -> dict[str, Any]:
+    config: dict[str, Any] = {}
+    if memory_limit:
+        config["memory_limit"] = memory_limit
+    thread_count = _duckdb_threads(memory_limit, threads)
+    if thread_count:
+        config["threads"] = thread_count
+    return config
+
+
+def _runtime_limit_statements(config: dict[str, Any]) -> tuple[str, ...]:
+    statements = []
+    if "memory_limit" in config:
+        statements.append(f"SET memory_limit='{config['memory_limit']}'")
+    if "threads" in config:
+        statements.append(f"SET threads TO {config['threads']}")
+    return tuple(statements)
+
+
+# Built once at import from the environment. The config dict is passed to
+# duckdb.connect() so limits are in place before the first query; the SET
+# statements are only the fallback when DuckDB rejects a value at connect.
+_RUNTIME_LIMIT_CONFIG = _runtime_limit_config(
+    DEFAULT_DUCKDB_MEMORY_LIMIT, DEFAULT_DUCKDB_THREADS
+)
+_RUNTIME_LIMIT_STATEMENTS = _runtime_limit_statements(_RUNTIME_LIMIT_CONFIG)
+_RUNTIME_LIMIT_SQL = "; ".join(_RUNTIME_LIMIT_STATEMENTS)
+
+
 def _apply_runtime_limits(con: duckdb.DuckDBPyConnection) -> None:
     # Use explicit API caps so concurrent search traffic cannot consume the full host.
-    if DEFAULT_DUCKDB_MEMORY_LIMIT:
-        try:
-            con.execute(f"SET memory_limit='{DEFAULT_DUCKDB_MEMORY_LIMIT}'")
-        except Exception:
-            pass
-    if DEFAULT_DUCKDB_THREADS:
+    if not _RUNTIME_LIMIT_SQL:
+        return
+    try:
+        con.execute(_RUNTIME_LIMIT_SQL)
+        return
+    except Exception:
+        pass
+    # One bad setting aborts the batch; retry individually so the valid one still applies.
+    for statement in _RUNTIME_LIMIT_STATEMENTS:
         try:
-            threads = int(DEFAULT_DUCKDB_THREADS)
-            if threads >= 1:
-                con.execute(f"SET threads TO {threads}")
+            con.execute(statement)
         except Exception:
             pass
 
 
 def _open_connection(path: str) -> duckdb.DuckDBPyConnection:
-    if not os.path.exists(path):
-        raise DatabaseUnavailable("Database not found")
+    # Callers pass a path _database_fingerprint() just stat'd, so only check
+    # for a vanished file when the open actually fails.
+    try:
+        return duckdb.connect(path, read_only=True, config=_RUNTIME_LIMIT_CONFIG)
+    except duckdb.IOException as exc:
+        if not os.path.exists(path):
+            raise DatabaseUnavailable(_DATABASE_NOT_FOUND) from exc
+        raise
+    except duckdb.Error:
+        if not _RUNTIME_LIMIT_CONFIG:
+            raise
+    # A malformed limit fails the whole connect; open without the config and
+    # fall back to SET statements so the valid limit still takes effect.
     con = duckdb.connect(path, read_only=True)
     _apply_runtime_limits(con)
     return con
 
 
+class _SharedParent:
+    """A build's shared read-only connection and how many of its cursors are lent out."""
+
+    __slots__ = ("fingerprint", "connection", "lent", "retired")
+
+    def __init__(
+        self,
+        fingerprint: tuple[str, int, int, int, int],
+        connection: duckdb.DuckDBPyConnection,
+    ) -> None:
+        self.fingerprint = fingerprint
+        self.connection = connection
+        self.lent = 0
+        self.retired = False
+
+
+_PARENT_LOCK = threading.Lock()
+_PARENT: _SharedParent | None = None
+
+
+def _retire_parent_locked(parent: _SharedParent) -> duckdb.DuckDBPyConnection | None:
+    """Mark a superseded parent; return its connection for closing once nothing is lent out."""
+    parent.retired = True
+    return parent.connection if parent.lent == 0 else None
+
+
+def _lend_cursor(
+    fingerprint: tuple[str, int, int, int, int],
+) -> tuple[_SharedParent, duckdb.DuckDBPyConnection]:
+    """Lend a cursor on the current build's shared read-only connection, with its parent.
+
+    Opening a DuckDB database loads the catalog and reapplies runtime limits;
+    a cursor off an open parent skips both. A build swap changes the
+    fingerprint and opens a fresh parent. The stale parent is retired and
+    closed as soon as no cursor lent from it is still serving a request
+    (closing it earlier would close those cursors too), so the superseded
+    build's file is not held open by idle worker threads.
+    """
+    global _PARENT
+
+    stale: duckdb.DuckDBPyConnection | None = None
+    with _PARENT_LOCK:
+        if _PARENT is None or _PARENT.fingerprint != fingerprint:
+            fresh = _SharedParent(fingerprint, _open_connection(fingerprint[0]))
+            if _PARENT is not None:
+                stale = _retire_parent_locked(_PARENT)
+            _PARENT = fresh
+        parent = _PARENT
+        cursor = parent.connection.cursor()
+        parent.lent += 1
+    if stale is not None:
+        stale.close()
+    return parent, cursor
+
+
+def _relend(parent: _SharedParent) -> bool:
+    with _PARENT_LOCK:
+        if parent.retired:
+            return False
+        parent.lent += 1
+        return True
+
+
+def _return_cursor(parent: _SharedParent) -> None:
+    stale: duckdb.DuckDBPyConnection | None = None
+    with _PARENT_LOCK:
+        parent.lent -= 1
+        if parent.retired and parent.lent == 0:
+            stale = parent.connection
+    if stale is not None:
+        stale.close()
+
+
+_THREAD_CURSOR = threading.local()
+
+
 def get_connection() -> duckdb.DuckDBPyConnection:
-    return _open_connection(get_db_path())
+    """Return a read cursor for the current build; release it with release_connection().
+
+    Each worker thread keeps one cursor and lends it out again on the next
+    call, so a request costs no cursor setup. A nested call while that
+    cursor is lent out gets a fresh cursor, which release_connection()
+    closes.
+    """
+    fingerprint = _database_fingerprint()
+    state = _THREAD_CURSOR
+    cursor = getattr(state, "cursor", None)
+    busy = cursor is not None and state.busy
+    if cursor is not None and not busy and state.parent.fingerprint == fingerprint and _relend(state.parent):
+        state.busy = True
+        return cursor
+    parent, fresh = _lend_cursor(fingerprint)
+    if busy:
+        nested = getattr(state, "nested", None)
+        if nested is None:
+            nested = state.nested = {}
+        nested[id(fresh)] = parent
+        return fresh
+    if cursor is not None:
+        # Idle cursor on a superseded (possibly already closed) parent.
+        cursor.close()
+    state.cursor = fresh
+    state.parent = parent
+    state.busy = True
+    return fresh
+
+
+def release_connection(con: duckdb.DuckDBPyConnection) -> None:
+    state = _THREAD_CURSOR
+    if con is getattr(state, "cursor", None):
+        state.busy = False
+        _return_cursor(state.parent)
+        return
+    parent = getattr(state, "nested", {}).pop(id(con), None)
+    con.close()
+    if parent is not None:
+        _return_cursor(parent)
+
+
+def prewarm() -> bool:
+    """Open the shared parent connection and run one query before traffic arrives.
+
+    Moves catalog load and the first-query setup off the first request.
+    Returns False when the served database is not there yet.
+    """
+    try:
+        parent, cursor = _lend_cursor(_database_fingerprint())
+    except DatabaseUnavailable:
+        return False
+    try:
+        cursor.execute("SELECT 1").fetchone()
+    finally:
+        cursor.close()
+        _return_cursor(parent)
+    return True
 
 
 @dataclass
@@ -290,31 +577,59 @@ def runtime_stats() -> dict[str, Any]:
     }
 
 
-@contextmanager
-def connection_scope() -> Iterator[duckdb.DuckDBPyConnection]:
-    if _CONNECTION_POOL is not None:
-        item = _CONNECTION_POOL.checkout()
+class ConnectionScope:
+    """Borrow a read connection for one ``with`` block.
+
+    A plain class rather than ``@contextmanager``: every API request enters
+    one, and this skips the per-entry generator and wrapper objects.
+    """
+
+    __slots__ = ("con", "_item", "_acquired")
+
+    def __init__(self) -> None:
+        self.con: duckdb.DuckDBPyConnection | None = None
+        self._item: _PooledConnection | None = None
+        self._acquired = False
+
+    def __enter__(self) -> duckdb.DuckDBPyConnection:
+        if _CONNECTION_POOL is not None:
+            self._item = _CONNECTION_POOL.checkout()
+            self.con = self._item.connection
+            return self.con
+
+        if _CONNECTION_SEMAPHORE is not None:
+            self._acquired = _CONNECTION_SEMAPHORE.acquire(
+                timeout=DB_ACQUIRE_TIMEOUT_SECONDS
+            )
+            if not self._acquired:
+                raise DatabaseUnavailable(
+                    "Database concurrency limit reached; retry the request"
+                )
+        try:
+            self.con = get_connection()
+        except BaseException:
+            self._release_capacity()
+            raise
+        return self.con
+
+    def __exit__(self, *exc_info: Any) -> None:
+        if self._item is not None:
+            item, self._item, self.con = self._item, None, None
+            if _CONNECTION_POOL is not None:
+                _CONNECTION_POOL.release(item)
+            return
+        con, self.con = self.con, None
         try:
-            yield item.connection
+            if con is not None:
+                release_connection(con)
         finally:
-            _CONNECTION_POOL.release(item)
-        return
+            self._release_capacity()
 
-    acquired = False
-    if _CONNECTION_SEMAPHORE is not None:
-        acquired = _CONNECTION_SEMAPHORE.acquire(
-            timeout=DB_ACQUIRE_TIMEOUT_SECONDS
-        )
-        if not acquired:
-            raise DatabaseUnavailable(
-                "Database concurrency limit reached; retry the request"
-            )
-    con = None
-    try:
-        con = get_connection()
-        yield con
-    finally:
-        if con is not None:
-            con.close()
-        if acquired and _CONNECTION_SEMAPHORE is not None:
+    def _release_capacity(self) -> None:
+        if self._acquired and _CONNECTION_SEMAPHORE is not None:
             _CONNECTION_SEMAPHORE.release()
+        self._acquired = False
+
+
+def connection_scope() -> ConnectionScope:
+    return ConnectionScope()
@@ -3,6 +3,7 @@ from __future__ import annotations
 import copy
 import datetime
 import errno
+import functools
 import gzip
 import grp
 import hashlib
@@ -22,7 +23,10 @@ from pathlib import Path
 from typing import Any, Dict, List, Optional
 from urllib.parse import quote
 
+import anyio
+import anyio.to_thread
 import duckdb
+import orjson
 from fastapi import APIRouter, FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse, HTMLResponse, JSONResponse, PlainTextResponse
@@ -92,8 +96,40 @@ from .utils import (
 )
 
 
-app = FastAPI(title="Spacegate API", version="0.1")
-ROOT_DIR = Path(__file__).resolve().parents[3]
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson.
+
+    Same compact UTF-8 output as JSONResponse; non-finite floats become
+    null instead of failing the response.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+
+app = FastAPI(title="Spacegate API", version="0.1", default_response_class=FastJSONResponse)
+_DB_LIMITER = anyio.CapacityLimiter(db.DB_WORKER_THREADS)
+
+
+def _db_endpoint(route):
+    """Register a sync DuckDB endpoint as async, running it on the DB worker threads.
+
+    The module keeps the plain sync function, so callers and tests can
+    still invoke it directly.
+    """
+
+    def register(func):
+        @functools.wraps(func)
+        async def endpoint(*args, **kwargs):
+            return await anyio.to_thread.run_sync(functools.partial(func, *args, **kwargs), limiter=_DB_LIMITER)
+
+        route(endpoint)
+        return func
+
+    return register
+
+
+ROOT_DIR = db.ROOT_DIR
 SCORE_COOLNESS_SCRIPT = ROOT_DIR / "scripts" / "score_coolness.py"
 SUPPORTED_SEARCH_SORTS = {
     "match",
@@ -274,6 +310,9 @@ SIMULATION_SCENE_CACHE_MAX_ITEMS = 256
 SIMULATION_SCENE_ARTIFACT_VERSION = "simulation_scene_artifact_v8"
 _SIMULATION_SCENE_CACHE_LOCK = threading.Lock()
 _SIMULATION_SCENE_CACHE: "OrderedDict[tuple[str, int], Dict[str, Any]]" = OrderedDict()
+COOLNESS_PREVIEW_CACHE_MAX_ITEMS = 32
+_COOLNESS_PREVIEW_CACHE_LOCK = threading.Lock()
+_COOLNESS_PREVIEW_CACHE: "OrderedDict[tuple[Any, ...], List[Dict[str, Any]]]" = OrderedDict()
 _SIMULATION_SCENE_INFLIGHT_LOCK = threading.Lock()
 _SIMULATION_SCENE_INFLIGHT: Dict[tuple[str, int], threading.Event] = {}
 SIMULATION_SCENE_INFLIGHT_WAIT_S = 45.0
@@ -289,7 +328,9 @@ _SIMULATION_SCENE_RUNTIME_CACHE_PRUNE_LOCK = threading.Lock()
 _SIMULATION_SCENE_RUNTIME_CACHE_LAST_PRUNE_TS = 0.0
 
 
+@functools.lru_cache(maxsize=1)
 def _state_dir() -> Path:
+    # Environment and served path are fixed for the process, like db.get_db_path().
     configured = os.getenv("SPACEGATE_STATE_DIR") or os.getenv("SPACEGATE_DATA_DIR")
     if configured:
         return Path(configured)
@@ -300,11 +341,28 @@ def _state_dir() -> Path:
     return ROOT_DIR / "data"
 
 
+SIDECAR_DB_PATH_CACHE_MAX_ITEMS = 32
+_SIDECAR_DB_PATHS: Dict[tuple[Any, str, str], str] = {}
+
+
+def _sidecar_db_path(build_key: Any, db_path: str, name: str) -> Optional[str]:
+    # Only hits are cached per served build: score_coolness can write disc.duckdb
+    # into the build that is already being served, so a miss must be re-checked.
+    key = (build_key, db_path, name)
+    cached = _SIDECAR_DB_PATHS.get(key)
+    if cached is not None:
+        return cached
+    candidate = Path(db_path).with_name(name)
+    if not candidate.exists():
+        return None
+    if len(_SIDECAR_DB_PATHS) >= SIDECAR_DB_PATH_CACHE_MAX_ITEMS:
+        _SIDECAR_DB_PATHS.clear()
+    _SIDECAR_DB_PATHS[key] = str(candidate)
+    return str(candidate)
+
+
 def _resolve_disc_db_path() -> Optional[str]:
-    candidate = Path(db.get_db_path()).with_name("disc.duckdb")
-    if candidate.exists():
-        return str(candidate)
-    return None
+    return _sidecar_db_path(db.served_build_key(), db.get_db_path(), "disc.duckdb")
 
 
 def _json_canonical(value: Any) -> str:
@@ -377,17 +435,11 @@ def _load_persisted_simulation_assumption_keys(
 
 
 def _resolve_arm_db_path() -> Optional[str]:
-    candidate = Path(db.get_db_path()).with_name("arm.duckdb")
-    if candidate.exists():
-        return str(candidate)
-    return None
+    return _sidecar_db_path(db.served_build_key(), db.get_db_path(), "arm.duckdb")
 
 
 def _resolve_canonical_hierarchy_db_path() -> Optional[str]:
-    candidate = Path(db.get_db_path()).with_name("canonical_hierarchy.duckdb")
-    if candidate.exists():
-        return str(candidate)
-    return None
+    return _sidecar_db_path(db.served_build_key(), db.get_db_path(), "canonical_hierarchy.duckdb")
 
 
 def _summarize_arm_star_evidence(star_evidence: Dict[int, Dict[str, Any]]) -> Dict[str, Any]:
@@ -6061,15 +6113,9 @@ def _admin_component_search_matches(
 
 def _actor_user_id_from_request(request: Request) -> Optional[int]:
     context = getattr(request.state, "auth_user", None)
-    if not isinstance(context, dict):
-        return None
-    value = context.get("user_id")
-    if value is None:
-        return None
-    try:
-        return int(value)
-    except (TypeError, ValueError):
+    if not isinstance(context, auth.SessionContext):
         return None
+    return context.user_id
 
 
 def _should_audit_systems_search(
@@ -6220,6 +6266,13 @@ def _audit_systems_search(
 @app.on_event("startup")
 def startup_checks():
     auth.initialize()
+    if db.DB_PREWARM:
+        db.prewarm()
+
+
+@app.on_event("shutdown")
+def shutdown_flush_audit_log():
+    auth.flush_audit_log()
 
 
 @app.middleware("http")
@@ -6265,7 +6318,7 @@ async def http_exception_handler(request: Request, exc: HTTPException):
         code = exc.detail if isinstance(exc.detail, str) else "bad_request"
         message = exc.detail if isinstance(exc.detail, str) else "Bad request"
         details = {}
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=exc.status_code,
         content={
             "error": {
@@ -6280,7 +6333,7 @@ async def http_exception_handler(request: Request, exc: HTTPException):
 
 @app.exception_handler(Exception)
 async def unhandled_exception_handler(request: Request, exc: Exception):
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=500,
         content={
             "error": {
@@ -6295,7 +6348,7 @@ async def unhandled_exception_handler(request: Request, exc: Exception):
 
 @app.exception_handler(DatabaseUnavailable)
 async def db_unavailable_handler(request: Request, exc: DatabaseUnavailable):
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=503,
         content={
             "error": {
@@ -6352,7 +6405,7 @@ def auth_me(request: Request):
     return auth.auth_me(request)
 
 
-@app.get("/api/v1/health")
+@_db_endpoint(app.get("/api/v1/health"))
 def health():
     return {
         "status": "ok",
@@ -6662,7 +6715,7 @@ def system_smart_tag_assignments(
         ) from exc
 
 
-@app.get("/api/v1/systems/search")
+@_db_endpoint(app.get("/api/v1/systems/search"))
 def systems_search(
     request: Request,
     q: Optional[str] = Query(default=None),
@@ -7586,7 +7639,7 @@ def projected_singleton_scene_seed(system_id: int):
     }
 
 
-@app.get("/api/v1/systems/{system_id}")
+@_db_endpoint(app.get("/api/v1/systems/{system_id}"))
 def system_detail(system_id: int, name_style: str = Query(default="public_full")):
     try:
         projection = public_read.connect()
@@ -7853,7 +7906,7 @@ def system_infrared_preview(
     return FileResponse(str(preview_path), media_type="image/png", headers=headers)
 
 
-@app.get("/api/v1/systems/by-key/{stable_object_key}")
+@_db_endpoint(app.get("/api/v1/systems/by-key/{stable_object_key}"))
 def system_detail_by_key(stable_object_key: str, name_style: str = Query(default="public_full")):
     disc_db_path = _resolve_disc_db_path()
     arm_db_path = _resolve_arm_db_path()
@@ -8162,10 +8215,52 @@ def _is_duckdb_lock_conflict(exc: Exception) -> bool:
     )
 
 
+def _query_coolness_preview_rows(disc_db_path: Path, sql: str, params: List[Any]) -> List[Dict[str, Any]]:
+    con = None
+    try:
+        con = duckdb.connect(str(disc_db_path), read_only=True)
+        cur = con.execute(sql, params)
+        cols = [d[0] for d in cur.description]
+        rows = [dict(zip(cols, row)) for row in cur.fetchall()]
+    except duckdb.Error as exc:
+        if _is_duckdb_lock_conflict(exc):
+            raise HTTPException(
+                status_code=409,
+                detail={
+                    "code": "conflict",
+                    "message": "Coolness preview is temporarily unavailable while scoring is writing outputs; retry in a few seconds",
+                    "details": {"error": str(exc), "disc_db_path": str(disc_db_path), "retryable": True},
+                },
+            )
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "code": "internal_error",
+                "message": "Failed to compute coolness diversity preview",
+                "details": {"error": str(exc), "disc_db_path": str(disc_db_path)},
+            },
+        )
+    except Exception as exc:
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "code": "internal_error",
+                "message": "Failed to compute coolness diversity preview",
+                "details": {"error": str(exc), "disc_db_path": str(disc_db_path)},
+            },
+        )
+    finally:
+        if con is not None:
+            con.close()
+    return rows
+
+
 def _coolness_preview_from_disc_db(weights: Dict[str, float], top_n: int) -> Dict[str, Any]:
     core_db_path = Path(db.get_db_path())
     disc_db_path = core_db_path.with_name("disc.duckdb")
-    if not disc_db_path.exists():
+    try:
+        disc_stat = disc_db_path.stat()
+    except FileNotFoundError:
         raise HTTPException(
             status_code=409,
             detail={
@@ -8212,42 +8307,20 @@ ORDER BY score_total DESC, system_id ASC
 LIMIT ?
     """
     params = [*subscore_params, *score_params, int(top_n)]
-    con = None
-    try:
-        con = duckdb.connect(str(disc_db_path), read_only=True)
-        cur = con.execute(sql, params)
-        cols = [d[0] for d in cur.description]
-        rows = [dict(zip(cols, row)) for row in cur.fetchall()]
-    except duckdb.Error as exc:
-        if _is_duckdb_lock_conflict(exc):
-            raise HTTPException(
-                status_code=409,
-                detail={
-                    "code": "conflict",
-                    "message": "Coolness preview is temporarily unavailable while scoring is writing outputs; retry in a few seconds",
-                    "details": {"error": str(exc), "disc_db_path": str(disc_db_path), "retryable": True},
-                },
-            )
-        raise HTTPException(
-            status_code=500,
-            detail={
-                "code": "internal_error",
-                "message": "Failed to compute coolness diversity preview",
-                "details": {"error": str(exc), "disc_db_path": str(disc_db_path)},
-            },
-        )
-    except Exception as exc:
-        raise HTTPException(
-            status_code=500,
-            detail={
-                "code": "internal_error",
-                "message": "Failed to compute coolness diversity preview",
-                "details": {"error": str(exc), "disc_db_path": str(disc_db_path)},
-            },
-        )
-    finally:
-        if con is not None:
-            con.close()
+    # disc.duckdb is rewritten in place by score_coolness, so a long-lived read
+    # handle would block the writer's file lock. Keep the per-request connect and
+    # instead reuse results while the file is unchanged.
+    cache_key = (str(disc_db_path), disc_stat.st_ino, disc_stat.st_size, disc_stat.st_mtime_ns, tuple(params))
+    with _COOLNESS_PREVIEW_CACHE_LOCK:
+        rows = _COOLNESS_PREVIEW_CACHE.get(cache_key)
+        if rows is not None:
+            _COOLNESS_PREVIEW_CACHE.move_to_end(cache_key)
+    if rows is None:
+        rows = _query_coolness_preview_rows(disc_db_path, sql, params)
+        with _COOLNESS_PREVIEW_CACHE_LOCK:
+            _COOLNESS_PREVIEW_CACHE[cache_key] = rows
+            while len(_COOLNESS_PREVIEW_CACHE) > COOLNESS_PREVIEW_CACHE_MAX_ITEMS:
+                _COOLNESS_PREVIEW_CACHE.popitem(last=False)
 
     spectral_counts: Dict[str, int] = {}
     with_planets = 0
@@ -9648,18 +9721,18 @@ def _write_agent_source_allowlist(doc: Dict[str, Any], *, backup_reason: str = "
     return _load_agent_source_allowlist()
 
 
-def _upsert_agent_source_allowlist_entry(payload: AgencySourceAllowlistEntryRequest, user: Dict[str, Any]) -> Dict[str, Any]:
+def _upsert_agent_source_allowlist_entry(payload: AgencySourceAllowlistEntryRequest, user: auth.SessionContext) -> Dict[str, Any]:
     doc = _load_agent_source_allowlist()
     entry = _normalize_allowlist_source(payload.dict())
     sources = [item for item in doc.get("sources", []) if item.get("domain") != entry["domain"]]
     sources.append(entry)
     doc["sources"] = sources
     doc["updated_at_utc"] = datetime.datetime.utcnow().replace(microsecond=0).isoformat() + "Z"
-    doc["updated_by"] = str(user.get("email_norm") or user.get("email") or user.get("user_id") or "admin")
+    doc["updated_by"] = str(user.email or user.user_id or "admin")
     return _write_agent_source_allowlist(doc, backup_reason=f"upsert_{entry['domain']}")
 
 
-def _delete_agent_source_allowlist_entry(domain: str, user: Dict[str, Any]) -> Dict[str, Any]:
+def _delete_agent_source_allowlist_entry(domain: str, user: auth.SessionContext) -> Dict[str, Any]:
     clean_domain = _normalize_allowlist_domain(domain)
     doc = _load_agent_source_allowlist()
     sources = [item for item in doc.get("sources", []) if item.get("domain") != clean_domain]
@@ -9667,11 +9740,11 @@ def _delete_agent_source_allowlist_entry(domain: str, user: Dict[str, Any]) -> D
         raise HTTPException(status_code=404, detail={"code": "not_found", "message": f"Allowlist source not found: {clean_domain}"})
     doc["sources"] = sources
     doc["updated_at_utc"] = datetime.datetime.utcnow().replace(microsecond=0).isoformat() + "Z"
-    doc["updated_by"] = str(user.get("email_norm") or user.get("email") or user.get("user_id") or "admin")
+    doc["updated_by"] = str(user.email or user.user_id or "admin")
     return _write_agent_source_allowlist(doc, backup_reason=f"delete_{clean_domain}")
 
 
-def _restore_agent_source_allowlist_default(user: Dict[str, Any]) -> Dict[str, Any]:
+def _restore_agent_source_allowlist_default(user: auth.SessionContext) -> Dict[str, Any]:
     _backup_agent_source_allowlist("restore_default")
     runtime_path = _agent_source_allowlist_runtime_path()
     try:
@@ -9681,7 +9754,7 @@ def _restore_agent_source_allowlist_default(user: Dict[str, Any]) -> Dict[str, A
     return _load_agent_source_allowlist()
 
 
-def _restore_agent_source_allowlist_version(version_id: str, user: Dict[str, Any]) -> Dict[str, Any]:
+def _restore_agent_source_allowlist_version(version_id: str, user: auth.SessionContext) -> Dict[str, Any]:
     clean_version_id = _safe_allowlist_version_id(version_id)
     source_path = _agent_source_allowlist_history_dir() / clean_version_id
     if not source_path.exists() or not source_path.is_file():
@@ -9689,7 +9762,7 @@ def _restore_agent_source_allowlist_version(version_id: str, user: Dict[str, Any
     raw = _read_agent_source_allowlist_json_file(source_path)
     doc = _normalize_agent_source_allowlist_doc(raw)
     doc["updated_at_utc"] = datetime.datetime.utcnow().replace(microsecond=0).isoformat() + "Z"
-    doc["updated_by"] = str(user.get("email_norm") or user.get("email") or user.get("user_id") or "admin")
+    doc["updated_by"] = str(user.email or user.user_id or "admin")
     return _write_agent_source_allowlist(doc, backup_reason=f"restore_{clean_version_id}")
 
 
@@ -10106,7 +10179,7 @@ LIMIT ?
     }
 
 
-def _seed_agency_portfolio(payload: AgencyPortfolioSeedRequest, user: Dict[str, Any]) -> Dict[str, Any]:
+def _seed_agency_portfolio(payload: AgencyPortfolioSeedRequest, user: auth.SessionContext) -> Dict[str, Any]:
     stable_key = str(payload.stable_object_key or "").strip()
     object_type = str(payload.object_type or "").strip().lower()
     display_name = str(payload.display_name or "").strip() or None
@@ -10124,8 +10197,8 @@ def _seed_agency_portfolio(payload: AgencyPortfolioSeedRequest, user: Dict[str,
     now = datetime.datetime.utcnow().replace(microsecond=0).isoformat() + "Z"
     dossier_id = f"dossier_{uuid.uuid4().hex}"
     journal_entry_id = f"journal_{uuid.uuid4().hex}"
-    user_id = int(user["user_id"])
-    actor_id = str(user.get("email") or user.get("user_id") or "admin")
+    user_id = user.user_id
+    actor_id = str(user.email or user.user_id or "admin")
     metadata = {
         "seed_source": source,
         "seeded_from_admin_v2": True,
@@ -11315,7 +11388,7 @@ def _runtime_diagnostics_payload(status: Dict[str, Any]) -> Dict[str, Any]:
             "config_sources": environment.get("config_sources") or {},
             "notes": environment.get("notes") or [],
         },
-        "auth": status.get("auth") or {},
+        "auth": dict(status.get("auth") or {}),
         "container_runtime": status.get("container_runtime") or {},
         "runtime_security": status.get("runtime_security") or {},
         "host_runtime": status.get("host_runtime") or {},
@@ -11346,7 +11419,7 @@ def _runtime_diagnostics_payload(status: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
-@admin_router.get("/status")
+@_db_endpoint(admin_router.get("/status"))
 def admin_status(request: Request):
     user = auth.require_admin(request)
     with db.connection_scope() as con:
@@ -11356,12 +11429,7 @@ def admin_status(request: Request):
         "build_id": build_id,
         "db_path": db.get_db_path(),
         "auth": auth.auth_runtime_status(),
-        "user": {
-            "user_id": user["user_id"],
-            "email": user["email"],
-            "display_name": user["display_name"],
-            "roles": sorted(set(user.get("roles", []))),
-        },
+        "user": user.to_public_dict(),
         "time_utc": datetime.datetime.utcnow().replace(microsecond=0).isoformat() + "Z",
     }
 
@@ -11539,7 +11607,7 @@ def admin_agency_source_allowlist_upsert(request: Request, payload: AgencySource
         request,
         event_type="admin.agency.source_allowlist.upsert",
         result="success",
-        actor_user_id=int(user["user_id"]),
+        actor_user_id=user.user_id,
         details={
             "domain": _normalize_allowlist_domain(payload.domain),
             "tier": payload.tier,
@@ -11559,7 +11627,7 @@ def admin_agency_source_allowlist_restore_default(request: Request):
         request,
         event_type="admin.agency.source_allowlist.restore_default",
         result="success",
-        actor_user_id=int(user["user_id"]),
+        actor_user_id=user.user_id,
         details={"source": "spacegate_default"},
     )
     return updated
@@ -11575,7 +11643,7 @@ def admin_agency_source_allowlist_restore_version(request: Request, payload: Age
         request,
         event_type="admin.agency.source_allowlist.restore_version",
         result="success",
-        actor_user_id=int(user["user_id"]),
+        actor_user_id=user.user_id,
         details={"version_id": clean_version_id},
     )
     return updated
@@ -11591,7 +11659,7 @@ def admin_agency_source_allowlist_delete(request: Request, domain: str):
         request,
         event_type="admin.agency.source_allowlist.delete",
         result="success",
-        actor_user_id=int(user["user_id"]),
+        actor_user_id=user.user_id,
         details={"domain": clean_domain},
     )
     return updated
@@ -11635,7 +11703,7 @@ def admin_agency_portfolio_seed(request: Request, payload: AgencyPortfolioSeedRe
         request,
         event_type="admin.agency.portfolio.seed",
         result="success",
-        actor_user_id=int(user["user_id"]),
+        actor_user_id=user.user_id,
         details={
             "dossier_id": detail.get("dossier", {}).get("dossier_id"),
             "stable_object_key": payload.stable_object_key,
@@ -11929,7 +11997,7 @@ def admin_coolness_preview(request: Request, payload: CoolnessPreviewRequest):
         request,
         event_type="admin.coolness.preview",
         result="success",
-        actor_user_id=int(user["user_id"]),
+        actor_user_id=user.user_id,
         details={
             "profile_id": candidate.get("profile_id"),
             "profile_version": candidate.get("profile_version"),
@@ -11965,7 +12033,7 @@ def admin_inference_endpoint_create(request: Request, payload: InferenceEndpoint
             request,
             event_type="admin.inference.endpoint.create",
             result="deny",
-            actor_user_id=int(user["user_id"]),
+            actor_user_id=user.user_id,
             details={"message": str(exc), "endpoint_key": payload.endpoint_key},
         )
         raise HTTPException(
@@ -11976,7 +12044,7 @@ def admin_inference_endpoint_create(request: Request, payload: InferenceEndpoint
         request,
         event_type="admin.inference.endpoint.create",
         result="success",
-        actor_user_id=int(user["user_id"]),
+        actor_user_id=user.user_id,
         details={"endpoint_id": endpoint["endpoint_id"], "endpoint_key": endpoint["endpoint_key"]},
     )
     return {"endpoint": endpoint}
@@ -12006,7 +12074,7 @@ def admin_inference_endpoint_update(
             request,
             event_type="admin.inference.endpoint.update",
             result="deny",
-            actor_user_id=int(user["user_id"]),
+            actor_user_id=user.user_id,
             details={"message": str(exc), "endpoint_id": endpoint_id},
         )
         raise HTTPException(
@@ -12017,7 +12085,7 @@ def admin_inference_endpoint_update(
         request,
         event_type="admin.inference.endpoint.update",
         result="success",
-        actor_user_id=int(user["user_id"]),
+        actor_user_id=user.user_id,
         details={"endpoint_id": endpoint["endpoint_id"], "endpoint_key": endpoint["endpoint_key"]},
     )
     return {"endpoint": endpoint}
@@ -12043,7 +12111,7 @@ def admin_inference_endpoint_delete(request: Request, endpoint_id: int):
         request,
         event_type="admin.inference.endpoint.delete",
         result="success",
-        actor_user_id=int(user["user_id"]),
+        actor_user_id=user.user_id,
         details={"endpoint_id": endpoint_id, "endpoint_key": endpoint.get("endpoint_key")},
     )
     return {"status": "deleted", "endpoint_id": endpoint_id}
@@ -12069,7 +12137,7 @@ def admin_inference_endpoint_poll_models(request: Request, endpoint_id: int):
             request,
             event_type="admin.inference.endpoint.poll",
             result="error",
-            actor_user_id=int(user["user_id"]),
+            actor_user_id=user.user_id,
             details={"endpoint_id": endpoint_id, "message": str(exc)},
         )
         raise HTTPException(
@@ -12084,7 +12152,7 @@ def admin_inference_endpoint_poll_models(request: Request, endpoint_id: int):
         request,
         event_type="admin.inference.endpoint.poll",
         result="success",
-        actor_user_id=int(user["user_id"]),
+        actor_user_id=user.user_id,
         details={
             "endpoint_id": endpoint_id,
             "model_count": len(result.get("models") or []),
@@ -12118,7 +12186,7 @@ def admin_inference_endpoint_smoke_test(
             request,
             event_type="admin.inference.endpoint.smoke_test",
             result="error",
-            actor_user_id=int(user["user_id"]),
+            actor_user_id=user.user_id,
             details={
                 "endpoint_id": endpoint_id,
                 "role": payload.role,
@@ -12138,7 +12206,7 @@ def admin_inference_endpoint_smoke_test(
         request,
         event_type="admin.inference.endpoint.smoke_test",
         result="success",
-        actor_user_id=int(user["user_id"]),
+        actor_user_id=user.user_id,
         details={
             "endpoint_id": endpoint_id,
             "role": result.get("role"),
@@ -12191,8 +12259,8 @@ def admin_action_run(request: Request, payload: ActionRunRequest):
         job = admin_actions.start_job(
             action=payload.action.strip(),
             params=payload.params,
-            requested_by_user_id=int(user["user_id"]),
-            user_roles=sorted(set(user.get("roles", []))),
+            requested_by_user_id=user.user_id,
+            user_roles=user.roles_sorted,
             confirmation=payload.confirmation,
         )
     except admin_actions.ActionValidationError as exc:
@@ -12200,7 +12268,7 @@ def admin_action_run(request: Request, payload: ActionRunRequest):
             request,
             event_type="admin.action.run",
             result="deny",
-            actor_user_id=int(user["user_id"]),
+            actor_user_id=user.user_id,
             details={"reason": "validation", "message": str(exc), "action": payload.action},
         )
         raise HTTPException(
@@ -12216,7 +12284,7 @@ def admin_action_run(request: Request, payload: ActionRunRequest):
             request,
             event_type="admin.action.run",
             result="deny",
-            actor_user_id=int(user["user_id"]),
+            actor_user_id=user.user_id,
             details={"reason": "permission", "message": str(exc), "action": payload.action},
         )
         raise HTTPException(
@@ -12232,7 +12300,7 @@ def admin_action_run(request: Request, payload: ActionRunRequest):
             request,
             event_type="admin.action.run",
             result="deny",
-            actor_user_id=int(user["user_id"]),
+            actor_user_id=user.user_id,
             details={"reason": "capacity", "message": str(exc), "action": payload.action},
         )
         raise HTTPException(
@@ -12248,7 +12316,7 @@ def admin_action_run(request: Request, payload: ActionRunRequest):
             request,
             event_type="admin.action.run",
             result="error",
-            actor_user_id=int(user["user_id"]),
+            actor_user_id=user.user_id,
             details={"reason": "unexpected", "message": str(exc), "action": payload.action},
         )
         raise HTTPException(
@@ -12263,7 +12331,7 @@ def admin_action_run(request: Request, payload: ActionRunRequest):
         request,
         event_type="admin.action.run",
         result="success",
-        actor_user_id=int(user["user_id"]),
+        actor_user_id=user.user_id,
         details={
             "action": payload.action,
             "job_id": job["job_id"],
@@ -12277,9 +12345,10 @@ def admin_action_run(request: Request, payload: ActionRunRequest):
 def admin_actions_jobs(
     request: Request,
     limit: int = Query(default=20, ge=1, le=200),
+    include_payload: bool = Query(default=True),
 ):
     auth.require_admin(request)
-    return {"items": admin_actions.list_jobs(limit=limit)}
+    return {"items": admin_actions.list_jobs(limit=limit, include_payload=include_payload)}
 
 
 @admin_router.get("/actions/jobs/{job_id}")
@@ -12431,7 +12500,7 @@ def admin_actions_job_cancel(request: Request, job_id: str):
         request,
         event_type="admin.action.cancel",
         result="success",
-        actor_user_id=int(user["user_id"]),
+        actor_user_id=user.user_id,
         details={"job_id": job_id, "correlation_id": job_id, "action": job.get("action")},
     )
     return {"job": job}
@@ -12534,7 +12603,7 @@ def _admin_audit_items(where_clauses: list[str], params: list[Any], limit: int)
         where_sql = "WHERE " + " AND ".join(where_clauses)
     query = _admin_audit_select_sql(where_sql)
     query_params = [*params, limit]
-    with admin_db.connection_scope() as con:
+    with admin_db.read_connection_scope() as con:
         rows = con.execute(query, query_params).fetchall()
         actor_ids = sorted({int(row["actor_user_id"]) for row in rows if row["actor_user_id"] is not None})
         roles_by_actor = _admin_audit_roles_by_actor(con, actor_ids)
@@ -12622,8 +12691,8 @@ def admin_home(request: Request):
     if not getattr(request.state, "auth_user", None):
         return auth.login_redirect(request, next_path=next_path)
     user = auth.require_admin(request)
-    email = user["email"]
-    display_name = user["display_name"]
+    email = user.email
+    display_name = user.display_name
     csrf_cookie_name = auth.get_config().csrf_cookie_name
     body = f"""
 <!doctype html>
@@ -72,11 +72,10 @@ def compatibility_fallback_enabled() -> bool:
 
 
 def _state_dir() -> Path:
-    root = Path(__file__).resolve().parents[3]
     return Path(
         os.getenv("SPACEGATE_STATE_DIR")
         or os.getenv("SPACEGATE_DATA_DIR")
-        or root / "data"
+        or db.ROOT_DIR / "data"
     )
 
 
@@ -10,6 +10,8 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Iterable
 
+from . import db
+
 
 EXPECTED_MANIFEST_SCHEMA = "spacegate.smart_tags_manifest.v3"
 EXPECTED_TAG_SCHEMA = "spacegate.smart_tags.v4"
@@ -145,11 +147,10 @@ def runtime_stats() -> dict[str, Any]:
 
 
 def _state_dir() -> Path:
-    root = Path(__file__).resolve().parents[3]
     return Path(
         os.getenv("SPACEGATE_STATE_DIR")
         or os.getenv("SPACEGATE_DATA_DIR")
-        or root / "data"
+        or db.ROOT_DIR / "data"
     )
 
 
@@ -0,0 +1,620 @@
+from __future__ import annotations
+
+import datetime as dt
+import io
+import json
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "srv" / "api"))
+
+from app import admin_actions  # noqa: E402
+from app import admin_db  # noqa: E402
+
+
+@pytest.fixture
+def admin_state(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[Path]:
+    monkeypatch.setenv("SPACEGATE_ADMIN_DB_PATH", str(tmp_path / "admin.sqlite3"))
+    monkeypatch.setenv("SPACEGATE_ADMIN_BACKUPS_DIR", str(tmp_path / "backups"))
+    monkeypatch.setenv("SPACEGATE_ADMIN_JOBS_DIR", str(tmp_path / "jobs"))
+    admin_db.clear_caches()
+    admin_actions.clear_caches()
+    admin_db.initialize()
+    admin_actions._invalidate_job_counts()
+    yield tmp_path
+    admin_db.clear_caches()
+    admin_actions.clear_caches()
+    admin_actions._invalidate_job_counts()
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [
+        ("20260716T1905Z_ad13e39_side", True),
+        ("2026-02-19T221543Z_2774126", True),
+        ("", False),
+        ("build id", False),
+        ("../out", False),
+        ("build/id", False),
+        ("build.id", False),
+        ("bu\u00efld", False),
+    ],
+)
+def test_safe_build_id_charset(value: str, expected: bool) -> None:
+    assert admin_actions._is_safe_build_id(value) is expected
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [
+        ("admin_20260220T190000Z_ab12cd.sqlite3", True),
+        ("meta_20260220T190000Z_ab12cd", True),
+        ("", False),
+        ("..", False),
+        ("a..sqlite3", False),
+        ("nested/admin.sqlite3", False),
+        ("admin:1.sqlite3", False),
+    ],
+)
+def test_safe_backup_name_rejects_traversal(value: str, expected: bool) -> None:
+    assert admin_actions._is_safe_backup_name(value) is expected
+
+
+def test_admin_db_backup_copies_committed_wal_rows(admin_state: Path) -> None:
+    log = io.StringIO()
+    # Hold a writer open so the committed role stays in the WAL during backup.
+    with admin_db.connection_scope() as writer:
+        writer.execute("INSERT INTO roles(role_code) VALUES ('auditor')")
+        writer.commit()
+        out_path = admin_actions._create_admin_db_backup(log, suffix="test")
+
+    assert out_path.parent == admin_state / "backups" / "admin_db"
+    assert out_path.name.endswith("_test.sqlite3")
+    assert not out_path.with_name(out_path.name + "-wal").exists()
+    with sqlite3.connect(str(out_path)) as con:
+        roles = {row[0] for row in con.execute("SELECT role_code FROM roles")}
+    assert roles == {"admin", "auditor", "user"}
+    assert str(out_path) in log.getvalue()
+
+
+def test_restore_admin_db_reinserts_users_referenced_by_jobs(admin_state: Path) -> None:
+    backup_path = admin_actions._create_admin_db_backup(io.StringIO())
+
+    now = "2026-07-16T19:05:00Z"
+    with admin_db.connection_scope() as con:
+        con.execute(
+            """
+INSERT INTO users(user_id, email_norm, display_name, status, created_at, updated_at)
+VALUES (7, 'ops@example.org', 'Ops', 'active', ?, ?)
+            """,
+            (now, now),
+        )
+        con.execute(
+            "INSERT INTO user_roles(user_id, role_id) SELECT 7, role_id FROM roles WHERE role_code = 'admin'"
+        )
+        con.execute(
+            """
+INSERT INTO admin_jobs(
+  job_id, action, status, requested_by_user_id, params_json, command_json, log_path, created_at
+) VALUES ('job_1', 'backup_admin_db', 'succeeded', 7, '{}', '{}', '/tmp/job_1.log', ?)
+            """,
+            (now,),
+        )
+        con.commit()
+
+    log = io.StringIO()
+    code = admin_actions._run_native_restore_admin_db({"backup_name": backup_path.name}, log)
+
+    assert code == 0
+    with admin_db.connection_scope() as con:
+        user = con.execute("SELECT email_norm FROM users WHERE user_id = 7").fetchone()
+        roles = [
+            row[0]
+            for row in con.execute(
+                "SELECT r.role_code FROM user_roles ur JOIN roles r ON r.role_id = ur.role_id WHERE ur.user_id = 7"
+            )
+        ]
+    assert user is not None and user[0] == "ops@example.org"
+    assert roles == ["admin"]
+    assert backup_path.name in log.getvalue()
+
+
+def test_release_metadata_backup_and_restore_round_trip(
+    admin_state: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    dl_root = admin_state / "dl"
+    dl_root.mkdir()
+    (dl_root / "current.json").write_text('{"build_id": "b1"}\n', encoding="utf-8")
+    (dl_root / "current").symlink_to("releases/b1")
+    monkeypatch.setenv("SPACEGATE_DL_ROOT", str(dl_root))
+    admin_actions.clear_caches()
+
+    assert admin_actions._run_native_backup_release_metadata({}, io.StringIO()) == 0
+    (backup_dir,) = (admin_state / "backups" / "release_metadata").iterdir()
+    manifest = json.loads((backup_dir / "manifest.json").read_text(encoding="utf-8"))
+    assert manifest["backup_id"] == backup_dir.name
+    assert manifest["current_symlink_target"] == "releases/b1"
+
+    (dl_root / "current.json").write_text('{"build_id": "b2"}\n', encoding="utf-8")
+    (dl_root / "current").unlink()
+    (dl_root / "current").symlink_to("releases/b2")
+
+    params = {"backup_id": backup_dir.name, "restore_symlink": True}
+    assert admin_actions._run_native_restore_release_metadata(params, io.StringIO()) == 0
+    assert (dl_root / "current.json").read_text(encoding="utf-8") == '{"build_id": "b1"}\n'
+    assert (dl_root / "current").readlink() == Path("releases/b1")
+
+
+def _seed_admin_user(user_id: int = 1) -> None:
+    now = "2026-07-16T19:05:00Z"
+    with admin_db.connection_scope() as con:
+        con.execute(
+            """
+INSERT INTO users(user_id, email_norm, display_name, status, created_at, updated_at)
+VALUES (?, ?, 'Ops', 'active', ?, ?)
+            """,
+            (user_id, f"ops{user_id}@example.org", now, now),
+        )
+        con.commit()
+
+
+def test_start_job_enforces_queue_cap_from_cached_counts(
+    admin_state: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("SPACEGATE_ADMIN_MAX_QUEUED_JOBS", "1")
+    admin_actions.clear_caches()
+    monkeypatch.setattr(admin_actions, "_start_queued_jobs", lambda: None)
+    _seed_admin_user()
+
+    def submit() -> dict:
+        return admin_actions.start_job(
+            action="backup_admin_db",
+            params={},
+            requested_by_user_id=1,
+            user_roles=["admin"],
+        )
+
+    first = submit()
+    assert first["status"] == "queued"
+    with pytest.raises(RuntimeError, match="Too many queued jobs"):
+        submit()
+
+    admin_actions.cancel_job(job_id=first["job_id"])
+    assert submit()["status"] == "queued"
+
+
+def test_timestamp_formatting_matches_isoformat(monkeypatch: pytest.MonkeyPatch) -> None:
+    value = dt.datetime(2026, 2, 3, 4, 5, 6, 789, tzinfo=dt.timezone.utc)
+    monkeypatch.setattr(admin_actions, "_utc_now", lambda: value)
+
+    assert admin_actions._to_iso(value) == value.replace(microsecond=0).isoformat().replace("+00:00", "Z")
+    assert admin_actions._ts_slug() == value.strftime("%Y%m%dT%H%M%SZ")
+
+
+def test_restore_admin_db_rejects_jobs_without_users(admin_state: Path) -> None:
+    backup_path = admin_actions._create_admin_db_backup(io.StringIO())
+    with admin_db.connection_scope() as con:
+        con.execute("PRAGMA foreign_keys = OFF")
+        con.execute(
+            """
+INSERT INTO admin_jobs(
+  job_id, action, status, requested_by_user_id, params_json, command_json, log_path, created_at
+) VALUES ('job_orphan', 'backup_admin_db', 'failed', 99, '{}', '{}', '/tmp/job.log', '2026-07-16T19:05:00Z')
+            """
+        )
+        con.commit()
+
+    with pytest.raises(admin_actions.ActionValidationError, match="admin_jobs referencing missing users"):
+        admin_actions._run_native_restore_admin_db({"backup_name": backup_path.name}, io.StringIO())
+
+
+def test_restore_admin_db_reports_missing_backup_tables(admin_state: Path) -> None:
+    backup_path = admin_actions._create_admin_db_backup(io.StringIO())
+    with sqlite3.connect(str(backup_path)) as con:
+        con.execute("DROP TABLE audit_log")
+        con.execute("DROP TABLE sessions")
+
+    with pytest.raises(admin_actions.ActionValidationError, match="missing required tables: audit_log, sessions"):
+        admin_actions._run_native_restore_admin_db({"backup_name": backup_path.name}, io.StringIO())
+
+
+def test_list_actions_serves_cached_visible_catalog() -> None:
+    items = admin_actions.list_actions()
+
+    names = [item["name"] for item in items]
+    assert names == sorted(names)
+    assert "build_database_slice" not in names
+    by_name = {item["name"]: item for item in items}
+    assert by_name["restore_admin_db"]["confirmation_phrase"] == "RUN restore_admin_db"
+    assert by_name["verify_build"]["group_key"] == "build"
+    assert admin_actions.list_actions() is not items
+
+    items[0]["display_name"] = "changed"
+    items[0]["params_schema"]["injected"] = {}
+    items[0]["required_roles"].append("guest")
+    items[0]["operator_guidance"]["note"] = "changed"
+    fresh = admin_actions.list_actions()[0]
+    assert fresh["display_name"] != "changed"
+    assert "injected" not in fresh["params_schema"]
+    assert "guest" not in fresh["required_roles"]
+    assert "note" not in fresh["operator_guidance"] or fresh["operator_guidance"]["note"] != "changed"
+
+
+def test_validate_params_applies_compiled_field_plans() -> None:
+    specs = admin_actions.ACTION_SPECS
+
+    normalized = admin_actions._validate_params(
+        specs["materialize_simulation_scenes"], {"limit": "25", "sort": "name"}
+    )
+    assert normalized["limit"] == 25
+    assert normalized["sort"] == "name"
+    assert normalized["top_coolness_limit"] == specs["materialize_simulation_scenes"].params_schema["top_coolness_limit"]["default"]
+
+    with pytest.raises(admin_actions.ActionValidationError, match="limit must be <= 10000"):
+        admin_actions._validate_params(specs["materialize_simulation_scenes"], {"limit": 10001})
+    with pytest.raises(admin_actions.ActionValidationError, match="sort must be one of: coolness, distance, name"):
+        admin_actions._validate_params(specs["materialize_simulation_scenes"], {"sort": "random"})
+    with pytest.raises(admin_actions.ActionValidationError, match="Unsupported params: a, z"):
+        admin_actions._validate_params(specs["verify_build"], {"z": 1, "a": 2})
+    with pytest.raises(admin_actions.ActionValidationError, match="Missing required parameter: backup_name"):
+        admin_actions._validate_params(specs["restore_admin_db"], {"backup_name": "  "})
+
+
+def test_start_job_insert_guard_enforces_cap_when_counts_drift(
+    admin_state: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("SPACEGATE_ADMIN_MAX_QUEUED_JOBS", "1")
+    admin_actions.clear_caches()
+    monkeypatch.setattr(admin_actions, "_start_queued_jobs", lambda: None)
+    monkeypatch.setattr(admin_actions, "_job_counts", lambda con: (0, 0))
+    _seed_admin_user()
+
+    admin_actions.start_job(action="backup_admin_db", params={}, requested_by_user_id=1, user_roles=["admin"])
+    with pytest.raises(RuntimeError, match=r"Too many queued jobs \(1/1\)"):
+        admin_actions.start_job(action="backup_admin_db", params={}, requested_by_user_id=1, user_roles=["admin"])
+
+    with admin_db.connection_scope() as con:
+        assert admin_actions._count_active_jobs(con) == (0, 1)
+
+
+def test_claim_queued_jobs_marks_oldest_running(admin_state: Path) -> None:
+    _seed_admin_user()
+    with admin_db.connection_scope() as con:
+        for job_id, created_at in [("job_b", "2026-07-16T19:05:02Z"), ("job_a", "2026-07-16T19:05:01Z"), ("job_c", "2026-07-16T19:05:03Z")]:
+            con.execute(
+                """
+INSERT INTO admin_jobs(
+  job_id, action, status, requested_by_user_id, params_json, command_json, log_path, created_at
+) VALUES (?, 'verify_build', 'queued', 1, '{}', '{}', '/tmp/job.log', ?)
+                """,
+                (job_id, created_at),
+            )
+        rows = admin_actions._claim_queued_jobs(con, slots=2, max_running=4, started_at="2026-07-16T19:06:00Z")
+        statuses = dict(con.execute("SELECT job_id, status FROM admin_jobs").fetchall())
+
+    assert [row["job_id"] for row in rows] == ["job_a", "job_b"]
+    assert statuses == {"job_a": "running", "job_b": "running", "job_c": "queued"}
+
+
+def test_claim_queued_jobs_respects_running_cap_when_counts_drift(admin_state: Path) -> None:
+    _seed_admin_user()
+    with admin_db.connection_scope() as con:
+        for job_id, status in [("job_run", "running"), ("job_a", "queued"), ("job_b", "queued")]:
+            con.execute(
+                """
+INSERT INTO admin_jobs(
+  job_id, action, status, requested_by_user_id, params_json, command_json, log_path, created_at
+) VALUES (?, 'verify_build', ?, 1, '{}', '{}', '/tmp/job.log', '2026-07-16T19:05:00Z')
+                """,
+                (job_id, status),
+            )
+        # The caller believes two slots are free; SQLite knows one is taken.
+        rows = admin_actions._claim_queued_jobs(con, slots=2, max_running=2, started_at="2026-07-16T19:06:00Z")
+        full = admin_actions._claim_queued_jobs(con, slots=1, max_running=2, started_at="2026-07-16T19:06:00Z")
+
+    assert len(rows) == 1
+    assert full == []
+
+
+def test_read_job_log_reads_chunk_at_offset(admin_state: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    log_path = admin_state / "job.log"
+    log_path.write_bytes(b"hello\n" + "café\n".encode("utf-8"))
+    job = {"log_path": str(log_path), "status": "succeeded"}
+    monkeypatch.setattr(admin_actions, "get_job", lambda job_id: job)
+
+    chunk = admin_actions.read_job_log("job_1", offset=6)
+    assert chunk["chunk"] == "café\n"
+    assert chunk["next_offset"] == log_path.stat().st_size
+    assert chunk["eof"] is True
+
+    clamped = admin_actions.read_job_log("job_1", offset=10_000)
+    assert clamped["offset"] == clamped["next_offset"] == log_path.stat().st_size
+    assert clamped["chunk"] == ""
+
+    job["log_path"] = str(admin_state / "missing.log")
+    assert admin_actions.read_job_log("job_1", offset=3)["next_offset"] == 3
+
+
+def test_validate_and_plan_uses_precomputed_roles_and_confirmation() -> None:
+    spec = admin_actions.ACTION_SPECS["restore_admin_db"]
+    assert spec.required_role_set == frozenset({"admin"})
+    assert spec.effective_confirmation == "RUN restore_admin_db"
+
+    with pytest.raises(admin_actions.ActionPermissionError, match="Missing required role"):
+        admin_actions._validate_and_plan(
+            action="restore_admin_db", params={"backup_name": "a.sqlite3"}, user_roles=["user"], confirmation=None
+        )
+    with pytest.raises(admin_actions.ActionValidationError, match="Expected: RUN restore_admin_db"):
+        admin_actions._validate_and_plan(
+            action="restore_admin_db", params={"backup_name": "a.sqlite3"}, user_roles=["admin"], confirmation="RUN"
+        )
+
+
+def test_run_command_copies_output_and_reports_last_error(tmp_path: Path) -> None:
+    script = "import sys; print('step 1'); print('ERROR: disk full'); print('cleanup'); sys.exit(3)"
+    log_path = tmp_path / "job.log"
+    with log_path.open("a", encoding="utf-8") as logf:
+        logf.write("header\n")
+        code, error = admin_actions._run_command([sys.executable, "-c", script], logf)
+        logf.write("footer\n")
+
+    assert (code, error) == (3, "ERROR: disk full")
+    assert log_path.read_text(encoding="utf-8") == "header\nstep 1\nERROR: disk full\ncleanup\nfooter\n"
+
+
+def test_run_command_writes_to_text_stream_without_buffer() -> None:
+    script = "import sys; sys.stdout.buffer.write('caf\\u00e9\\nERROR: bad\\n'.encode()); sys.exit(4)"
+    logf = io.StringIO()
+
+    code, error = admin_actions._run_command([sys.executable, "-c", script], logf)
+
+    assert (code, error) == (4, "ERROR: bad")
+    assert logf.getvalue() == "caf\u00e9\nERROR: bad\n"
+
+
+def test_run_command_finds_error_before_long_trailing_output(tmp_path: Path) -> None:
+    script = "import sys; print('ERROR: disk full'); print('x' * 200000); print('done'); sys.exit(2)"
+    with (tmp_path / "job.log").open("a", encoding="utf-8") as logf:
+        code, error = admin_actions._run_command([sys.executable, "-c", script], logf)
+
+    assert (code, error) == (2, "ERROR: disk full")
+
+
+def test_output_error_scanner_joins_lines_split_across_chunks() -> None:
+    scanner = admin_actions._OutputErrorScanner()
+    for chunk in [b"step 1\nERR", b"OR: disk ", b"full\nprogress 10%\rprogress 20%"]:
+        scanner.feed(chunk)
+
+    assert scanner.summary() == "ERROR: disk full"
+    assert scanner.last_line == "progress 20%"
+
+
+def test_list_backups_caches_until_directories_change(
+    admin_state: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    backup_path = admin_actions._create_admin_db_backup(io.StringIO(), suffix="first")
+    monkeypatch.setattr(admin_actions, "_BACKUPS_CACHE_SETTLE_NS", 0)
+
+    first = admin_actions.list_backups()
+    assert [item["name"] for item in first["admin_db"]] == [backup_path.name]
+    first["admin_db"].clear()
+
+    scans: list[int] = []
+    original_scan = admin_actions._scan_backups
+    monkeypatch.setattr(
+        admin_actions, "_scan_backups", lambda *args: scans.append(1) or original_scan(*args)
+    )
+    assert [item["name"] for item in admin_actions.list_backups()["admin_db"]] == [backup_path.name]
+    assert scans == []
+
+    backup_path.unlink()
+    assert admin_actions.list_backups()["admin_db"] == []
+    assert scans == [1]
+
+
+def test_canonical_json_is_compact_and_sorted() -> None:
+    payload = {"b": [1, 2], "a": {"z": None, "y": "x"}}
+
+    assert admin_db.canonical_json(payload) == '{"a":{"y":"x","z":null},"b":[1,2]}'
+    assert json.loads(admin_db.canonical_json({"name": "café"})) == {"name": "café"}
+
+
+def test_list_jobs_summary_skips_payload(admin_state: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(admin_actions, "_start_queued_jobs", lambda: None)
+    _seed_admin_user()
+    admin_actions.start_job(action="backup_admin_db", params={}, requested_by_user_id=1, user_roles=["admin"])
+
+    (full,) = admin_actions.list_jobs()
+    (summary,) = admin_actions.list_jobs(include_payload=False)
+
+    assert full["execution"]["kind"] == "native"
+    assert "params" not in summary and "execution" not in summary
+    assert summary == {key: value for key, value in full.items() if key not in {"params", "execution"}}
+
+
+def test_action_specs_are_frozen() -> None:
+    spec = admin_actions.ACTION_SPECS["materialize_simulation_scenes"]
+
+    assert isinstance(spec.required_roles, tuple)
+    with pytest.raises(TypeError):
+        spec.params_schema["limit"]["max"] = 1  # type: ignore[index]
+    catalog = {item["name"]: item for item in admin_actions.list_actions()}
+    assert type(catalog[spec.name]["params_schema"]["limit"]) is dict
+
+
+def test_queued_jobs_run_on_reused_worker_threads(admin_state: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("SPACEGATE_ADMIN_MAX_RUNNING_JOBS", "1")
+    admin_actions.clear_caches()
+    _seed_admin_user()
+
+    job_ids = [
+        admin_actions.start_job(action="backup_admin_db", params={}, requested_by_user_id=1, user_roles=["admin"])["job_id"]
+        for _ in range(3)
+    ]
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        statuses = {admin_actions.get_job(job_id)["status"] for job_id in job_ids}
+        if statuses == {"succeeded"}:
+            break
+        time.sleep(0.05)
+
+    assert statuses == {"succeeded"}
+    assert len(admin_actions._JOB_WORKERS) >= 1
+    assert all(worker.daemon for worker in admin_actions._JOB_WORKERS)
+
+
+def test_read_job_log_idle_poll_skips_open(admin_state: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    log_path = admin_state / "job.log"
+    log_path.write_bytes(b"done\n")
+    monkeypatch.setattr(admin_actions, "get_job", lambda job_id: {"log_path": str(log_path), "status": "running"})
+
+    def fail_open(*args, **kwargs):
+        raise AssertionError("log should not be opened at EOF")
+
+    monkeypatch.setattr(admin_actions.os, "open", fail_open)
+    chunk = admin_actions.read_job_log("job_1", offset=5)
+
+    assert (chunk["offset"], chunk["next_offset"], chunk["chunk"], chunk["eof"]) == (5, 5, "", False)
+
+
+def test_admin_db_connection_scope_reuses_pooled_connections(admin_state: Path) -> None:
+    with admin_db.connection_scope() as first:
+        first.execute("INSERT INTO roles(role_code) VALUES ('uncommitted')")
+    with admin_db.connection_scope() as second:
+        assert second is first
+        assert second.execute("SELECT 1 FROM roles WHERE role_code = 'uncommitted'").fetchone() is None
+
+    with pytest.raises(RuntimeError):
+        with admin_db.connection_scope() as failed:
+            raise RuntimeError("boom")
+    with admin_db.connection_scope() as third:
+        assert third is not failed
+
+
+def test_admin_db_read_connection_scope_reuses_thread_read_only_connection(admin_state: Path) -> None:
+    with admin_db.read_connection_scope() as first:
+        assert first.execute("SELECT COUNT(*) FROM roles").fetchone()[0] > 0
+        with pytest.raises(sqlite3.OperationalError):
+            first.execute("INSERT INTO roles(role_code) VALUES ('ro_write')")
+    with admin_db.read_connection_scope() as second:
+        assert second is first
+
+    admin_db.clear_caches()
+    with admin_db.read_connection_scope() as third:
+        assert third is not first
+
+
+def test_admin_db_read_connection_scope_serves_concurrent_audit_listings(admin_state: Path) -> None:
+    with admin_db.connection_scope() as con:
+        con.executemany(
+            """
+INSERT INTO audit_log(actor_user_id, event_type, result, request_id, route, method, details_json, created_at)
+VALUES (NULL, 'admin.test', 'success', NULL, NULL, NULL, '{}', ?)
+            """,
+            [(f"2026-07-16T19:05:{idx:02d}Z",) for idx in range(50)],
+        )
+        con.commit()
+
+    barrier = threading.Barrier(8)
+
+    def list_audit(_: int) -> tuple[int, int]:
+        with admin_db.read_connection_scope() as con:
+            barrier.wait(timeout=10)
+            cursor = con.execute("SELECT audit_id FROM audit_log ORDER BY audit_id DESC")
+            # Step part of the result, then list again on the same connection.
+            cursor.fetchmany(5)
+            rows = con.execute("SELECT COUNT(*) FROM audit_log").fetchone()[0]
+            return id(con), int(rows)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(list_audit, range(8)))
+
+    assert {count for _, count in results} == {50}
+    assert len({con_id for con_id, _ in results}) == 8
+
+
+def test_initialize_seeds_allowlist_once(admin_state: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("SPACEGATE_ADMIN_ALLOWLIST_EMAILS", "Ops@Example.org, dev@example.org")
+    monkeypatch.setenv("SPACEGATE_ADMIN_ALLOWLIST_SUBS", "sub-1")
+    admin_db.clear_caches()
+
+    admin_db.initialize()
+    admin_db.initialize()
+
+    with admin_db.connection_scope() as con:
+        rows = con.execute(
+            "SELECT provider_sub, email_norm, note FROM admin_allowlist ORDER BY allow_id"
+        ).fetchall()
+    assert [tuple(row) for row in rows] == [
+        (None, "ops@example.org", "seeded-from-env"),
+        (None, "dev@example.org", "seeded-from-env"),
+        ("sub-1", None, "seeded-from-env"),
+    ]
+
+
+def test_initialize_skips_schema_script_once_versioned(admin_state: Path) -> None:
+    with admin_db.connection_scope() as con:
+        assert con.execute("PRAGMA user_version").fetchone()[0] == admin_db.ADMIN_SCHEMA_VERSION
+        con.execute("DROP INDEX idx_audit_actor")
+        con.commit()
+
+    admin_db.initialize()
+    with admin_db.connection_scope() as con:
+        assert con.execute("SELECT 1 FROM sqlite_master WHERE name = 'idx_audit_actor'").fetchone() is None
+        con.execute("PRAGMA user_version = 0")
+
+    admin_db.initialize()
+    with admin_db.connection_scope() as con:
+        assert con.execute("SELECT 1 FROM sqlite_master WHERE name = 'idx_audit_actor'").fetchone() is not None
+
+
+def test_initialize_keeps_duplicate_allowlist_rows(admin_state: Path) -> None:
+    now = "2026-07-16T19:05:00Z"
+    with admin_db.connection_scope() as con:
+        con.execute("DROP INDEX uq_allowlist_email")
+        con.execute("DROP INDEX uq_allowlist_sub")
+        con.executemany(
+            """
+INSERT INTO admin_allowlist(provider, issuer, provider_sub, email_norm, enabled, note, created_at, updated_at)
+VALUES ('google', 'https://accounts.google.com', NULL, 'ops@example.org', ?, ?, ?, ?)
+            """,
+            [(0, "disabled", now, now), (1, "enabled", now, now)],
+        )
+        con.commit()
+
+    admin_db.initialize()
+
+    with admin_db.connection_scope() as con:
+        notes = [row[0] for row in con.execute("SELECT note FROM admin_allowlist ORDER BY allow_id")]
+        indexes = con.execute(
+            "SELECT name FROM sqlite_master WHERE name IN ('uq_allowlist_email', 'uq_allowlist_sub')"
+        ).fetchall()
+        duplicates = admin_db.find_allowlist_duplicates(con)
+    assert notes == ["disabled", "enabled"]
+    assert indexes == []
+    assert [row["email_norm"] for row in duplicates] == ["ops@example.org"]
+
+
+def test_restore_admin_db_rejects_duplicate_allowlist_rows(admin_state: Path) -> None:
+    backup_path = admin_actions._create_admin_db_backup(io.StringIO())
+    with sqlite3.connect(str(backup_path)) as con:
+        con.execute("DROP INDEX uq_allowlist_email")
+        con.executemany(
+            """
+INSERT INTO admin_allowlist(provider, issuer, provider_sub, email_norm, enabled, note, created_at, updated_at)
+VALUES ('google', 'https://accounts.google.com', NULL, 'ops@example.org', 1, NULL, ?, ?)
+            """,
+            [("2026-07-16T19:05:00Z", "2026-07-16T19:05:00Z")] * 2,
+        )
+
+    with pytest.raises(admin_actions.ActionValidationError, match="duplicate entries"):
+        admin_actions._run_native_restore_admin_db({"backup_name": backup_path.name}, io.StringIO())
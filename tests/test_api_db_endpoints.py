@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import inspect
+import sys
+import threading
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "srv" / "api"))
+
+from app import main as api_main  # noqa: E402
+
+
+def test_db_endpoint_runs_sync_body_off_the_event_loop() -> None:
+    app = FastAPI()
+
+    @api_main._db_endpoint(app.get("/probe"))
+    def probe(value: int = 1):
+        return {"value": value, "thread": threading.current_thread().name}
+
+    assert not inspect.iscoroutinefunction(probe)
+    assert probe(value=2)["value"] == 2
+    route = next(route for route in app.routes if getattr(route, "path", None) == "/probe")
+    assert inspect.iscoroutinefunction(route.endpoint)
+
+    with TestClient(app) as client:
+        payload = client.get("/probe", params={"value": 3}).json()
+    assert payload["value"] == 3
+    assert payload["thread"] != threading.main_thread().name
+
+
+def test_sidecar_db_path_caches_hits_per_served_build(tmp_path: Path, monkeypatch) -> None:
+    core = tmp_path / "core.duckdb"
+    arm = tmp_path / "arm.duckdb"
+    build_key = [("build-a",)]
+    monkeypatch.setattr(api_main.db, "get_db_path", lambda: str(core))
+    monkeypatch.setattr(api_main.db, "served_build_key", lambda: build_key[0])
+    api_main._SIDECAR_DB_PATHS.clear()
+
+    assert api_main._resolve_arm_db_path() is None
+    # A sidecar written into the served build (score_coolness) shows up at once.
+    arm.write_bytes(b"")
+    assert api_main._resolve_arm_db_path() == str(arm)
+
+    calls = []
+    real_exists = Path.exists
+    monkeypatch.setattr(Path, "exists", lambda self: calls.append(self) or real_exists(self))
+    assert api_main._resolve_arm_db_path() == str(arm)
+    assert calls == []
+
+    build_key[0] = ("build-b",)
+    assert api_main._resolve_arm_db_path() == str(arm)
+    assert calls == [arm]
+    api_main._SIDECAR_DB_PATHS.clear()
+
+
+def test_coolness_preview_reuses_rows_until_disc_db_changes(tmp_path: Path, monkeypatch) -> None:
+    import duckdb
+
+    features = [feature for _, feature in api_main.COOLNESS_WEIGHT_KEYS]
+    disc = tmp_path / "disc.duckdb"
+
+    def write_scores(count: int) -> None:
+        con = duckdb.connect(str(disc))
+        try:
+            con.execute("DROP TABLE IF EXISTS coolness_scores")
+            columns = ", ".join(f"{feature} DOUBLE" for feature in features)
+            con.execute(
+                "CREATE TABLE coolness_scores (system_id BIGINT, stable_object_key VARCHAR, system_name VARCHAR, "
+                "dist_ly DOUBLE, dominant_spectral_class VARCHAR, star_count INTEGER, planet_count INTEGER, "
+                f"nice_planet_count INTEGER, weird_planet_count INTEGER, {columns})"
+            )
+            for system_id in range(1, count + 1):
+                values = ", ".join("0.5" for _ in features)
+                con.execute(f"INSERT INTO coolness_scores VALUES ({system_id}, 'k', 'S', 1.0, 'G', 1, 0, 0, 0, {values})")
+        finally:
+            con.close()
+
+    write_scores(2)
+    monkeypatch.setattr(api_main.db, "get_db_path", lambda: str(tmp_path / "core.duckdb"))
+    api_main._COOLNESS_PREVIEW_CACHE.clear()
+    queries = []
+    real_query = api_main._query_coolness_preview_rows
+
+    def counting_query(*args):
+        queries.append(args)
+        return real_query(*args)
+
+    monkeypatch.setattr(api_main, "_query_coolness_preview_rows", counting_query)
+    weights = {key: 1.0 for key, _ in api_main.COOLNESS_WEIGHT_KEYS}
+
+    assert api_main._coolness_preview_from_disc_db(weights, 10)["sample_size"] == 2
+    assert api_main._coolness_preview_from_disc_db(weights, 10)["sample_size"] == 2
+    assert len(queries) == 1
+
+    write_scores(3)
+    assert api_main._coolness_preview_from_disc_db(weights, 10)["sample_size"] == 3
+    assert len(queries) == 2
+    api_main._COOLNESS_PREVIEW_CACHE.clear()
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import sys
+import threading
 from pathlib import Path
 
 import pytest
@@ -167,3 +168,247 @@ def test_build_id_is_cached_by_database_fingerprint(
     fingerprint[0] = ("/build-b/core.duckdb", 1, 5, 6, 7)
     assert db.build_id() == "build-a"
     assert len(opened) == 2
+
+
+def test_db_path_is_read_once_until_caches_are_cleared(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("SPACEGATE_DB_PATH", "/builds/a/core.duckdb")
+    db.clear_caches()
+    assert db.get_db_path() == "/builds/a/core.duckdb"
+
+    monkeypatch.setenv("SPACEGATE_DB_PATH", "/builds/b/core.duckdb")
+    assert db.get_db_path() == "/builds/a/core.duckdb"
+
+    db.clear_caches()
+    assert db.get_db_path() == "/builds/b/core.duckdb"
+    monkeypatch.delenv("SPACEGATE_DB_PATH")
+    db.clear_caches()
+
+
+def test_get_connection_reuses_thread_cursor_off_one_parent_per_build(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    fingerprint = [("/build-a/core.duckdb", 1, 2, 3, 4)]
+    opened: list[str] = []
+
+    class ParentConnection(FakeConnection):
+        def cursor(self) -> FakeConnection:
+            return FakeConnection()
+
+    def open_connection(path: str) -> ParentConnection:
+        opened.append(path)
+        return ParentConnection()
+
+    monkeypatch.setattr(db, "_PARENT", None)
+    monkeypatch.setattr(db, "_THREAD_CURSOR", threading.local())
+    monkeypatch.setattr(db, "_database_fingerprint", lambda: fingerprint[0])
+    monkeypatch.setattr(db, "_open_connection", open_connection)
+
+    with db.connection_scope() as first:
+        with db.connection_scope() as nested:
+            assert nested is not first
+        assert nested.closed is True
+    assert first.closed is False
+    with db.connection_scope() as again:
+        assert again is first
+    assert opened == ["/build-a/core.duckdb"]
+
+    parent = db._PARENT.connection
+    fingerprint[0] = ("/build-b/core.duckdb", 1, 5, 6, 7)
+    with db.connection_scope() as replacement:
+        assert replacement is not first
+    assert first.closed is True
+    assert parent.closed is True
+    assert opened == ["/build-a/core.duckdb", "/build-b/core.duckdb"]
+
+
+def test_superseded_parent_closes_once_lent_cursors_are_released(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    fingerprint = [("/build-a/core.duckdb", 1, 2, 3, 4)]
+
+    class ParentConnection(FakeConnection):
+        def cursor(self) -> FakeConnection:
+            return FakeConnection()
+
+    monkeypatch.setattr(db, "_PARENT", None)
+    monkeypatch.setattr(db, "_THREAD_CURSOR", threading.local())
+    monkeypatch.setattr(db, "_database_fingerprint", lambda: fingerprint[0])
+    monkeypatch.setattr(db, "_open_connection", lambda _path: ParentConnection())
+
+    started = threading.Event()
+    finish = threading.Event()
+
+    def long_request() -> None:
+        with db.connection_scope():
+            started.set()
+            finish.wait(timeout=10)
+
+    def idle_worker() -> None:
+        with db.connection_scope():
+            pass
+
+    idle = threading.Thread(target=idle_worker)
+    idle.start()
+    idle.join()
+    old_parent = db._PARENT.connection
+    worker = threading.Thread(target=long_request)
+    worker.start()
+    assert started.wait(timeout=10)
+
+    fingerprint[0] = ("/build-b/core.duckdb", 1, 5, 6, 7)
+    with db.connection_scope():
+        pass
+    # The idle worker's cached cursor does not pin the old build; the request
+    # still running on it does, until it finishes.
+    assert old_parent.closed is False
+    finish.set()
+    worker.join()
+    assert old_parent.closed is True
+    assert db._PARENT.connection.closed is False
+
+
+def test_connection_scope_checks_out_and_releases_pooled_connection(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    fingerprint = ("/build-a/core.duckdb", 1, 2, 3, 4)
+    monkeypatch.setattr(db, "_database_fingerprint", lambda: fingerprint)
+    monkeypatch.setattr(db, "_open_connection", lambda _path: FakeConnection())
+    pool = db._ConnectionPool(size=1, timeout_seconds=0.01)
+    monkeypatch.setattr(db, "_CONNECTION_POOL", pool)
+
+    with db.connection_scope() as first:
+        assert pool.stats()["active_connections"] == 1
+    with db.ConnectionScope() as second:
+        assert second is first
+
+    stats = pool.stats()
+    assert stats["active_connections"] == 0
+    assert stats["reused_checkouts"] == 1
+    assert first.closed is False
+
+
+def test_open_connection_reports_missing_database(tmp_path: Path) -> None:
+    with pytest.raises(db.DatabaseUnavailable, match="Database not found"):
+        db._open_connection(str(tmp_path / "missing.duckdb"))
+
+
+def test_runtime_limits_are_applied_in_one_statement(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    executed: list[str] = []
+
+    class LimitConnection(FakeConnection):
+        def execute(self, sql: str) -> None:
+            executed.append(sql)
+            if "bogus" in sql:
+                raise RuntimeError("bad memory limit")
+
+    def use_limits(memory_limit: str, threads: str) -> None:
+        config = db._runtime_limit_config(memory_limit, threads)
+        statements = db._runtime_limit_statements(config)
+        monkeypatch.setattr(db, "_RUNTIME_LIMIT_STATEMENTS", statements)
+        monkeypatch.setattr(db, "_RUNTIME_LIMIT_SQL", "; ".join(statements))
+
+    monkeypatch.setattr(db.os, "cpu_count", lambda: 8)
+    use_limits("4GiB", "2")
+    db._apply_runtime_limits(LimitConnection())
+    assert executed == ["SET memory_limit='4GiB'; SET threads TO 2"]
+
+    executed.clear()
+    use_limits("bogus", "2")
+    db._apply_runtime_limits(LimitConnection())
+    assert executed[-1] == "SET threads TO 2"
+
+    executed.clear()
+    use_limits("", "")
+    db._apply_runtime_limits(LimitConnection())
+    assert executed == []
+
+
+def test_duckdb_threads_are_clamped_to_memory_and_cores(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(db.os, "cpu_count", lambda: 8)
+    assert db._memory_limit_bytes("6GB") == 6_000_000_000
+    assert db._memory_limit_bytes("512 MiB") == 512 << 20
+    assert db._memory_limit_bytes("80%") == 0
+
+    assert db._duckdb_threads("", "") == 0
+    assert db._duckdb_threads("", "4") == 4
+    assert db._duckdb_threads("", "32") == 8
+    assert db._duckdb_threads("2GiB", "6") == 2
+    assert db._duckdb_threads("512MB", "4") == 1
+    assert db._duckdb_threads("3GiB", "") == 3
+    assert db._duckdb_threads("64GiB", "") == 0
+    assert db._duckdb_threads("bogus", "4") == 4
+
+
+def test_database_fingerprint_is_restated_after_interval(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    now = [100.0]
+    stats = [("/build-a/core.duckdb", 1, 2, 3, 4)]
+    calls: list[int] = []
+
+    def stat_database() -> tuple[str, int, int, int, int]:
+        calls.append(1)
+        return stats[0]
+
+    monkeypatch.setattr(db, "_FINGERPRINT_CACHE", None)
+    monkeypatch.setattr(db, "DB_STAT_INTERVAL_SECONDS", 5.0)
+    monkeypatch.setattr(db.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(db, "_stat_database", stat_database)
+
+    assert db._database_fingerprint() == stats[0]
+    stats[0] = ("/build-b/core.duckdb", 1, 5, 6, 7)
+    now[0] = 104.0
+    assert db._database_fingerprint()[0] == "/build-a/core.duckdb"
+    now[0] = 105.5
+    assert db._database_fingerprint()[0] == "/build-b/core.duckdb"
+    assert len(calls) == 2
+
+
+def test_open_connection_passes_runtime_limits_to_connect(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    path = str(tmp_path / "core.duckdb")
+    db.duckdb.connect(path).close()
+    monkeypatch.setattr(db.os, "cpu_count", lambda: 8)
+
+    def setting_values(memory_limit: str, threads: str) -> tuple[str, int]:
+        config = db._runtime_limit_config(memory_limit, threads)
+        statements = db._runtime_limit_statements(config)
+        monkeypatch.setattr(db, "_RUNTIME_LIMIT_CONFIG", config)
+        monkeypatch.setattr(db, "_RUNTIME_LIMIT_STATEMENTS", statements)
+        monkeypatch.setattr(db, "_RUNTIME_LIMIT_SQL", "; ".join(statements))
+        con = db._open_connection(path)
+        try:
+            return con.execute(
+                "SELECT current_setting('memory_limit'), current_setting('threads')"
+            ).fetchone()
+        finally:
+            con.close()
+
+    assert setting_values("2GiB", "3")[1] == 2
+    assert setting_values("bogus", "3")[1] == 3
+
+
+def test_prewarm_opens_parent_and_tolerates_missing_database(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    path = tmp_path / "core.duckdb"
+    monkeypatch.setenv("SPACEGATE_DB_PATH", str(path))
+    monkeypatch.setattr(db, "_PARENT", None)
+    monkeypatch.setattr(db, "_FINGERPRINT_CACHE", None)
+    db.get_db_path.cache_clear()
+    try:
+        assert db.prewarm() is False
+        db.duckdb.connect(str(path)).close()
+        assert db.prewarm() is True
+        assert db._PARENT is not None
+        assert db._PARENT.fingerprint[0] == str(path.resolve())
+    finally:
+        monkeypatch.delenv("SPACEGATE_DB_PATH")
+        db.clear_caches()
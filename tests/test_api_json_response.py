@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+from fastapi import HTTPException
+from starlette.requests import Request
+
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "srv" / "api"))
+
+from app import main as api_main  # noqa: E402
+
+
+def test_fast_json_response_matches_compact_json_output() -> None:
+    content = {"name": "Tau Ceti", "distance_ly": 11.9, "ids": [1, 2], "flags": {"ok": True}, "note": None}
+    body = api_main.FastJSONResponse(content).body
+    assert json.loads(body) == content
+    assert body == json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def test_app_renders_errors_with_fast_json_response() -> None:
+    assert api_main.app.router.default_response_class is api_main.FastJSONResponse
+    request = Request({"type": "http", "method": "GET", "path": "/", "headers": [], "query_string": b""})
+    response = asyncio.run(api_main.http_exception_handler(request, HTTPException(status_code=404, detail="not_found")))
+    assert isinstance(response, api_main.FastJSONResponse)
+    assert json.loads(response.body)["error"]["code"] == "not_found"
+
+
+def test_fast_json_response_renders_non_finite_floats_as_null() -> None:
+    body = api_main.FastJSONResponse({"score": float("nan"), "range": [float("inf"), -float("inf"), 1.5]}).body
+    assert json.loads(body) == {"score": None, "range": [None, None, 1.5]}
@@ -0,0 +1,351 @@
+from __future__ import annotations
+
+import sys
+import urllib.parse
+from pathlib import Path
+from typing import Dict, Iterator
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+from starlette.responses import Response
+
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "srv" / "api"))
+
+from app import admin_db  # noqa: E402
+from app import auth  # noqa: E402
+
+
+@pytest.fixture
+def auth_state(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[Path]:
+    monkeypatch.setenv("SPACEGATE_ADMIN_DB_PATH", str(tmp_path / "admin.sqlite3"))
+    monkeypatch.setenv("SPACEGATE_AUTH_ENABLE", "1")
+    monkeypatch.setenv("SPACEGATE_SESSION_SECRET", "test-secret")
+    monkeypatch.setenv("SPACEGATE_SESSION_COOKIE_SECURE", "0")
+    admin_db.clear_caches()
+    auth.clear_caches()
+    yield tmp_path
+    auth.flush_audit_log()
+    admin_db.clear_caches()
+    auth.clear_caches()
+
+
+def test_get_config_is_cached_until_cleared(auth_state: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    cfg = auth.get_config()
+    assert cfg.enabled is True
+    assert cfg.session_cookie_name == "spacegate_session"
+    assert auth.get_config() is cfg
+
+    monkeypatch.setenv("SPACEGATE_SESSION_COOKIE_NAME", "other_session")
+    assert auth.get_config().session_cookie_name == "spacegate_session"
+
+    auth.clear_caches()
+    assert auth.get_config().session_cookie_name == "other_session"
+
+
+def test_auth_runtime_status_is_cached_until_cleared(auth_state: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    status = auth.auth_runtime_status()
+    assert status["enabled"] is True
+    assert status["admin_db_path"] == str(auth_state / "admin.sqlite3")
+    assert auth.auth_runtime_status() is status
+    with pytest.raises(TypeError):
+        status["enabled"] = False  # type: ignore[index]
+
+    monkeypatch.setenv("SPACEGATE_AUTH_ENABLE", "0")
+    admin_db.clear_caches()
+    auth.clear_caches()
+    assert auth.auth_runtime_status()["enabled"] is False
+
+
+def test_signed_state_cookie_round_trips(auth_state: Path) -> None:
+    cookie = auth._build_signed_state_cookie("/api/v2/admin/jobs")
+    payload = auth._parse_signed_state_cookie(cookie)
+    assert payload["next"] == "/api/v2/admin/jobs"
+    assert payload["state"] and payload["nonce"]
+
+    assert cookie.startswith(f"{auth.STATE_COOKIE_VERSION}.")
+
+    tampered = cookie[:-1] + ("0" if cookie[-1] != "0" else "1")
+    with pytest.raises(ValueError):
+        auth._parse_signed_state_cookie(tampered)
+    with pytest.raises(ValueError):
+        auth._parse_signed_state_cookie(cookie.split(".", 1)[1])
+
+
+def test_audit_rows_are_written_by_background_writer(auth_state: Path) -> None:
+    admin_db.initialize()
+    request = Request({"type": "http", "method": "POST", "path": "/api/v2/auth/logout", "headers": [], "query_string": b""})
+    request.state.request_id = "req_test"
+    for index in range(3):
+        auth.audit_event(request, event_type="api.test", result="success", actor_user_id=None, details={"n": index})
+    auth.flush_audit_log()
+
+    with admin_db.connection_scope() as con:
+        rows = con.execute(
+            "SELECT request_id, route, method, details_json FROM audit_log WHERE event_type = 'api.test' ORDER BY audit_id"
+        ).fetchall()
+    assert [row["details_json"] for row in rows] == ['{"n":0}', '{"n":1}', '{"n":2}']
+    assert {(row["request_id"], row["route"], row["method"]) for row in rows} == {("req_test", "/api/v2/auth/logout", "POST")}
+
+
+def test_security_audit_events_are_written_synchronously(auth_state: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    admin_db.initialize()
+    monkeypatch.setattr(auth, "_ensure_audit_writer", lambda: pytest.fail("security events must not be queued"))
+    headers = [(b"cookie", b"spacegate_csrf=token")]
+    request = Request({"type": "http", "method": "POST", "path": "/api/v2/admin/jobs", "headers": headers, "query_string": b""})
+    context = auth.SessionContext("sid", 1, "ops@example.org", "Ops", frozenset({"admin"}), ("admin",), "", "", "")
+    with admin_db.connection_scope() as con:
+        con.execute(
+            "INSERT INTO users(user_id, email_norm, status, created_at, updated_at) VALUES (1, 'ops@example.org', 'active', '', '')"
+        )
+        con.commit()
+
+    auth.audit_event(request, event_type="auth.login.denied", result="deny", actor_user_id=None, details={})
+    auth.audit_event(request, event_type="admin.action.run", result="success", actor_user_id=1, details={})
+    with pytest.raises(HTTPException):
+        auth.enforce_csrf(request, context)
+
+    with admin_db.connection_scope() as con:
+        rows = con.execute("SELECT event_type, details_json FROM audit_log ORDER BY audit_id").fetchall()
+    assert [tuple(row) for row in rows] == [
+        ("auth.login.denied", "{}"),
+        ("admin.action.run", "{}"),
+        ("auth.csrf.denied", '{"reason":"missing_token"}'),
+    ]
+
+
+def test_audit_batch_failure_is_logged_and_keeps_good_rows(
+    auth_state: Path, caplog: pytest.LogCaptureFixture
+) -> None:
+    admin_db.initialize()
+    good = (None, "api.test", "success", None, "/", "GET", "{}", "2026-07-16T19:05:00Z")
+    # actor 999 violates the users foreign key.
+    bad = (999, "api.test", "success", None, "/", "GET", "{}", "2026-07-16T19:05:00Z")
+
+    with caplog.at_level("ERROR", logger=auth.logger.name):
+        auth._write_audit_rows([good, bad, good])
+
+    with admin_db.connection_scope() as con:
+        assert con.execute("SELECT COUNT(*) FROM audit_log WHERE event_type = 'api.test'").fetchone()[0] == 2
+    messages = [record.getMessage() for record in caplog.records]
+    assert "Failed to write batch of 3 audit rows; retrying them one at a time" in messages
+    assert "Failed to write audit row (event_type=api.test)" in messages
+
+
+def test_session_and_csrf_cookies_use_precomputed_options(auth_state: Path) -> None:
+    response = Response()
+    auth._set_session_cookie(response, "sid")
+    auth._set_csrf_cookie(response, "csrf")
+    session_header, csrf_header = response.headers.getlist("set-cookie")
+
+    assert session_header.startswith("spacegate_session=sid;")
+    assert "Max-Age=43200" in session_header and "HttpOnly" in session_header
+    assert "SameSite=lax" in session_header and "Secure" not in session_header
+    assert csrf_header.startswith("spacegate_csrf=csrf;")
+    assert "HttpOnly" not in csrf_header
+
+
+def _login(request: Request, *, email: str = "ops@example.org") -> Dict[str, str]:
+    admin_db.initialize()
+    with admin_db.connection_scope() as con:
+        user = auth._ensure_admin_user(
+            con,
+            provider="google",
+            issuer=auth.DEFAULT_AUTH_ISSUER,
+            provider_sub=f"sub-{email}",
+            email_norm=email,
+            display_name="Ops",
+            email_verified=True,
+            claims={"sub": f"sub-{email}"},
+        )
+        session = auth._create_session(con, request, int(user["user_id"]))
+        con.commit()
+    return session
+
+
+def test_fetch_session_context_validates_and_touches_in_one_write(auth_state: Path) -> None:
+    request = Request({"type": "http", "method": "GET", "path": "/", "headers": [], "query_string": b""})
+    session = _login(request)
+
+    context = auth._fetch_session_context(request, session["session_id"])
+    assert context is not None
+    assert context.email == "ops@example.org"
+    assert context.roles == frozenset({"admin"})
+    assert context.roles_sorted == ("admin",)
+
+    with admin_db.connection_scope() as con:
+        con.execute(
+            "UPDATE sessions SET idle_expires_at = '2000-01-01T00:00:00Z' WHERE session_id = ?",
+            (session["session_id"],),
+        )
+        con.commit()
+    assert auth._fetch_session_context(request, session["session_id"]) is None
+    assert auth._fetch_session_context(request, "missing") is None
+
+    _login(request)
+    with admin_db.connection_scope() as con:
+        row = con.execute("SELECT revoked_at FROM sessions WHERE session_id = ?", (session["session_id"],)).fetchone()
+    assert row["revoked_at"] is not None
+
+
+def test_fetch_session_context_rejects_user_agent_mismatch(auth_state: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("SPACEGATE_SESSION_BIND_USER_AGENT", "1")
+    auth.clear_caches()
+    request = Request({"type": "http", "method": "GET", "path": "/", "headers": [(b"user-agent", b"a")], "query_string": b""})
+    session = _login(request)
+    other = Request({"type": "http", "method": "GET", "path": "/", "headers": [(b"user-agent", b"b")], "query_string": b""})
+
+    assert auth._fetch_session_context(other, session["session_id"]) is None
+    assert auth._fetch_session_context(request, session["session_id"]) is not None
+
+
+def test_fetch_session_context_accepts_sessions_bound_to_legacy_ip_prefix(
+    auth_state: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("SPACEGATE_SESSION_BIND_IP_PREFIX", "1")
+    auth.clear_caches()
+
+    def from_host(host: str) -> Request:
+        scope = {"type": "http", "method": "GET", "path": "/", "headers": [], "query_string": b"", "client": (host, 443)}
+        return Request(scope)
+
+    for host, legacy in [("::ffff:203.0.113.45", "::ffff:203.0.113"), ("2001:db8::1", "2001:db8::1")]:
+        session = _login(from_host(host))
+        with admin_db.connection_scope() as con:
+            con.execute(
+                "UPDATE sessions SET ip_prefix_hash = ? WHERE session_id = ?",
+                (auth._sha256_hex(legacy), session["session_id"]),
+            )
+            con.commit()
+
+        assert auth._legacy_ip_prefix(host) == legacy
+        assert auth._fetch_session_context(from_host(host), session["session_id"]) is not None
+        assert auth._fetch_session_context(from_host("198.51.100.7"), session["session_id"]) is None
+
+
+def test_attach_auth_context_skips_config_when_disabled(auth_state: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("SPACEGATE_AUTH_ENABLE", "0")
+    admin_db.clear_caches()
+    monkeypatch.setattr(auth, "_load_config", lambda: pytest.fail("AuthConfig loaded with auth disabled"))
+    request = Request({"type": "http", "method": "GET", "path": "/", "headers": [(b"cookie", b"spacegate_session=x")], "query_string": b""})
+
+    auth.attach_auth_context(request)
+
+    assert request.state.auth_user is None
+    assert request.state.clear_auth_cookie is False
+
+
+def test_login_redirect_appends_state_and_nonce_to_prebuilt_query(auth_state: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("SPACEGATE_OIDC_CLIENT_ID", "client id")
+    monkeypatch.setenv("SPACEGATE_OIDC_REDIRECT_URI", "https://example.org/api/v2/auth/callback")
+    auth.clear_caches()
+    request = Request({"type": "http", "method": "GET", "path": "/api/v2/auth/login", "headers": [], "query_string": b""})
+
+    response = auth.login_redirect(request, "/api/v2/admin/ui")
+    auth.flush_audit_log()
+
+    location = urllib.parse.urlsplit(response.headers["location"])
+    query = urllib.parse.parse_qs(location.query)
+    assert query["client_id"] == ["client id"]
+    assert query["redirect_uri"] == ["https://example.org/api/v2/auth/callback"]
+    assert query["scope"] == ["openid email profile"]
+    state_cookie = response.headers["set-cookie"].split(";", 1)[0].split("=", 1)[1]
+    payload = auth._parse_signed_state_cookie(state_cookie)
+    assert query["state"] == [payload["state"]]
+    assert query["nonce"] == [payload["nonce"]]
+
+
+def test_login_lookup_reports_allowlist_identity_and_email_owner(auth_state: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("SPACEGATE_ADMIN_ALLOWLIST_EMAILS", "ops@example.org")
+    admin_db.clear_caches()
+    request = Request({"type": "http", "method": "GET", "path": "/", "headers": [], "query_string": b""})
+    _login(request)
+
+    def lookup(**overrides: str):
+        params = {"provider": "google", "issuer": auth.DEFAULT_AUTH_ISSUER, "provider_sub": "sub-ops@example.org", "email_norm": "ops@example.org"}
+        params.update(overrides)
+        with admin_db.connection_scope() as con:
+            return auth._login_lookup(con, **params)
+
+    known = lookup()
+    assert known["allowlisted"] == 1
+    assert known["identity_user_id"] == known["email_user_id"]
+    assert known["admin_role_id"] is not None
+
+    new_identity = lookup(provider_sub="sub-other")
+    assert new_identity["identity_user_id"] is None
+    assert new_identity["email_user_id"] == known["email_user_id"]
+
+    stranger = lookup(provider_sub="sub-x", email_norm="x@example.org")
+    assert stranger["allowlisted"] == 0
+    assert stranger["identity_user_id"] is None and stranger["email_user_id"] is None
+
+
+@pytest.mark.parametrize(
+    ("host", "expected"),
+    [
+        ("203.0.113.45", "203.0.113"),
+        ("::ffff:203.0.113.45", "203.0.113"),
+        ("::FFFF:203.0.113.45", "203.0.113"),
+        ("2001:db8::", "2001:db8:0:0"),
+        ("2001:0db8:0000:0001::", "2001:db8:0:1"),
+        ("2001:db8:1:2:3:4:5:6", "2001:db8:1:2"),
+        ("2001:db8::1", "2001:db8:0:0"),
+        ("[2001:db8:1:2::1]", "2001:db8:1:2"),
+        ("fe80::1%eth0", "fe80:0:0:0"),
+        ("testclient", "testclient"),
+        ("", ""),
+    ],
+)
+def test_extract_ip_prefix(host: str, expected: str) -> None:
+    assert auth._extract_ip_prefix(host) == expected
+
+
+def test_exchange_code_for_token_posts_form_through_shared_session(auth_state: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    calls = []
+
+    class FakeResponse:
+        def raise_for_status(self) -> None:
+            return None
+
+        def json(self) -> Dict[str, str]:
+            return {"id_token": "token"}
+
+    class FakeSession:
+        def post(self, url: str, **kwargs):
+            calls.append((url, kwargs))
+            return FakeResponse()
+
+    monkeypatch.setattr(auth, "_http_session", lambda: FakeSession())
+
+    assert auth._exchange_code_for_token("abc") == {"id_token": "token"}
+    url, kwargs = calls[0]
+    assert url == auth.DEFAULT_GOOGLE_TOKEN_URL
+    assert kwargs["data"]["code"] == "abc"
+    assert kwargs["data"]["grant_type"] == "authorization_code"
+
+
+def test_enforce_csrf_checks_header_cookie_and_session_hash(auth_state: Path) -> None:
+    def post(token: str, cookie: str) -> Request:
+        headers = [(b"x-csrf-token", token.encode()), (b"cookie", f"spacegate_csrf={cookie}".encode())]
+        return Request({"type": "http", "method": "POST", "path": "/", "headers": headers, "query_string": b""})
+
+    context = auth.SessionContext("sid", 1, "ops@example.org", "Ops", frozenset({"admin"}), ("admin",), auth._sha256_hex("good"), "", "")
+    request = post("good", "good")
+    auth.enforce_csrf(request, context)
+    auth.enforce_csrf(request, context)
+    assert request.state.auth_csrf_token_hash == context.csrf_hash
+
+    with pytest.raises(HTTPException):
+        auth.enforce_csrf(post("good", "other"), context)
+    with pytest.raises(HTTPException):
+        auth.enforce_csrf(post("bad", "bad"), context)
+
+
+def test_urlsafe_tokens_match_token_urlsafe_shape() -> None:
+    session_id, csrf_secret = auth._urlsafe_tokens(48, 32)
+    assert len(session_id) == 64 and len(csrf_secret) == 43
+    assert set(session_id + csrf_secret) <= set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_")
+    assert session_id != auth._urlsafe_tokens(48)[0]